@@ -0,0 +1,37 @@
+"""Codon positions extracted record by record against a ``GeneMatrix`` per
+gene block (needs NumPy).
+
+Usage::
+
+    python -m benchmarks.bench_codon_positions
+"""
+import time
+from unittest import mock
+
+from dataset_creator import matrix
+from dataset_creator.dataset import Dataset
+
+from .synthetic import make_seq_records
+
+
+def time_dataset(codon_positions):
+    seq_records = make_seq_records(number_taxa=500, number_genes=16, seq_length=1500)
+    start = time.perf_counter()
+    dataset = Dataset(seq_records, format='PHYLIP', codon_positions=codon_positions)
+    return time.perf_counter() - start, dataset.dataset_str
+
+
+def main():
+    print('{0:>16} {1:>12} {2:>12} {3:>10}'.format('codon_positions', 'strings', 'GeneMatrix',
+                                                   'speedup'))
+    for codon_positions in ['1st', '2nd', '3rd', '1st-2nd']:
+        with mock.patch.object(matrix, 'numpy', None):
+            string_time, string_str = time_dataset(codon_positions)
+        matrix_time, matrix_str = time_dataset(codon_positions)
+        assert string_str == matrix_str
+        print('{0:>16} {1:>12.2f} {2:>12.2f} {3:>10.2f}'.format(
+            codon_positions, string_time, matrix_time, string_time / matrix_time))
+
+
+if __name__ == '__main__':
+    main()
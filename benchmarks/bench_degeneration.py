@@ -0,0 +1,38 @@
+"""Degeneration record by record with ``SeqRecordExpanded.degenerate`` against
+``degeneration.degenerate_block``.
+
+Usage::
+
+    python -m benchmarks.bench_degeneration
+"""
+import time
+import warnings
+
+from dataset_creator.degeneration import degenerate_block
+from dataset_creator.utils import get_seq
+
+from .synthetic import make_seq_records
+
+
+def main():
+    warnings.simplefilter('ignore')
+    print('{0:>8} {1:>12} {2:>12} {3:>10}'.format('method', 'by record', 'by block', 'speedup'))
+    for method in ['S', 'Z', 'SZ', 'normal']:
+        seq_records = make_seq_records(number_taxa=500, number_genes=4, seq_length=1500)
+        start = time.perf_counter()
+        expected = [get_seq(seq_record, 'ALL', degenerate=method).seq
+                    for seq_record in seq_records]
+        record_time = time.perf_counter() - start
+
+        seq_records = make_seq_records(number_taxa=500, number_genes=4, seq_length=1500)
+        start = time.perf_counter()
+        result = [seq for seq, warning in degenerate_block(seq_records, method)]
+        block_time = time.perf_counter() - start
+
+        assert expected == result
+        print('{0:>8} {1:>12.2f} {2:>12.2f} {3:>10.2f}'.format(method, record_time, block_time,
+                                                               record_time / block_time))
+
+
+if __name__ == '__main__':
+    main()
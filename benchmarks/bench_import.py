@@ -0,0 +1,65 @@
+"""Cold-start time of ``import dataset_creator``, measured with
+``python -X importtime`` in new interpreters.
+
+Prints the median time of the import over the runs, and the modules that take
+most of it by their own time. Exits with status 1 if the median is above
+``--max-ms``, so it can be run as a check of the import time budget.
+
+Usage::
+
+    python -m benchmarks.bench_import --runs 10 --max-ms 100
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+
+def measure(module):
+    """Imports ``module`` in a new interpreter.
+
+    Returns:
+        dict: ``module name: (self microseconds, cumulative microseconds)`` of
+              every module imported.
+    """
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+                             stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    timings = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, cumulative, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = (int(self_time), int(cumulative))
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--module', default='dataset_creator')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--top', type=int, default=15,
+                        help='number of slowest modules to print')
+    parser.add_argument('--max-ms', type=float, default=100.0,
+                        help='median import time above which the check fails')
+    args = parser.parse_args(argv)
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    totals = [timings[args.module][1] / 1000 for timings in runs]
+    self_times = {}
+    for timings in runs:
+        for name, (self_time, cumulative) in timings.items():
+            self_times.setdefault(name, []).append(self_time / 1000)
+
+    print('{0:>40} {1:>10}'.format('module', 'self ms'))
+    slowest = sorted(self_times.items(), key=lambda item: -statistics.median(item[1]))
+    for name, times in slowest[:args.top]:
+        print('{0:>40} {1:>10.2f}'.format(name, statistics.median(times)))
+
+    median = statistics.median(totals)
+    print('import {0}: median {1:.1f} ms, min {2:.1f} ms over {3} runs, budget {4:.1f} ms'.format(
+        args.module, median, min(totals), len(totals), args.max_ms))
+    return 1 if median > args.max_ms else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,46 @@
+"""Creating datasets from the records against loading them from a snapshot
+written by ``Dataset.save_prepared``.
+
+The outputs are checked to be identical before the timings are printed.
+
+Usage::
+
+    python -m benchmarks.bench_snapshot
+"""
+import os
+import shutil
+import tempfile
+import time
+
+from dataset_creator.dataset import Dataset
+
+from .synthetic import make_seq_records
+
+
+def main():
+    seq_records = make_seq_records(number_taxa=2000, number_genes=10, seq_length=1500)
+    path = tempfile.mkdtemp()
+    filename = os.path.join(path, 'records.snapshot')
+    print('{0:>20} {1:>10} {2:>10} {3:>10} {4:>10}'.format('options', 'records', 'snapshot',
+                                                           'speedup', 'MB'))
+    try:
+        for options in [{}, {'codon_positions': '1st'}, {'aminoacids': True},
+                        {'degenerate': 'S'}]:
+            start = time.perf_counter()
+            dataset = Dataset(seq_records, format='NEXUS', **options)
+            records_time = time.perf_counter() - start
+            dataset.save_prepared(filename)
+
+            start = time.perf_counter()
+            loaded = Dataset.load_prepared(filename)
+            snapshot_time = time.perf_counter() - start
+            assert loaded.dataset_str == dataset.dataset_str
+            print('{0:>20} {1:>10.2f} {2:>10.2f} {3:>10.2f} {4:>10.1f}'.format(
+                ','.join(options) or 'ALL', records_time, snapshot_time,
+                records_time / snapshot_time, os.path.getsize(filename) / 1024 ** 2))
+    finally:
+        shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Scaling benchmark for ``Dataset.sort_seq_records``.
+
+Sorting and indexing should grow close to linearly with the number of records,
+so the time per record should stay about the same as the dataset doubles.
+
+Usage::
+
+    python -m benchmarks.bench_sort_seq_records
+"""
+import random
+import time
+
+from seqrecord_expanded import SeqRecordExpanded
+
+from dataset_creator.dataset import Dataset
+
+
+def make_seq_records(number_genes, number_vouchers, seed=1):
+    rng = random.Random(seed)
+    seq_records = []
+    for gene_number in range(number_genes):
+        for voucher_number in range(number_vouchers):
+            seq_record = SeqRecordExpanded(
+                'ACGT', voucher_code='CP100-{0}'.format(voucher_number),
+                taxonomy={'genus': 'Aus', 'species': 'aus'},
+                gene_code='gene{0}'.format(gene_number), reading_frame=1, table=1,
+            )
+            seq_records.append(seq_record)
+    rng.shuffle(seq_records)
+    return seq_records
+
+
+def time_sort_seq_records(seq_records):
+    dataset = Dataset.__new__(Dataset)
+    dataset.format = 'NEXUS'
+    start = time.perf_counter()
+    dataset.sort_seq_records(seq_records)
+    dataset._validate_outgroup('CP100-0')
+    return time.perf_counter() - start
+
+
+def main():
+    number_genes = 10
+    print('{0:>10} {1:>10} {2:>12} {3:>16}'.format('genes', 'vouchers', 'seconds',
+                                                   'us per record'))
+    for number_vouchers in [500, 1000, 2000, 4000, 8000, 16000]:
+        seq_records = make_seq_records(number_genes, number_vouchers)
+        elapsed = time_sort_seq_records(seq_records)
+        print('{0:>10} {1:>10} {2:>12.4f} {3:>16.2f}'.format(
+            number_genes, number_vouchers, elapsed, elapsed * 1e6 / len(seq_records)))
+
+
+if __name__ == '__main__':
+    main()
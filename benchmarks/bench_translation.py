@@ -0,0 +1,36 @@
+"""Translation record by record with ``SeqRecordExpanded.translate`` against
+``translation.translate_block``.
+
+Usage::
+
+    python -m benchmarks.bench_translation
+"""
+import time
+import warnings
+
+from dataset_creator.translation import translate_block
+from dataset_creator.utils import get_seq
+
+from .synthetic import make_seq_records
+
+
+def main():
+    warnings.simplefilter('ignore')
+    seq_records = make_seq_records(number_taxa=500, number_genes=4, seq_length=1500)
+    start = time.perf_counter()
+    expected = [get_seq(seq_record, 'ALL', aminoacids=True).seq for seq_record in seq_records]
+    record_time = time.perf_counter() - start
+
+    seq_records = make_seq_records(number_taxa=500, number_genes=4, seq_length=1500)
+    start = time.perf_counter()
+    result = [seq for seq, warning in translate_block(seq_records)]
+    block_time = time.perf_counter() - start
+
+    assert expected == result
+    print('{0:>12} {1:>12} {2:>10}'.format('by record', 'by block', 'speedup'))
+    print('{0:>12.2f} {1:>12.2f} {2:>10.2f}'.format(record_time, block_time,
+                                                    record_time / block_time))
+
+
+if __name__ == '__main__':
+    main()
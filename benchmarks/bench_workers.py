@@ -0,0 +1,38 @@
+"""Serial against process-pool rendering of translated and degenerated
+datasets, ``Dataset(..., workers=N)``.
+
+The outputs are checked to be identical before the timings are printed.
+
+Usage::
+
+    python -m benchmarks.bench_workers
+"""
+import os
+import time
+
+from dataset_creator.dataset import Dataset
+
+from .synthetic import make_seq_records
+
+
+def time_dataset(options, workers):
+    seq_records = make_seq_records(number_taxa=200, number_genes=16, seq_length=1500)
+    start = time.perf_counter()
+    dataset = Dataset(seq_records, format='NEXUS', workers=workers, **options)
+    return time.perf_counter() - start, dataset.dataset_str
+
+
+def main():
+    workers = max(os.cpu_count() or 1, 2)
+    print('{0:>20} {1:>10} {2:>14} {3:>10}'.format('options', 'serial', 'workers={0}'.format(workers),
+                                                   'speedup'))
+    for options in [{'aminoacids': True}, {'degenerate': 'S'}]:
+        serial_time, serial_str = time_dataset(options, workers=None)
+        pool_time, pool_str = time_dataset(options, workers=workers)
+        assert serial_str == pool_str
+        print('{0:>20} {1:>10.2f} {2:>14.2f} {3:>10.2f}'.format(
+            ','.join(options), serial_time, pool_time, serial_time / pool_time))
+
+
+if __name__ == '__main__':
+    main()
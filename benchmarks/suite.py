@@ -0,0 +1,192 @@
+"""Scaling benchmark suite for ``Dataset`` over every format and every valid
+combination of partitioning and codon positions, plus aminoacid and
+degenerated datasets.
+
+Each dataset is created in lazy mode and its stages are timed one after the
+other, recording wall time and peak memory (``tracemalloc``) of:
+
+* ``sort``: ``sort_seq_records``, reading ``dataset.seq_records``.
+* ``prepare``: ``_prepare_data``, reading ``dataset.data``.
+* ``render``: ``Creator`` with header, blocks and footer, reading
+  ``dataset.dataset_str``.
+
+Usage::
+
+    python -m benchmarks.suite run --taxa 10,100,1000 --genes 1,10 \\
+        --length 900 --missing 0.2 --reading-frames 1,2,3 --output before.json
+    python -m benchmarks.suite compare before.json after.json --threshold 1.1
+
+``compare`` prints the ratio after/before of each stage and exits with status 1
+if any time grows above the threshold. Stages shorter than ``--min-seconds``
+are too noisy to be reported as regressions.
+"""
+import argparse
+import itertools
+import json
+import sys
+import time
+import tracemalloc
+import warnings
+
+from dataset_creator.dataset import Dataset
+
+from .synthetic import make_seq_records
+
+
+FORMATS = ['NEXUS', 'PHYLIP', 'FASTA', 'TNT', 'MEGA', 'GenBankFASTA', 'Bankit']
+PARTITIONINGS = ['by gene', 'by codon position', '1st-2nd, 3rd']
+CODON_POSITIONS = ['1st', '2nd', '3rd', '1st-2nd', 'ALL']
+STAGES = [
+    ('sort', 'seq_records'),
+    ('prepare', 'data'),
+    ('render', 'dataset_str'),
+]
+
+
+def iter_option_sets(formats=FORMATS):
+    """Yields every valid combination of format, partitioning and codon
+    positions, plus aminoacid and degenerated datasets partitioned by gene.
+    """
+    for file_format, partitioning, codon_positions in itertools.product(
+            formats, PARTITIONINGS, CODON_POSITIONS):
+        if file_format == 'MEGA' and partitioning != 'by gene':
+            continue
+        yield {'format': file_format, 'partitioning': partitioning,
+               'codon_positions': codon_positions}
+    for file_format in formats:
+        yield {'format': file_format, 'partitioning': 'by gene', 'codon_positions': 'ALL',
+               'aminoacids': True}
+        yield {'format': file_format, 'partitioning': 'by gene', 'codon_positions': 'ALL',
+               'degenerate': 'S'}
+
+
+def describe(options):
+    variant = options['codon_positions']
+    if options.get('aminoacids'):
+        variant = 'aminoacids'
+    elif options.get('degenerate'):
+        variant = 'degenerate-{0}'.format(options['degenerate'])
+    return '{0:>12} {1:>18} {2:>12}'.format(options['format'], options['partitioning'],
+                                            variant)
+
+
+def measure(seq_records, options):
+    """Times the stages of a dataset.
+
+    Returns:
+        dict: ``stage: {'seconds': float, 'peak_bytes': int}``
+    """
+    dataset = Dataset(seq_records, lazy=True, **options)
+    stages = {}
+    for stage, attribute in STAGES:
+        tracemalloc.start()
+        start = time.perf_counter()
+        getattr(dataset, attribute)
+        seconds = time.perf_counter() - start
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        stages[stage] = {'seconds': seconds, 'peak_bytes': peak_bytes}
+    return stages
+
+
+def run(args):
+    warnings.simplefilter('ignore')
+    reading_frames = tuple(int(i) for i in args.reading_frames.split(','))
+    formats = args.formats.split(',')
+    results = []
+    for number_taxa, number_genes in itertools.product(args.taxa, args.genes):
+        for options in iter_option_sets(formats):
+            # records are created again for each dataset, as they are modified
+            # when sorted and translated
+            seq_records = make_seq_records(number_taxa, number_genes, args.length,
+                                           missing_fraction=args.missing,
+                                           reading_frames=reading_frames, seed=args.seed)
+            stages = measure(seq_records, options)
+            result = dict(options, taxa=number_taxa, genes=number_genes, length=args.length,
+                          missing=args.missing, reading_frames=list(reading_frames),
+                          stages=stages)
+            results.append(result)
+            print('{0} {1:>7} {2:>6}  {3}'.format(
+                describe(options), number_taxa, number_genes, '  '.join(
+                    '{0} {1:.3f}s {2:.1f}MB'.format(stage, values['seconds'],
+                                                    values['peak_bytes'] / 1e6)
+                    for stage, values in stages.items())))
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(results, handle, indent=1)
+    return 0
+
+
+def result_key(result):
+    return (result['format'], result['partitioning'], result['codon_positions'],
+            result.get('aminoacids'), result.get('degenerate'), result['taxa'],
+            result['genes'], result['length'], result['missing'],
+            tuple(result['reading_frames']))
+
+
+def compare(args):
+    with open(args.before) as handle:
+        before = dict((result_key(result), result) for result in json.load(handle))
+    with open(args.after) as handle:
+        after = [result for result in json.load(handle) if result_key(result) in before]
+
+    regressions = 0
+    for result in after:
+        old_stages = before[result_key(result)]['stages']
+        columns = []
+        for stage, values in result['stages'].items():
+            old_values = old_stages[stage]
+            time_ratio = values['seconds'] / max(old_values['seconds'], 1e-9)
+            memory_ratio = values['peak_bytes'] / max(old_values['peak_bytes'], 1)
+            flag = ''
+            if time_ratio > args.threshold and values['seconds'] >= args.min_seconds:
+                flag = '!'
+                regressions += 1
+            columns.append('{0} x{1:.2f}{2} mem x{3:.2f}'.format(stage, time_ratio, flag,
+                                                                 memory_ratio))
+        print('{0} {1:>7} {2:>6}  {3}'.format(
+            describe(result), result['taxa'], result['genes'], '  '.join(columns)))
+
+    print('{0} stages slower than x{1}'.format(regressions, args.threshold))
+    return 1 if regressions else 0
+
+
+def make_parser():
+    def integers(value):
+        return [int(i) for i in value.split(',')]
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    run_parser = subparsers.add_parser('run', help='run the benchmarks')
+    run_parser.add_argument('--taxa', type=integers, default=[10, 100, 1000])
+    run_parser.add_argument('--genes', type=integers, default=[1, 10])
+    run_parser.add_argument('--length', type=int, default=900)
+    run_parser.add_argument('--missing', type=float, default=0.1,
+                            help='fraction of each sequence that is missing')
+    run_parser.add_argument('--reading-frames', default='1,2,3')
+    run_parser.add_argument('--formats', default=','.join(FORMATS))
+    run_parser.add_argument('--seed', type=int, default=1)
+    run_parser.add_argument('--output', help='JSON file for the results')
+    run_parser.set_defaults(function=run)
+
+    compare_parser = subparsers.add_parser('compare', help='compare two runs')
+    compare_parser.add_argument('before')
+    compare_parser.add_argument('after')
+    compare_parser.add_argument('--threshold', type=float, default=1.1,
+                                help='time ratio above which a stage is a regression')
+    compare_parser.add_argument('--min-seconds', type=float, default=0.01,
+                                help='stages faster than this are not regressions')
+    compare_parser.set_defaults(function=compare)
+    return parser
+
+
+def main(argv=None):
+    args = make_parser().parse_args(argv)
+    return args.function(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
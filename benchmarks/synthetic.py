@@ -0,0 +1,43 @@
+"""Deterministic synthetic sequence records for benchmarks.
+
+The same parameters and seed always give the same records, so timings of two
+runs can be compared.
+"""
+import random
+
+from seqrecord_expanded import SeqRecordExpanded
+
+
+def make_seq_records(number_taxa, number_genes, seq_length, missing_fraction=0.0,
+                     reading_frames=(1,), table=1, seed=1):
+    """Creates ``number_taxa * number_genes`` SeqRecordExpanded objects, sorted
+    by gene_code and then voucher_code.
+
+    Parameters:
+        number_taxa (int):          Vouchers ``CP100-0``, ``CP100-1``...
+        number_genes (int):         Genes ``gene0``, ``gene1``...
+        seq_length (int):           Length of every sequence.
+        missing_fraction (float):   Fraction of each sequence replaced by ``?``,
+                                    split between both ends as in partial
+                                    sequences.
+        reading_frames (tuple):     Reading frames assigned to the genes in
+                                    turn.
+        table (int):                Translation table of all the genes.
+        seed (int):                 Seed of the random generator.
+    """
+    rng = random.Random(seed)
+    missing_length = int(seq_length * missing_fraction)
+    seq_records = []
+    for gene_number in range(number_genes):
+        gene_code = 'gene{0}'.format(gene_number)
+        reading_frame = reading_frames[gene_number % len(reading_frames)]
+        for taxon_number in range(number_taxa):
+            bases = rng.choices('ACGT', k=seq_length - missing_length)
+            leading = rng.randint(0, missing_length)
+            seq = '?' * leading + ''.join(bases) + '?' * (missing_length - leading)
+            seq_records.append(SeqRecordExpanded(
+                seq, voucher_code='CP100-{0}'.format(taxon_number),
+                taxonomy={'genus': 'Aus', 'species': 'sp{0}'.format(taxon_number)},
+                gene_code=gene_code, reading_frame=reading_frame, table=table,
+            ))
+    return seq_records
@@ -0,0 +1,88 @@
+"""Creates the datasets of a JSON manifest of jobs.
+
+Usage::
+
+    dataset-creator manifest.json --workers 4 --report report.json
+
+See ``batch.load_manifest`` for the manifest. Exits with 1 if a job failed,
+and 2 if the manifest cannot be read.
+"""
+import argparse
+import json
+import sys
+import time
+
+from .batch import load_manifest
+from .batch import run_jobs
+
+
+def make_parser():
+    parser = argparse.ArgumentParser(
+        prog='dataset-creator',
+        description='Creates the datasets of a JSON manifest of jobs.',
+    )
+    parser.add_argument('manifest', help='JSON file with the inputs and jobs')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='number of processes, 1 to run the jobs in this process '
+                             '(default: number of CPUs)')
+    parser.add_argument('--report', metavar='FILE',
+                        help='write the files, checksums, timings and errors of the jobs '
+                             'into a JSON file')
+    return parser
+
+
+def format_result(result):
+    """Returns a line with the status, time and output of a job."""
+    prepared = ''
+    if result.prepare_seconds is not None:
+        prepared = ' (prepared in {0:.2f}s)'.format(result.prepare_seconds)
+    if result.error is not None:
+        return 'FAILED {0:8.2f}s {1}{2}: {3}'.format(result.seconds, result.job.output,
+                                                     prepared, result.error)
+    return 'ok     {0:8.2f}s {1}{2}'.format(result.seconds, ', '.join(result.checksums),
+                                            prepared)
+
+
+def make_report(results):
+    return [
+        {
+            'output': result.job.output,
+            'options': result.job.options,
+            'compression': result.job.compression,
+            'files': result.checksums,
+            'prepare_seconds': result.prepare_seconds,
+            'seconds': result.seconds,
+            'timings': result.timings,
+            'error': result.error,
+        }
+        for result in results
+    ]
+
+
+def main(argv=None):
+    args = make_parser().parse_args(argv)
+    if args.workers is not None and args.workers < 1:
+        print('dataset-creator: error: --workers should be at least 1', file=sys.stderr)
+        return 2
+    try:
+        jobs = load_manifest(args.manifest)
+    except (ValueError, OSError) as error:
+        print('dataset-creator: error: {0}'.format(error), file=sys.stderr)
+        return 2
+
+    start = time.perf_counter()
+    results = run_jobs(jobs, workers=args.workers)
+    for result in results:
+        print(format_result(result))
+    failed = sum(1 for result in results if result.error is not None)
+    print('{0} jobs, {1} failed, {2:.2f}s'.format(len(results), failed,
+                                                  time.perf_counter() - start))
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as handle:
+            json.dump(make_report(results), handle, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
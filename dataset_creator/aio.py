@@ -0,0 +1,60 @@
+import asyncio
+import functools
+import threading
+
+
+async def run_in_executor(function, *args, executor=None, **kwargs):
+    """Calls ``function(*args, **kwargs)`` in ``executor`` without blocking
+    the event loop.
+
+    Parameters:
+        executor:   ``concurrent.futures`` executor. ``None`` for the default
+                    executor of the loop, a thread pool.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(function, *args, **kwargs))
+
+
+async def iterate_in_executor(iterator, executor=None):
+    """Yields the items of a blocking iterator, each one produced in
+    ``executor``.
+
+    If the async iteration is cancelled or closed, the iterator is closed in
+    the executor once the item being produced is ready, so a generator is
+    never closed while it is running. The iteration ends when the iterator
+    is closed.
+
+    Parameters:
+        iterator:   Iterator whose items are not ``None``.
+        executor:   Thread pool executor. Generators cannot be sent to other
+                    processes. ``None`` for the default executor of the loop.
+    """
+    loop = asyncio.get_running_loop()
+    lock = threading.Lock()
+    closed = []
+
+    def get_next():
+        with lock:
+            if closed:
+                return None
+            return next(iterator, None)
+
+    def close():
+        with lock:
+            closed.append(True)
+            if hasattr(iterator, 'close'):
+                iterator.close()
+
+    try:
+        while True:
+            item = await loop.run_in_executor(executor, get_next)
+            if item is None:
+                return
+            yield item
+    finally:
+        try:
+            closing = loop.run_in_executor(executor, close)
+        except RuntimeError:  # the loop is closed
+            close()
+        else:
+            await closing
@@ -0,0 +1,288 @@
+import csv
+import mmap
+from array import array
+
+from Bio.Seq import Seq
+from seqrecord_expanded import SeqRecordExpanded
+
+# removed from the sequences, as ``bytes.split`` does
+WHITESPACE = b' \t\n\r\x0b\x0c'
+
+
+class AlignmentFile(object):
+    """Memory-maps an aligned FASTA or NEXUS file and indexes where the
+    sequence of each taxon is, so sequences are read from the file only when
+    they are needed.
+
+    NEXUS files are read from ``MATRIX`` to the next ``;``, one taxon per line
+    followed by its sequence. In interleaved matrices the lines of a taxon are
+    joined. Taxon ids repeated in a FASTA file are an error.
+
+    The index keeps one span of the file per FASTA record, or per line of a
+    NEXUS matrix, in arrays of offsets. Spaces and line breaks are removed when
+    the sequence is read.
+
+    The file stays mapped while the object is used, as the ``AlignmentSeqRecord``
+    objects made from it read their sequences from the map. It is unmapped by
+    ``close()``, at the end of a ``with`` block or when the object is garbage
+    collected; sequences cannot be read after that.
+
+    Parameters:
+        path (str):     Path to the FASTA (``>`` headers) or NEXUS file.
+
+    Attributes:
+        ids (list):     Taxon ids in the order of the file. For FASTA files, the
+                        first word of the header.
+
+    Raises:
+        ValueError:     if a taxon id is repeated in a FASTA file.
+
+    Example::
+
+        with AlignmentFile('COI.fasta') as alignment_file:
+            seq_records = [AlignmentSeqRecord(alignment_file, taxon_id, voucher_code=taxon_id,
+                                              gene_code='COI', reading_frame=1, table=5)
+                           for taxon_id in alignment_file.ids]
+            dataset_str = Dataset(seq_records, format='NEXUS').dataset_str
+    """
+    def __init__(self, path):
+        self.path = path
+        self.ids = []
+        # spans of the file with the sequences; each one has the position of
+        # the next span of the same taxon, or -1
+        self._starts = array('q')
+        self._ends = array('q')
+        self._next_spans = array('q')
+        self._first_spans = {}
+        self._last_spans = {}
+        with open(path, 'rb') as handle:
+            try:
+                self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file
+                self._mmap = b''
+
+        try:
+            if self._find_nexus_matrix() is not None:
+                self._index_nexus()
+            else:
+                self._index_fasta()
+        except Exception:
+            self.close()
+            raise
+        # only needed to chain spans while indexing
+        self._last_spans = None
+
+    def _add_span(self, taxon_id, start, end):
+        span = len(self._starts)
+        self._starts.append(start)
+        self._ends.append(max(start, end))
+        self._next_spans.append(-1)
+        if taxon_id in self._first_spans:
+            self._next_spans[self._last_spans[taxon_id]] = span
+        else:
+            self.ids.append(taxon_id)
+            self._first_spans[taxon_id] = span
+        self._last_spans[taxon_id] = span
+
+    def _iter_lines(self, start, end):
+        """Yields ``(line_start, line_end)`` of the lines between two offsets."""
+        while start < end:
+            line_end = self._mmap.find(b'\n', start, end)
+            if line_end == -1:
+                line_end = end
+            yield start, line_end
+            start = line_end + 1
+
+    def _index_fasta(self):
+        """Adds a span from the end of each header to the next header."""
+        size = len(self._mmap)
+        if self._mmap[:1] == b'>':
+            header_start = 0
+        else:
+            header_start = self._mmap.find(b'\n>') + 1
+            if header_start == 0:
+                return
+        while True:
+            header_end = self._mmap.find(b'\n', header_start)
+            if header_end == -1:
+                header_end = size
+            header = self._mmap[header_start + 1:header_end].decode('utf-8').split()
+            taxon_id = header[0] if header else ''
+            if taxon_id in self._first_spans:
+                raise ValueError("Taxon id {0!r} is repeated in {1}".format(taxon_id, self.path))
+            next_header = self._mmap.find(b'\n>', header_end)
+            seq_end = size if next_header == -1 else next_header
+            self._add_span(taxon_id, header_end + 1, seq_end)
+            if next_header == -1:
+                return
+            header_start = next_header + 1
+
+    def _find_nexus_matrix(self):
+        head = self._mmap[:4096].lstrip().upper()
+        if not head.startswith(b'#NEXUS'):
+            return None
+        position = 0
+        while True:
+            position = self._mmap.find(b'\n', position)
+            if position == -1:
+                return None
+            position += 1
+            line_end = self._mmap.find(b'\n', position)
+            if line_end == -1:
+                line_end = len(self._mmap)
+            if self._mmap[position:line_end].strip().upper() == b'MATRIX':
+                return line_end + 1
+
+    def _index_nexus(self):
+        matrix_start = self._find_nexus_matrix()
+        matrix_end = self._mmap.find(b';', matrix_start)
+        if matrix_end == -1:
+            matrix_end = len(self._mmap)
+
+        for line_start, line_end in self._iter_lines(matrix_start, matrix_end):
+            line = self._mmap[line_start:line_end]
+            stripped = line.strip()
+            if not stripped or stripped.startswith(b'['):
+                continue
+            words = stripped.split(None, 1)
+            seq_start = line_start + line.index(words[0]) + len(words[0])
+            self._add_span(words[0].decode('utf-8'), seq_start, line_end)
+
+    def close(self):
+        """Unmaps the file."""
+        if isinstance(self._mmap, mmap.mmap):
+            self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, taxon_id):
+        return taxon_id in self._first_spans
+
+    def get_sequence(self, taxon_id):
+        """Reads the sequence of ``taxon_id`` from the file, without spaces or
+        line breaks.
+        """
+        chunks = []
+        span = self._first_spans[taxon_id]
+        while span != -1:
+            chunks.append(self._mmap[self._starts[span]:self._ends[span]].translate(
+                None, WHITESPACE))
+            span = self._next_spans[span]
+        return b''.join(chunks).decode('ascii')
+
+
+class AlignmentSeqRecord(SeqRecordExpanded):
+    """SeqRecordExpanded whose sequence stays in a memory-mapped
+    ``AlignmentFile`` until it is read.
+
+    The sequence is read from the file every time ``seq`` is accessed, unless
+    it has been replaced. Trimming it to the reading frame before translating
+    or degenerating only keeps the offset. Records are pickled with their
+    sequence, so they can be sent to worker processes.
+
+    Parameters:
+        alignment_file (AlignmentFile):
+        taxon_id (str):     id of the sequence in the alignment file.
+
+    The rest of parameters are those of SeqRecordExpanded, except ``seq``.
+    """
+    def __init__(self, alignment_file, taxon_id, voucher_code=None, taxonomy=None,
+                 lineage=None, gene_code=None, reading_frame=None, table=None,
+                 accession_number=None):
+        super(AlignmentSeqRecord, self).__init__(
+            '', voucher_code=voucher_code, taxonomy=taxonomy, lineage=lineage,
+            gene_code=gene_code, reading_frame=reading_frame, table=table,
+            accession_number=accession_number)
+        self._alignment_file = alignment_file
+        self._taxon_id = taxon_id
+        # read from the file until it is replaced
+        self._seq = None
+        self._start = 0
+
+    @property
+    def seq(self):
+        if self._seq is not None:
+            return self._seq
+        seq = self._alignment_file.get_sequence(self._taxon_id)[self._start:]
+        return Seq(seq.replace("-", "?"))
+
+    @seq.setter
+    def seq(self, value):
+        self._seq = value
+
+    def _correct_seq_based_on_reading_frame(self):
+        """Keeps where the reading frame starts instead of a trimmed copy of
+        the sequence.
+        """
+        if (self._seq is None and self.reading_frame in [2, 3] and
+                not self._sequence_was_corrected):
+            self._sequence_was_corrected = True
+            self._start = self.reading_frame - 1
+        else:
+            super(AlignmentSeqRecord, self)._correct_seq_based_on_reading_frame()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_seq'] = self.seq
+        state['_start'] = 0
+        state['_alignment_file'] = None
+        return state
+
+
+def read_metadata_table(path):
+    """Reads a tab separated file with a ``voucher_code`` column and one column
+    per taxonomic rank (``genus``, ``species``...).
+
+    Returns:
+        dict: ``voucher_code: taxonomy`` where taxonomy is a dict without the
+        empty values.
+    """
+    metadata = {}
+    with open(path) as handle:
+        for row in csv.DictReader(handle, delimiter='\t'):
+            voucher_code = row.pop('voucher_code')
+            metadata[voucher_code] = dict((key, value) for key, value in row.items() if value)
+    return metadata
+
+
+def load_alignment_files(alignment_files, metadata=None):
+    """Creates AlignmentSeqRecord objects for all the sequences of several
+    per gene alignment files.
+
+    Parameters:
+        alignment_files (dict):  ``gene_code: path`` or ``gene_code: dict`` with
+                                 the keys ``path``, ``reading_frame`` and
+                                 ``table``.
+        metadata (dict or str):  ``voucher_code: taxonomy`` or the path to a
+                                 tab separated file read by
+                                 ``read_metadata_table``. Taxon ids of the
+                                 alignments are used as voucher codes.
+
+    Returns:
+        list of AlignmentSeqRecord objects. The files stay mapped until the
+        records are garbage collected.
+    """
+    if isinstance(metadata, str):
+        metadata = read_metadata_table(metadata)
+    elif metadata is None:
+        metadata = {}
+
+    seq_records = []
+    for gene_code, gene in alignment_files.items():
+        if isinstance(gene, str):
+            gene = {'path': gene}
+        alignment_file = AlignmentFile(gene['path'])
+        for taxon_id in alignment_file.ids:
+            seq_records.append(AlignmentSeqRecord(
+                alignment_file, taxon_id, voucher_code=taxon_id,
+                taxonomy=metadata.get(taxon_id), gene_code=gene_code,
+                reading_frame=gene.get('reading_frame'), table=gene.get('table'),
+            ))
+    return seq_records
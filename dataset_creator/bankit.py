@@ -1,8 +1,9 @@
-from .utils import get_seq
 from .base_dataset import DatasetBlock
 
 
 class BankitDatasetBlock(DatasetBlock):
+    fill_missing_records = False
+
     def convert_to_string(self, block):
         """
         Takes a list of SeqRecordExpanded objects corresponding to a gene_code
@@ -20,11 +21,7 @@ class BankitDatasetBlock(DatasetBlock):
                 seq_record.taxonomy['genus'],
                 seq_record.taxonomy['species'],
             )
-            sequence = get_seq(seq_record, self.codon_positions, self.aminoacids,
-                               self.degenerate)
-            seq = sequence.seq
-            if sequence.warning:
-                self.warnings.append(sequence.warning)
+            seq = self.get_sequence(seq_record)
 
             n = 60
             seq = [seq[i:i + n] for i in range(0, len(seq), n)]
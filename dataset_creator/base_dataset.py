@@ -1,16 +1,20 @@
-import re
 try:
     from collections import OrderedDict
 except ImportError:
     from ordereddict import OrderedDict
 
+from .labels import TaxonLabels
+from .labels import flatten_taxonomy
 from .utils import get_seq
+from .utils import join_chunks
+from .utils import make_unique_label
+from .utils import strip_chunks
 
 
 class DatasetBlock(object):
     """
-    By default, the data sequences block generated is NEXUS and we use BioPython
-    tools to convert it to other formats such as FASTA.
+    By default, the data sequences block generated is NEXUS. PHYLIP and FASTA
+    matrices are written by the subclasses in ``phylip`` and ``fasta``.
     However, sometimes the blo
 
     Parameters:
@@ -20,6 +24,11 @@ class DatasetBlock(object):
                                   * number_taxa: string
                                   * seq_records: list of SeqRecordExpanded objects
                                   * gene_codes_and_lengths: OrderedDict
+                                  * seq_records_index: SeqRecordsIndex
+                                  * sequences: SequenceStore
+                                  * taxon_labels: TaxonLabels
+                                  * taxa: voucher codes of every gene block, or
+                                    None to render only the existing records
         codon_positions (str):   str. Can be 1st, 2nd, 3rd, 1st-2nd, ALL (default).
         partitioning (str):
         aminoacids (boolean):
@@ -27,6 +36,10 @@ class DatasetBlock(object):
         format (str):       NEXUS, PHYLIP or FASTA.
         outgroup (str):     Specimen code of taxon that should be used as outgroup.
     """
+    # GenBank submissions only have the records that exist, matrices get the
+    # missing records when ``data.taxa`` is given
+    fill_missing_records = True
+
     def __init__(self, data, codon_positions, partitioning, aminoacids=None,
                  degenerate=None, format=None, outgroup=None):
         self.warnings = []
@@ -37,7 +50,17 @@ class DatasetBlock(object):
         self.degenerate = degenerate
         self.format = format
         self.outgroup = outgroup
+        self.profiler = None
+        self.rendered_blocks = None
+        self.block_cache = None
         self._blocks = []
+        self._missing_sequences = {}
+        self._sequences = getattr(data, 'sequences', None)
+        if self._sequences is not None:
+            self.warnings = self._sequences.warnings
+        self.labels = getattr(data, 'taxon_labels', None)
+        if self.labels is None:
+            self.labels = TaxonLabels()
 
     def dataset_block(self):
         """Creates the block with taxon names and their sequences.
@@ -51,12 +74,154 @@ class DatasetBlock(object):
             CP100_11_Aus_bus   ACGATRGACGATRA...
             ...
 
+        """
+        return ''.join(self.iter_dataset_block())
+
+    def iter_dataset_block(self):
+        """Yields the dataset block one gene block at a time.
+
+        The joined chunks are identical to the output of ``dataset_block``, but
+        only one gene block needs to be held in memory at any time.
         """
         self.split_data()
-        out = []
+        chunks = (self.convert_block(block) for block in self.iter_blocks())
+        for chunk in strip_chunks(join_chunks(chunks, '\n')):
+            yield chunk
+        yield '\n;\nEND;'
+
+    def iter_blocks(self):
+        """Yields the gene blocks made by ``split_data``, with the missing
+        records of the gene if ``data.taxa`` is given.
+        """
+        taxa = getattr(self.data, 'taxa', None)
         for block in self._blocks:
-            out.append(self.convert_to_string(block))
-        return '\n'.join(out).strip() + '\n;\nEND;'
+            if taxa is not None and self.fill_missing_records:
+                block = self.fill_block(block, taxa)
+            yield block
+
+    def fill_block(self, block, taxa):
+        """Returns the records of a gene block with a ``MissingSeqRecord`` for
+        each voucher code of ``taxa`` without a record of the gene.
+
+        Parameters:
+            block (list):   records of a gene, sorted by voucher code.
+            taxa (list):    voucher codes sorted the same way.
+        """
+        from .stored_records import MissingSeqRecord
+
+        first_seq_record = block[0]
+        length = max(self._get_raw_length(seq_record) for seq_record in block)
+        filled_block = []
+        index = 0
+        for voucher_code in taxa:
+            if index < len(block) and block[index].voucher_code == voucher_code:
+                while index < len(block) and block[index].voucher_code == voucher_code:
+                    filled_block.append(block[index])
+                    index += 1
+            else:
+                filled_block.append(MissingSeqRecord(
+                    self.data.seq_records_index.get_first_seq_record(voucher_code),
+                    first_seq_record.gene_code, length,
+                    first_seq_record.reading_frame, first_seq_record.table,
+                ))
+        return filled_block + block[index:]
+
+    def _get_raw_length(self, seq_record):
+        """Length of the sequence before it was trimmed to its reading frame."""
+        length = len(seq_record.seq)
+        if (getattr(seq_record, '_sequence_was_corrected', False) and
+                seq_record.reading_frame in [2, 3]):
+            length += seq_record.reading_frame - 1
+        return length
+
+    def convert_block(self, block):
+        """Returns ``convert_to_string(block)``, taken from ``rendered_blocks``
+        if it is a dict and the gene was already rendered, and kept in it
+        otherwise.
+        """
+        if self.rendered_blocks is None:
+            return self.render_cached_block(block)
+        gene_code = block[0].gene_code
+        if gene_code not in self.rendered_blocks:
+            self.rendered_blocks[gene_code] = self.render_cached_block(block)
+        return self.rendered_blocks[gene_code]
+
+    def render_cached_block(self, block):
+        """Returns ``convert_to_string(block)`` from the ``block_cache``, if
+        there is one, rendering and storing it if it is not there.
+        """
+        return self._get_from_cache('block', block, self.convert_to_string)
+
+    def get_block_sequences(self, block):
+        """Returns the list of transformed sequences of a gene block, as
+        ``get_sequence`` does for each record, from the ``block_cache`` if
+        there is one.
+        """
+        if self.block_cache is None:
+            return self.render_block(block, self._get_sequences)
+        return self._get_from_cache('sequences', block, self._get_joined_sequences).split('\n')
+
+    def _get_sequences(self, block):
+        return [self.get_sequence(seq_record) for seq_record in block]
+
+    def _get_joined_sequences(self, block):
+        return '\n'.join(self._get_sequences(block))
+
+    def _get_from_cache(self, kind, block, function):
+        if self.block_cache is None:
+            return self.render_block(block, function)
+
+        key = self.block_cache.make_key(kind, block, self.get_cache_options())
+        entry = self.block_cache.get_entry(key)
+        if entry is None:
+            number_warnings = len(self.warnings)
+            value = self.render_block(block, function)
+            self.block_cache.put(key, value, self._get_block_warnings(block, number_warnings))
+            if self.profiler is not None:
+                self.profiler.count('cache_misses')
+            return value
+
+        self._collect_cached_warnings(block, entry.warnings)
+        if self.profiler is not None:
+            self.profiler.count('cache_hits')
+        return entry.value
+
+    def _get_block_warnings(self, block, number_warnings):
+        """Returns ``[index, warning]`` of the records of a rendered block with
+        a warning. Without a SequenceStore, the warnings added since there
+        were ``number_warnings`` are kept without their records.
+        """
+        if self._sequences is None:
+            return [[None, warning] for warning in self.warnings[number_warnings:]]
+        return [[index, self._sequences.get_warning(seq_record)]
+                for index, seq_record in enumerate(block)
+                if self._sequences.get_warning(seq_record) is not None]
+
+    def _collect_cached_warnings(self, block, warnings):
+        """Collects the warnings of a block read from the ``block_cache``, as
+        if its sequences had been requested.
+        """
+        for index, warning in warnings:
+            if index is None or self._sequences is None:
+                self.warnings.append(warning)
+            else:
+                self._sequences.collect_warning(block[index], warning)
+
+    def get_cache_options(self):
+        """Options that change how a gene block is rendered, part of the key of
+        the blocks in the ``block_cache``.
+        """
+        return [type(self).__name__, self.format, self.codon_positions, self.partitioning,
+                self.aminoacids, self.degenerate, self.outgroup]
+
+    def render_block(self, block, function, *args):
+        """Calls ``function(block, *args)``, timing it as the render time of
+        the gene of the block if the dataset is profiled.
+        """
+        if self.profiler is None or not block:
+            return function(block, *args)
+        with self.profiler.gene(block[0].gene_code):
+            return function(block, *args)
 
     def split_data(self):
         """Splits the list of SeqRecordExpanded objects into lists, which are
@@ -120,9 +285,7 @@ class DatasetBlock(object):
             if seq_record.gene_code not in block_3rd:
                 block_3rd[seq_record.gene_code] = []
 
-            taxonomy_as_string = self.flatten_taxonomy(seq_record)
-            taxon_id = '>{0}{1}'.format(seq_record.voucher_code,
-                                        taxonomy_as_string)
+            taxon_id = '>{0}'.format(self.labels.get_label(seq_record))
             block_1st2nd[seq_record.gene_code].append('{0}\n{1}\n'.format(taxon_id,
                                                                           seq_record.first_and_second_codon_positions()))
             block_1st[seq_record.gene_code].append('{0}\n{1}\n'.format(taxon_id,
@@ -164,54 +327,106 @@ class DatasetBlock(object):
 
     def make_datablock_by_gene(self, block):
         out = None
-        max_taxon_id = 0
-        for seq_record in block:
-            taxon_id = '{0}_{1}_{2}'.format(seq_record.voucher_code,
-                                            seq_record.taxonomy.get('genus', ''),
-                                            seq_record.taxonomy.get('species', ''),
-                                            )
-            if len(taxon_id) > max_taxon_id:
-                max_taxon_id = len(taxon_id)
-
-        pad_number = max_taxon_id + 1
-        if pad_number < 55:
-            pad_number = 55
+        pad_number = self.get_pad_number(block)
 
         for seq_record in block:
             if not out:
                 out = '[{0}]\n'.format(seq_record.gene_code)
-            taxonomy_as_string = self.flatten_taxonomy(seq_record)
-            taxon_id = '{0}{1}'.format(seq_record.voucher_code,
-                                       taxonomy_as_string)
-
-            sequence = get_seq(seq_record, self.codon_positions,
-                               aminoacids=self.aminoacids,
-                               degenerate=self.degenerate)
-            seq = sequence.seq
-            if sequence.warning:
-                self.warnings.append(sequence.warning)
+            taxon_id = self.labels.get_label(seq_record)
 
+            seq = self.get_sequence(seq_record)
             out += '{0}{1}\n'.format(taxon_id.ljust(pad_number), seq)
         return out
 
+    def get_pad_number(self, block):
+        """Returns the width of the taxon names column of a gene block: one
+        more than its longest ``voucher_genus_species`` label, and at least 55.
+        """
+        pad_number = self.labels.get_width(block) + 1
+        if pad_number < 55:
+            pad_number = 55
+        return pad_number
+
+    def get_sequence(self, seq_record):
+        """Returns the sequence of ``seq_record`` transformed according to
+        codon_positions, aminoacids and degenerate.
+
+        It is taken from the SequenceStore of the dataset, so each sequence is
+        transformed and its warnings are collected only once.
+        """
+        if getattr(seq_record, 'is_missing', False):
+            return self._get_missing_sequence(seq_record)
+        if self._sequences is not None:
+            return self._sequences.get(seq_record)
+
+        if self.profiler is not None:
+            self.profiler.count('get_seq')
+        sequence = get_seq(seq_record, self.codon_positions,
+                           aminoacids=self.aminoacids,
+                           degenerate=self.degenerate)
+        if sequence.warning:
+            self.warnings.append(sequence.warning)
+        return sequence.seq
+
+    def _get_missing_sequence(self, seq_record):
+        """The missing records of a gene are all equal, so the sequence of one
+        of them is transformed and reused for the others.
+        """
+        key = (seq_record.gene_code, seq_record._length)
+        if key not in self._missing_sequences:
+            self._missing_sequences[key] = get_seq(seq_record, self.codon_positions,
+                                                   aminoacids=self.aminoacids,
+                                                   degenerate=self.degenerate).seq
+        return self._missing_sequences[key]
+
+    def concatenate_blocks(self, get_label=None):
+        """Joins the sequences of each taxon across all gene blocks, the same
+        way an interleaved NEXUS matrix is read.
+
+        Repeated taxon names get the suffixes ``.copy``, ``.copy1``, etc.
+
+        Parameters:
+            get_label (callable):   Returns the taxon name of a record. The
+                                    default is ``labels.get_label``.
+
+        Returns:
+            OrderedDict: ``taxon_id: sequence`` in the order of the first gene
+                         block.
+
+        Raises:
+            ValueError: if a taxon is not found in the first gene block.
+        """
+        if get_label is None:
+            get_label = self.labels.get_label
+        self.split_data()
+        matrix = OrderedDict()
+        for index, block in enumerate(self.iter_blocks()):
+            self._add_block_to_matrix(block, matrix, index == 0, get_label)
+
+        for taxon_id, seqs in matrix.items():
+            matrix[taxon_id] = ''.join(seqs)
+        return matrix
+
+    def _add_block_to_matrix(self, block, matrix, is_first_block, get_label):
+        taxon_ids = []
+        seen = set()
+        last_copies = {}
+        for seq_record in block:
+            taxon_id = make_unique_label(seen, get_label(seq_record), last_copies)
+            taxon_ids.append(taxon_id)
+            seen.add(taxon_id)
+
+            if is_first_block:
+                matrix[taxon_id] = []
+            elif taxon_id not in matrix:
+                raise ValueError("Taxon {0!r} is not in the first gene block. All genes "
+                                 "should have the same taxa.".format(taxon_id))
+
+        for taxon_id, seq in zip(taxon_ids, self.get_block_sequences(block)):
+            matrix[taxon_id].append(seq)
+
     def flatten_taxonomy(self, seq_record):
-        out = ''
-        if seq_record.taxonomy is None:
-            return out
-        else:
-            keys = [
-                'orden', 'superfamily', 'family', 'subfamily', 'tribe', 'subtribe',
-                'genus', 'species', 'subspecies', 'author', 'hostorg', 'country',
-                'specific_locality'
-            ]
-            for key in keys:
-                try:
-                    out += "_" + seq_record.taxonomy[key]
-                except KeyError:
-                    pass
-            out = out.replace(" ", "_")
-            out = re.sub("_$", "", out)
-            return re.sub('_+', '_', out)
+        return flatten_taxonomy(seq_record.taxonomy)
 
 
 class DatasetFooter(object):
@@ -392,11 +607,10 @@ END;
         """
         if self.outgroup is not None:
             outgroup_taxonomy = ''
-            for i in self.data.seq_records:
-                if self.outgroup == i.voucher_code:
-                    outgroup_taxonomy = '{0}_{1}'.format(i.taxonomy['genus'],
-                                                         i.taxonomy['species'])
-                    break
+            seq_record = self.data.seq_records_index.get_first_seq_record(self.outgroup)
+            if seq_record is not None:
+                outgroup_taxonomy = '{0}_{1}'.format(seq_record.taxonomy['genus'],
+                                                     seq_record.taxonomy['species'])
             outgroup = '\noutgroup {0}_{1};'.format(self.outgroup,
                                                     outgroup_taxonomy)
         else:
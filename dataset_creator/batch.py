@@ -0,0 +1,341 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ordereddict import OrderedDict
+
+from .compression import add_extension
+from .compression import validate_compression
+from .dataset import Dataset
+from .enums import DatasetFormat
+from .snapshot import PREPARED_OPTIONS
+from .sweep import make_filename
+
+
+FORMATS = ['NEXUS', 'PHYLIP', 'FASTA', 'TNT', 'MEGA', 'GenBankFASTA', 'Bankit']
+
+# keys of a job in the manifest: parameters of ``Dataset`` and where to write it
+DATASET_OPTIONS = ['format', 'partitioning', 'codon_positions', 'aminoacids', 'degenerate',
+                   'outgroup', 'fill_missing']
+JOB_KEYS = ['input', 'output', 'compression'] + DATASET_OPTIONS
+
+Job = namedtuple('Job', ['input', 'options', 'output', 'compression'])
+
+JobResult = namedtuple('JobResult', ['job', 'checksums', 'prepare_seconds', 'seconds',
+                                     'timings', 'error'])
+
+
+def _resolve_path(directory, path):
+    if not isinstance(path, str):
+        raise ValueError("Paths should be strings, not {0!r}".format(path))
+    return os.path.join(directory, os.path.expanduser(path))
+
+
+def _read_input(directory, name, source):
+    """Checks an input of the manifest and joins its paths to the directory
+    of the manifest.
+    """
+    if not isinstance(source, dict):
+        raise ValueError("{0} should be an object".format(name))
+    if 'snapshot' in source:
+        if set(source) != {'snapshot'}:
+            raise ValueError("{0} should only have a 'snapshot'".format(name))
+        return {'snapshot': _resolve_path(directory, source['snapshot'])}
+
+    if set(source) - {'alignments', 'metadata'} or not isinstance(source.get('alignments'), dict):
+        raise ValueError("{0} should have 'alignments' and optionally 'metadata', "
+                         "or a 'snapshot'".format(name))
+    alignments = OrderedDict()
+    for gene_code, gene in source['alignments'].items():
+        if isinstance(gene, dict):
+            gene = dict(gene)
+            gene['path'] = _resolve_path(directory, gene.get('path'))
+        else:
+            gene = _resolve_path(directory, gene)
+        alignments[gene_code] = gene
+    metadata = source.get('metadata')
+    if isinstance(metadata, str):
+        metadata = _resolve_path(directory, metadata)
+    return {'alignments': alignments, 'metadata': metadata}
+
+
+def _make_output_filename(input_name, options):
+    """Names the output of a job after its input and options, as
+    ``sweep.make_filename`` does, adding ``fill-missing`` if it is set.
+    """
+    name, extension = os.path.splitext(make_filename(options))
+    if options.get('fill_missing'):
+        name += '_fill-missing'
+    return '{0}_{1}{2}'.format(input_name.replace(' ', '-'), name, extension)
+
+
+def _read_job(directory, inputs, output_directory, number, job):
+    if not isinstance(job, dict):
+        raise ValueError("Job {0} should be an object".format(number))
+    unknown = sorted(set(job) - set(JOB_KEYS))
+    if unknown:
+        raise ValueError("Job {0} has unknown keys: {1}".format(number, ', '.join(unknown)))
+    if job.get('format') not in FORMATS:
+        raise ValueError("Job {0} should have a format, one of these: {1}".format(
+            number, ', '.join(FORMATS)))
+    try:
+        validate_compression(job.get('compression'))
+    except ValueError as error:
+        raise ValueError("Job {0}: {1}".format(number, error))
+
+    source = job.get('input')
+    if isinstance(source, str):
+        if source not in inputs:
+            raise ValueError("Job {0} uses the unknown input {1!r}".format(number, source))
+        input_name = source
+        source = inputs[source]
+    else:
+        input_name = 'job{0}'.format(number)
+        source = _read_input(directory, 'The input of job {0}'.format(number), source)
+
+    options = dict((key, job[key]) for key in DATASET_OPTIONS if key in job)
+    if 'output' in job:
+        output = _resolve_path(directory, job['output'])
+    elif output_directory is not None:
+        output = os.path.join(output_directory, _make_output_filename(input_name, options))
+    else:
+        raise ValueError("Job {0} needs an output, or the manifest an "
+                         "output_directory".format(number))
+    return Job(source, options, output, job.get('compression'))
+
+
+def load_manifest(filename):
+    """Reads the jobs of a JSON manifest.
+
+    The manifest has the named ``inputs`` of the jobs, and a list of ``jobs``
+    with an ``input``, which can also be given in the job, the parameters of
+    ``Dataset`` (``format`` is required), the ``output`` file and its
+    ``compression``. Jobs without an ``output`` are written into the
+    ``output_directory`` of the manifest, named after their input (``job<N>``
+    for inputs given in the job) and options. Paths are relative to the
+    manifest.
+
+    An input has the ``alignments`` of ``Dataset.from_alignment_files`` and
+    their ``metadata``, or the ``snapshot`` written by
+    ``Dataset.save_prepared``.
+
+    Example::
+
+        {
+            "inputs": {
+                "nymphalids": {
+                    "alignments": {
+                        "COI": {"path": "COI.fasta", "reading_frame": 1, "table": 5},
+                        "EF1a": {"path": "EF1a.nex", "reading_frame": 2, "table": 1}
+                    },
+                    "metadata": "taxonomy.tsv"
+                }
+            },
+            "output_directory": "datasets",
+            "jobs": [
+                {"input": "nymphalids", "format": "NEXUS", "outgroup": "CP100-10"},
+                {"input": "nymphalids", "format": "PHYLIP",
+                 "partitioning": "1st-2nd, 3rd", "compression": "gzip"},
+                {"input": "nymphalids", "format": "TNT", "aminoacids": true,
+                 "output": "tnt/nymphalids_aa.tnt"}
+            ]
+        }
+
+    Returns:
+        list of ``Job`` namedtuples.
+
+    Raises:
+        ValueError:     if the manifest is not valid, or if two jobs would
+                        write the same file.
+    """
+    with open(filename, encoding='utf-8') as handle:
+        try:
+            manifest = json.load(handle)
+        except ValueError as error:
+            raise ValueError("{0} is not valid JSON: {1}".format(filename, error))
+    if not isinstance(manifest, dict) or not isinstance(manifest.get('jobs'), list):
+        raise ValueError("The manifest should be an object with a list of jobs")
+
+    directory = os.path.dirname(os.path.abspath(filename))
+    inputs = dict((name, _read_input(directory, 'Input {0!r}'.format(name), source))
+                  for name, source in manifest.get('inputs', {}).items())
+    output_directory = manifest.get('output_directory')
+    if output_directory is not None:
+        output_directory = _resolve_path(directory, output_directory)
+    jobs = [_read_job(directory, inputs, output_directory, number, job)
+            for number, job in enumerate(manifest['jobs'], 1)]
+
+    outputs = {}
+    for number, job in enumerate(jobs, 1):
+        output = os.path.normpath(add_extension(job.output, job.compression))
+        if output in outputs:
+            raise ValueError("Jobs {0} and {1} write the same file {2}".format(
+                outputs[output], number, output))
+        outputs[output] = number
+    return jobs
+
+
+def get_preparation_key(job):
+    """Jobs with the same key can be rendered from the same prepared
+    records: the same input, voucher codes converted or not, and the same
+    options the records are prepared with.
+    """
+    options = job.options
+    return (
+        json.dumps(job.input, sort_keys=True),
+        options['format'] == DatasetFormat.BANKIT.value,
+        options.get('codon_positions') or 'ALL',
+        bool(options.get('aminoacids')),
+        options.get('degenerate') or None,
+        bool(options.get('fill_missing')),
+    )
+
+
+def _format_error(error):
+    return '{0}: {1}'.format(type(error).__name__, error)
+
+
+def _make_dataset(job, snapshot=None, **kwargs):
+    kwargs.update(job.options)
+    if snapshot is None:
+        snapshot = job.input.get('snapshot')
+    if snapshot is not None:
+        return Dataset.load_prepared(snapshot, **kwargs)
+    return Dataset.from_alignment_files(job.input['alignments'],
+                                        metadata=job.input['metadata'], **kwargs)
+
+
+def prepare_input(job, filename):
+    """Prepares the records of a job for every job with the same preparation
+    key, and writes them into a snapshot.
+
+    Returns:
+        ``(seconds, error)``. ``error`` is None, or the message of the
+        exception raised.
+    """
+    start = time.perf_counter()
+    options = dict((key, value) for key, value in job.options.items()
+                   if key in PREPARED_OPTIONS or key == 'format')
+    try:
+        _make_dataset(Job(job.input, options, None, None), lazy=True).save_prepared(filename)
+    except Exception as error:
+        return time.perf_counter() - start, _format_error(error)
+    return time.perf_counter() - start, None
+
+
+def run_job(job, snapshot=None):
+    """Creates the dataset of a job, from the snapshot of its prepared
+    records if given, and writes it into its output file.
+
+    Returns:
+        ``JobResult`` without the preparation time.
+    """
+    start = time.perf_counter()
+    checksums = timings = error = None
+    try:
+        dataset = _make_dataset(job, snapshot, stream=True, lazy=True, profile=True)
+        directory = os.path.dirname(job.output)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)
+        checksums = dataset.save(job.output, compression=job.compression)
+        timings = dataset.timings
+    except Exception as error_raised:
+        error = _format_error(error_raised)
+    return JobResult(job, checksums, None, time.perf_counter() - start, timings, error)
+
+
+class InlineExecutor(object):
+    """Runs each task in this process when it is submitted, in place of a
+    process pool of one worker.
+    """
+    def submit(self, function, *args):
+        future = Future()
+        future.set_result(function(*args))
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+def run_jobs(jobs, workers=None):
+    """Runs the jobs in a pool of ``workers`` processes.
+
+    Jobs that can share their prepared records (see ``get_preparation_key``)
+    are grouped: the records of the group are prepared once, in a worker, and
+    kept in a temporary snapshot that the jobs of the group load. Jobs
+    rendered from a ``snapshot`` input load it directly. A job that fails
+    does not stop the others.
+
+    Parameters:
+        jobs (list):    ``Job`` namedtuples, as returned by ``load_manifest``.
+        workers (int):  Number of processes. ``None`` for the number of CPUs,
+                        1 to run the jobs in this process.
+
+    Returns:
+        list of ``JobResult`` namedtuples, in the order of ``jobs``.
+        ``prepare_seconds`` is the time spent preparing the records shared by
+        the job, or None, and ``timings`` those of ``Dataset.timings``.
+    """
+    groups = OrderedDict()
+    for index, job in enumerate(jobs):
+        groups.setdefault(get_preparation_key(job), []).append(index)
+
+    results = [None] * len(jobs)
+    path = tempfile.mkdtemp(prefix='dataset-creator-')
+    if workers == 1:
+        executor = InlineExecutor()
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        with executor:
+            preparations = []
+            rendering = []
+            for number, indexes in enumerate(groups.values()):
+                first_job = jobs[indexes[0]]
+                if len(indexes) == 1 or 'snapshot' in first_job.input:
+                    rendering.extend((index, None, executor.submit(run_job, jobs[index]))
+                                     for index in indexes)
+                    continue
+                snapshot = os.path.join(path, '{0}.snapshot'.format(number))
+                preparations.append((indexes, snapshot,
+                                     executor.submit(prepare_input, first_job, snapshot)))
+
+            for indexes, snapshot, future in preparations:
+                (seconds, error), worker_error = _get_result(future, (None, None))
+                error = error or worker_error
+                if error is not None:
+                    for index in indexes:
+                        results[index] = JobResult(jobs[index], None, seconds, 0.0, None, error)
+                    continue
+                rendering.extend((index, seconds, executor.submit(run_job, jobs[index], snapshot))
+                                 for index in indexes)
+
+            for index, prepare_seconds, future in rendering:
+                result, error = _get_result(future, None)
+                if result is None:
+                    result = JobResult(jobs[index], None, None, 0.0, None, error)
+                results[index] = result._replace(prepare_seconds=prepare_seconds)
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+    return results
+
+
+def _get_result(future, default):
+    """Returns the result of a task and None, or ``default`` and the error if
+    the worker running the task could not return it.
+    """
+    try:
+        return future.result(), None
+    except Exception as error:
+        return default, _format_error(error)
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import namedtuple
+
+
+# a cached block, and ``[index, warning]`` of the records of the block whose
+# sequences had a warning when it was rendered
+CacheEntry = namedtuple('CacheEntry', ['value', 'warnings'])
+
+
+class BlockCache(object):
+    """Persistent cache of rendered gene blocks, shared by the datasets of
+    several runs.
+
+    Blocks are stored in files named after a SHA-256 hash of the records of
+    the gene (sequence, voucher code, taxonomy, lineage, reading frame and
+    table) and of the render options (format, codon positions, partitioning,
+    aminoacids, degenerate and outgroup), so a block is found again whenever
+    the same records are rendered the same way.
+
+    The warnings of the sequences of a block are stored with it, so they are
+    collected again when the block is read from the cache.
+
+    Reading a block marks it as recently used. When the files take more than
+    ``max_bytes``, the least recently used ones are removed.
+
+    Parameters:
+        path (str):         Directory of the cache. It is created if needed.
+        max_bytes (int):    Size limit of the cache. ``None`` for no limit.
+
+    Example::
+
+        cache = BlockCache('~/.cache/dataset-creator', max_bytes=500 * 1024 ** 2)
+        dataset = Dataset(seq_records, format='NEXUS', block_cache=cache)
+    """
+    version = 2
+    suffix = '.block'
+
+    def __init__(self, path, max_bytes=None):
+        self.path = os.path.expanduser(path)
+        self.max_bytes = max_bytes
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+
+        self._entries = {}
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(self.suffix):
+                stat = entry.stat()
+                key = entry.name[:-len(self.suffix)]
+                self._entries[key] = [stat.st_size, stat.st_mtime]
+        self.size = sum(size for size, last_used in self._entries.values())
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def make_key(self, kind, block, options):
+        """Hashes the records of a gene block and the options used to render
+        it.
+
+        Parameters:
+            kind (str):         What is cached, a ``block`` or ``sequences``.
+            block (list):       SeqRecordExpanded objects of one gene, in the
+                                order they are rendered.
+            options (tuple):    Render options. They need to be JSON
+                                serializable.
+
+        Returns:
+            str: hexadecimal SHA-256 digest.
+        """
+        digest = hashlib.sha256()
+        digest.update(json.dumps([self.version, kind, options]).encode('utf-8'))
+        for seq_record in block:
+            taxonomy = seq_record.taxonomy
+            if isinstance(taxonomy, dict):
+                taxonomy = sorted(taxonomy.items())
+            fields = [
+                seq_record.voucher_code, seq_record.gene_code, taxonomy,
+                seq_record.lineage, seq_record.reading_frame, seq_record.table,
+                bool(getattr(seq_record, '_sequence_was_corrected', False)),
+                len(seq_record.seq),
+            ]
+            digest.update(json.dumps(fields, default=str).encode('utf-8'))
+            digest.update(str(seq_record.seq).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _get_filename(self, key):
+        return os.path.join(self.path, key + self.suffix)
+
+    def get(self, key):
+        """Returns the cached block as string, or None."""
+        entry = self.get_entry(key)
+        if entry is None:
+            return None
+        return entry.value
+
+    def get_entry(self, key):
+        """Returns the cached block and its warnings as a ``CacheEntry``, or
+        None.
+        """
+        if key not in self._entries:
+            return None
+        filename = self._get_filename(key)
+        try:
+            with open(filename, encoding='utf-8', newline='') as handle:
+                warnings = json.loads(handle.readline())
+                value = handle.read()
+        except (IOError, OSError, ValueError):  # removed by another process, or corrupt
+            self._forget(key)
+            return None
+
+        now = time.time()
+        self._entries[key][1] = now
+        try:
+            os.utime(filename, (now, now))
+        except OSError:
+            pass
+        return CacheEntry(value, warnings)
+
+    def put(self, key, value, warnings=()):
+        """Stores a block, then removes the least recently used blocks if the
+        cache is over its size limit.
+
+        Parameters:
+            key (str):
+            value (str):        The rendered block.
+            warnings (list):    ``[index, warning]`` of the records of the
+                                block with a warning.
+        """
+        handle, temporary = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        with os.fdopen(handle, 'w', encoding='utf-8', newline='') as fileobj:
+            fileobj.write(json.dumps(list(warnings)) + '\n')
+            fileobj.write(value)
+        os.replace(temporary, self._get_filename(key))
+
+        self._forget(key)
+        size = os.path.getsize(self._get_filename(key))
+        self._entries[key] = [size, time.time()]
+        self.size += size
+        self.evict()
+
+    def _forget(self, key):
+        if key in self._entries:
+            self.size -= self._entries.pop(key)[0]
+
+    def evict(self):
+        """Removes least recently used blocks until the cache fits in
+        ``max_bytes``.
+        """
+        if self.max_bytes is None or self.size <= self.max_bytes:
+            return
+        by_last_use = sorted(self._entries, key=lambda key: self._entries[key][1])
+        for key in by_last_use:
+            if self.size <= self.max_bytes:
+                break
+            try:
+                os.remove(self._get_filename(key))
+            except OSError:
+                pass
+            self._forget(key)
+
+    def clear(self):
+        """Removes every block."""
+        for key in list(self._entries):
+            try:
+                os.remove(self._get_filename(key))
+            except OSError:
+                pass
+            self._forget(key)
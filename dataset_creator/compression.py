@@ -0,0 +1,133 @@
+import hashlib
+import os
+
+
+# compression: file extension
+EXTENSIONS = {
+    'gzip': '.gz',
+    'bz2': '.bz2',
+    'xz': '.xz',
+}
+
+
+def validate_compression(compression):
+    if compression is not None and compression not in EXTENSIONS:
+        raise ValueError("Compression should be one of these: None, {0}".format(
+            ', '.join(repr(name) for name in sorted(EXTENSIONS))))
+
+
+def add_extension(filename, compression):
+    """Returns ``filename`` ending with the extension of ``compression``."""
+    validate_compression(compression)
+    if compression is None or filename.endswith(EXTENSIONS[compression]):
+        return filename
+    return filename + EXTENSIONS[compression]
+
+
+def make_compressor(compression):
+    """Returns an object whose ``compress(data)`` and ``flush()`` methods give
+    the bytes of a ``.gz``, ``.bz2`` or ``.xz`` file.
+    """
+    validate_compression(compression)
+    if compression == 'gzip':
+        import zlib
+        # 16 + window size: with a gzip header and trailer
+        return zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    elif compression == 'bz2':
+        import bz2
+        return bz2.BZ2Compressor()
+    else:  # xz
+        import lzma
+        return lzma.LZMACompressor(format=lzma.FORMAT_XZ)
+
+
+class ChecksumWriter(object):
+    """Writes text into a file object as it is produced, compressed if
+    ``compression`` is given, and computes the SHA-256 of the text.
+
+    The checksum is computed on the text encoded as UTF-8, before it is
+    compressed, so it does not depend on the compression. The compressed
+    stream is only ended by ``close()``, and not if writing fails inside a
+    ``with`` block, so a dataset that could not be rendered is not left as a
+    valid compressed file.
+
+    Parameters:
+        fileobj:                Binary file object if ``compression`` is
+                                given, any object with a ``write(str)``
+                                method otherwise.
+        compression (str):      ``gzip``, ``bz2``, ``xz`` or None.
+
+    Attributes:
+        sha256:                 ``hashlib`` object of the text written.
+        number_bytes (int):     Length of the text written, in bytes.
+
+    Example::
+
+        with open('dataset.nex.gz', 'wb') as handle:
+            with ChecksumWriter(handle, compression='gzip') as writer:
+                writer.write(dataset_str)
+        writer.hexdigest()
+    """
+    def __init__(self, fileobj, compression=None):
+        self.fileobj = fileobj
+        self.compression = compression
+        self.sha256 = hashlib.sha256()
+        self.number_bytes = 0
+        self._compressor = None
+        if compression is not None:
+            self._compressor = make_compressor(compression)
+
+    def write(self, text):
+        data = text.encode('utf-8')
+        self.sha256.update(data)
+        self.number_bytes += len(data)
+        if self._compressor is None:
+            self.fileobj.write(text)
+        else:
+            self.fileobj.write(self._compressor.compress(data))
+
+    def close(self):
+        """Writes the end of the compressed stream. ``fileobj`` is left
+        open.
+        """
+        if self._compressor is not None:
+            self.fileobj.write(self._compressor.flush())
+            self._compressor = None
+
+    def hexdigest(self):
+        return self.sha256.hexdigest()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+
+
+def write_file(filename, write, compression=None):
+    """Calls ``write(fileobj, compression=compression)`` with a file opened
+    under a temporary name in the directory of ``filename``, and renames it
+    to ``filename`` if ``write`` succeeds.
+
+    Files are binary if ``compression`` is given, and UTF-8 text without
+    newline translation otherwise, so checksums of the text are also
+    checksums of the uncompressed files.
+
+    Returns:
+        What ``write`` returns.
+    """
+    temporary = '{0}.{1}.tmp'.format(filename, os.getpid())
+    try:
+        if compression is None:
+            fileobj = open(temporary, 'w', encoding='utf-8', newline='')
+        else:
+            fileobj = open(temporary, 'wb')
+        with fileobj:
+            result = write(fileobj, compression=compression)
+        os.replace(temporary, filename)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    return result
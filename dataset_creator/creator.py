@@ -1,19 +1,26 @@
+import importlib
+
 from .enums import DatasetFormat
 from . import base_dataset
-from . import tnt
-from . import mega
-from . import bankit
-from . import genbank_fasta
+from . import phylip
 from .phylip import PhylipDatasetFooter
-from .utils import convert_nexus_to_format
+from .profiling import run_stage
 from .utils import make_dataset_header
 
 
+def load_block_class(module_name, class_name):
+    """Returns a class of a format module, imported the first time a dataset
+    of that format is created.
+    """
+    module = importlib.import_module('.' + module_name, __package__)
+    return getattr(module, class_name)
+
+
 class Creator(object):
     """
     Create dataset and extra files for formats FASTA, NEXUS, PHYLIP, TNT and MEGA.
-    We will create a NEXUS formatted dataset first and use BioPython tools to
-    convert to FASTA and PHYLIP formats.
+    FASTA and PHYLIP matrices are written directly from the sequence records,
+    with the same layout that Biopython uses for these formats.
 
     Parameters:
         data (named tuple):     containing:
@@ -22,6 +29,9 @@ class Creator(object):
                                   * number_taxa: string
                                   * seq_records: list of SeqRecordExpanded objects
                                   * gene_codes_and_lengths
+                                  * reading_frames
+                                  * seq_records_index: SeqRecordsIndex
+                                  * sequences: SequenceStore
         format (str):           NEXUS, PHYLIP, TNT, MEGA
         codon_positions (str):  Can be 1st, 2nd, 3rd, 1st-2nd, ALL (default).
         partitioning (str):    'by gene', 'by codon position', '1st-2nd, 3rd'
@@ -32,6 +42,19 @@ class Creator(object):
                                 ``SZ`` and ``normal``.
         outgroup (str):         voucher code to be used as outgroup for NEXUS
                                 and TNT files.
+        stream (boolean):       Do not build ``dataset_str``. The dataset can be
+                                consumed chunk by chunk from ``iter_chunks()``.
+        profiler (Profiler):    Records the time of each step, the render time
+                                of each gene and the bytes emitted.
+        rendered_blocks (dict): ``gene_code: str`` of the gene blocks already
+                                rendered in this format, used instead of
+                                rendering them again. Gene blocks rendered by
+                                the creator are added to it. Formats with one
+                                row per taxon for all genes (PHYLIP, FASTA and
+                                MEGA) do not use it.
+        block_cache (BlockCache): Persistent cache of rendered gene blocks, and
+                                of the sequences of each gene for PHYLIP, FASTA
+                                and MEGA.
 
     Attributes:
         extra_dataset_str (str):    Charset block in Phylip formatted datasets.
@@ -47,8 +70,12 @@ class Creator(object):
         '
     """
     def __init__(self, data, format=None, codon_positions=None, partitioning=None,
-                 aminoacids=None, degenerate=None, outgroup=None):
+                 aminoacids=None, degenerate=None, outgroup=None, stream=False,
+                 profiler=None, rendered_blocks=None, block_cache=None):
         self.warnings = []
+        self.profiler = profiler
+        self.rendered_blocks = rendered_blocks
+        self.block_cache = block_cache
         self.data = data
         self.format = format
         self.codon_positions = codon_positions
@@ -56,18 +83,48 @@ class Creator(object):
         self.aminoacids = aminoacids
         self.degenerate = degenerate
         self.outgroup = outgroup
-        self.dataset_header = self.create_dataset_header()
-        self.dataset_block = self.create_dataset_block()
-        self.dataset_footer = self.create_dataset_footer()
-        self.dataset_str = self.put_everything_together()
-        self.extra_dataset_str = self.create_extra_dataset_file()
+        self.dataset_header = run_stage(profiler, 'create_dataset_header',
+                                        self.create_dataset_header)
+        self.dataset_block = None
+        self.dataset_footer = None
+        self.dataset_str = None
+        if not stream:
+            self.dataset_block = run_stage(profiler, 'create_dataset_block',
+                                           self.create_dataset_block)
+            self.dataset_footer = run_stage(profiler, 'create_dataset_footer',
+                                            self.create_dataset_footer)
+            self.dataset_str = run_stage(profiler, 'put_everything_together',
+                                         self.put_everything_together)
+            if profiler is not None:
+                profiler.add_bytes(self.format, self.dataset_str)
+        self.extra_dataset_str = run_stage(profiler, 'create_extra_dataset_file',
+                                           self.create_extra_dataset_file)
 
     def create_dataset_header(self):
         return make_dataset_header(self.data, file_format=self.format,
                                    aminoacids=self.aminoacids)
 
     def create_dataset_block(self):
-        if self.format in ['NEXUS', 'PHYLIP', 'FASTA']:
+        dataset_constructor = self.make_dataset_block_constructor()
+        dataset_block = dataset_constructor.dataset_block()
+        self.warnings = dataset_constructor.warnings
+        return dataset_block
+
+    def make_dataset_block_constructor(self):
+        if self.format == 'PHYLIP':
+            dataset_constructor = phylip.PhylipDatasetBlock(self.data,
+                                                            self.codon_positions,
+                                                            self.partitioning,
+                                                            aminoacids=self.aminoacids,
+                                                            degenerate=self.degenerate)
+        elif self.format == 'FASTA' and self.partitioning != '1st-2nd, 3rd':
+            block_class = load_block_class('fasta', 'FastaDatasetBlock')
+            dataset_constructor = block_class(self.data,
+                                              self.codon_positions,
+                                              self.partitioning,
+                                              aminoacids=self.aminoacids,
+                                              degenerate=self.degenerate)
+        elif self.format in ['NEXUS', 'FASTA']:
             dataset_constructor = base_dataset.DatasetBlock(self.data,
                                                             self.codon_positions,
                                                             self.partitioning,
@@ -75,13 +132,15 @@ class Creator(object):
                                                             self.degenerate,
                                                             self.format)
         elif self.format == 'GenBankFASTA':
-            dataset_constructor = genbank_fasta.GenBankFASTADatasetBlock(self.data,
-                                                                         self.codon_positions,
-                                                                         self.partitioning,
-                                                                         aminoacids=self.aminoacids,
-                                                                         degenerate=self.degenerate)
+            block_class = load_block_class('genbank_fasta', 'GenBankFASTADatasetBlock')
+            dataset_constructor = block_class(self.data,
+                                              self.codon_positions,
+                                              self.partitioning,
+                                              aminoacids=self.aminoacids,
+                                              degenerate=self.degenerate)
         elif self.format == 'Bankit':
-            dataset_constructor = bankit.BankitDatasetBlock(
+            block_class = load_block_class('bankit', 'BankitDatasetBlock')
+            dataset_constructor = block_class(
                 self.data,
                 self.codon_positions,
                 self.partitioning,
@@ -89,20 +148,23 @@ class Creator(object):
                 degenerate=self.degenerate,
             )
         elif self.format == 'MEGA':
-            dataset_constructor = mega.MegaDatasetBlock(self.data,
-                                                        self.codon_positions,
-                                                        self.partitioning,
-                                                        aminoacids=self.aminoacids,
-                                                        degenerate=self.degenerate)
+            block_class = load_block_class('mega', 'MegaDatasetBlock')
+            dataset_constructor = block_class(self.data,
+                                              self.codon_positions,
+                                              self.partitioning,
+                                              aminoacids=self.aminoacids,
+                                              degenerate=self.degenerate)
         else:  # TNT
-            dataset_constructor = tnt.TntDatasetBlock(self.data, self.codon_positions,
-                                                      self.partitioning,
-                                                      degenerate=self.degenerate,
-                                                      aminoacids=self.aminoacids,
-                                                      outgroup=self.outgroup)
-        dataset_block = dataset_constructor.dataset_block()
-        self.warnings = dataset_constructor.warnings
-        return dataset_block
+            block_class = load_block_class('tnt', 'TntDatasetBlock')
+            dataset_constructor = block_class(self.data, self.codon_positions,
+                                              self.partitioning,
+                                              degenerate=self.degenerate,
+                                              aminoacids=self.aminoacids,
+                                              outgroup=self.outgroup)
+        dataset_constructor.profiler = self.profiler
+        dataset_constructor.rendered_blocks = self.rendered_blocks
+        dataset_constructor.block_cache = self.block_cache
+        return dataset_constructor
 
     def create_dataset_footer(self):
         return base_dataset.DatasetFooter(self.data, codon_positions=self.codon_positions,
@@ -116,17 +178,15 @@ class Creator(object):
         return phylip_footer.make_charset_block()
 
     def put_everything_together(self):
-        header_and_datablock = '{0}\n\n{1}'.format(self.dataset_header,
-                                                   self.dataset_block)
         if self.format == 'NEXUS':
-            return '{0}\n\n{1}'.format(header_and_datablock, self.dataset_footer)
+            return '{0}\n\n{1}\n\n{2}'.format(self.dataset_header, self.dataset_block,
+                                              self.dataset_footer)
 
         elif self.format == 'PHYLIP':
-            self.extra_dataset_str = self.create_extra_dataset_file()
-            return convert_nexus_to_format(header_and_datablock, 'phylip-relaxed')
+            return self.dataset_block
 
         elif self.format == 'FASTA' and self.partitioning != '1st-2nd, 3rd':
-            return convert_nexus_to_format(header_and_datablock, 'fasta')
+            return self.dataset_block
 
         elif self.format == 'FASTA' and self.partitioning == '1st-2nd, 3rd':
             return self.dataset_block.replace(';\nEND;', '')
@@ -139,3 +199,45 @@ class Creator(object):
 
         else:  # MEGA
             return '{0}\n\n{1}'.format(self.dataset_header, self.dataset_block)
+
+    def iter_chunks(self):
+        """Yields the dataset as consecutive strings: header, each gene block
+        and footer, as they are produced.
+
+        Joining the chunks gives the same string as ``dataset_str``.
+        PHYLIP and FASTA rows hold the concatenated sequences of a taxon for all
+        genes, so these matrices are yielded once every gene has been read.
+        """
+        if self.profiler is None:
+            return self._iter_chunks()
+        return self._iter_counted_chunks()
+
+    def _iter_counted_chunks(self):
+        for chunk in self._iter_chunks():
+            self.profiler.add_bytes(self.format, chunk)
+            yield chunk
+
+    def _iter_chunks(self):
+        dataset_constructor = self.make_dataset_block_constructor()
+        self.warnings = dataset_constructor.warnings
+        block_chunks = dataset_constructor.iter_dataset_block()
+
+        if self.format == 'PHYLIP' or (self.format == 'FASTA' and
+                                       self.partitioning != '1st-2nd, 3rd'):
+            for chunk in block_chunks:
+                yield chunk
+            return
+
+        if self.format in ['FASTA', 'GenBankFASTA', DatasetFormat.BANKIT.value]:
+            for chunk in block_chunks:
+                yield chunk.replace(';\nEND;', '')
+            return
+
+        yield self.dataset_header
+        yield '\n\n'
+        for chunk in block_chunks:
+            yield chunk
+
+        if self.format == 'NEXUS':
+            yield '\n\n'
+            yield self.create_dataset_footer()
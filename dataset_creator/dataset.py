@@ -8,8 +8,41 @@ try:
 except ImportError:
     from ordereddict import OrderedDict
 
+from .base_dataset import DatasetFooter
 from .creator import Creator
-from .utils import get_seq
+from .index import SeqRecordsIndex
+from .phylip import PhylipDatasetFooter
+from .profiling import Profiler
+from .profiling import run_stage
+from .records import RecordStore
+from .records import get_taxa
+from .sequences import SequenceStore
+from .utils import get_seq_length
+
+
+class LazyAttribute(object):
+    """Attribute of a ``Dataset`` computed the first time it is read, by calling
+    the method ``loader``, which has to set it. It can also be set directly.
+    """
+    def __init__(self, loader):
+        self.loader = loader
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = '_' + name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        if self.name not in instance.__dict__:
+            getattr(instance, self.loader)()
+        return instance.__dict__[self.name]
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.name] = value
+
+    def is_loaded(self, instance):
+        return self.name in instance.__dict__
 
 
 class Dataset(object):
@@ -30,6 +63,38 @@ class Dataset(object):
                                 ``SZ`` and ``normal``.
         outgroup (str):         voucher code to be used as outgroup for NEXUS
                                 and TNT files.
+        stream (boolean):       Do not build ``dataset_str`` in memory. Use
+                                ``iter_chunks()`` or ``write_to(fileobj)`` to get
+                                the dataset piece by piece.
+        workers (int):          Number of processes used to transform the
+                                sequences of the gene blocks. The output is the
+                                same as with the default serial mode.
+        lazy (boolean):         Only validate the parameters when the dataset
+                                is created. The sorted ``seq_records``, the
+                                ``data`` fields, ``dataset_str``,
+                                ``extra_dataset_str`` and ``warnings`` are
+                                computed the first time they are read.
+        profile (boolean):      Measure the time of each step of creating the
+                                dataset, the render time of each gene, the
+                                sequences transformed and the bytes emitted.
+                                They are kept in ``profiler``, a ``Profiler``
+                                object. Without profiling, ``profiler`` is
+                                ``None`` and nothing is measured.
+        profile_hook (callable): Called as ``hook(event, name, value)`` for
+                                everything recorded by the profiler. Giving a
+                                hook turns profiling on.
+        block_cache (BlockCache): Persistent cache of rendered gene blocks,
+                                reused by any dataset rendering the same
+                                records with the same options. Warnings are only
+                                collected for the blocks that are not in the
+                                cache.
+        fill_missing (boolean): Give every voucher a row in every gene of
+                                NEXUS, PHYLIP, FASTA, TNT and MEGA matrices.
+                                Vouchers without a record for a gene get a
+                                sequence of ``?`` as long as the gene, as if
+                                they had a record of missing data. These
+                                records are not created before rendering, one
+                                gene block at a time.
 
     Attributes:
          _gene_codes_and_lengths (dict):   in the form ``gene_code: list``
@@ -53,64 +118,159 @@ class Dataset(object):
         '100 10
         blah blah
         '
+        >>> dataset = Dataset(seq_records, format='NEXUS', stream=True)
+        >>> with open('dataset.nex', 'w') as handle:
+        ...     dataset.write_to(handle)
     """
+    seq_records = LazyAttribute('_sort_input_seq_records')
+    gene_codes = LazyAttribute('_prepare_data')
+    number_taxa = LazyAttribute('_prepare_data')
+    taxa = LazyAttribute('_prepare_data')
+    number_chars = LazyAttribute('_prepare_data')
+    reading_frames = LazyAttribute('_prepare_data')
+    data = LazyAttribute('_prepare_data')
+    dataset_str = LazyAttribute('_create_dataset')
+    warnings = LazyAttribute('_create_dataset')
+    extra_dataset_str = LazyAttribute('_create_extra_dataset_str')
+
+    # input records until they are sorted into ``seq_records``
+    _input_seq_records = None
+
     def __init__(self, seq_records, format=None, partitioning=None,
                  codon_positions=None, aminoacids=None, degenerate=None,
-                 outgroup=None):
-        self.warnings = []
+                 outgroup=None, stream=False, workers=None, lazy=False,
+                 profile=False, profile_hook=None, block_cache=None,
+                 fill_missing=False):
         self.format = format
-        self.seq_records = self.sort_seq_records(seq_records)
-        self.gene_codes = None
-        self.number_taxa = None
-        self.number_chars = None
-        self.reading_frames = {}
+        self.block_cache = block_cache
+        self.profiler = None
+        if profile or profile_hook is not None:
+            self.profiler = Profiler(hook=profile_hook)
+        self._input_seq_records = seq_records
+        self._seq_records_index = None
+        self.record_store = None
+        if not lazy:
+            self._sort_input_seq_records()
 
         self.partitioning = partitioning
         self.codon_positions = codon_positions
         self.aminoacids = aminoacids
         self.degenerate = degenerate
         self.outgroup = None
+        self.stream = stream
+        self.workers = workers
+        self.lazy = lazy
+        self.fill_missing = fill_missing
 
         self._validate_codon_positions(codon_positions)
         self._validate_partitioning(partitioning)
         self._validate_outgroup(outgroup)
 
-        self.data = None
+        self._sequences = None
         self._gene_codes_and_lengths = OrderedDict()
-        self._prepare_data()
-        self.extra_dataset_str = None
-        self.dataset_str = self._create_dataset()
+        if not lazy:
+            self._prepare_data()
+            self._create_dataset()
+
+    @property
+    def timings(self):
+        """``stage: seconds`` of the profiled dataset, or ``None`` if it is not
+        profiled. See ``profiling.Profiler``.
+        """
+        if self.profiler is None:
+            return None
+        return self.profiler.timings
+
+    def _sort_input_seq_records(self):
+        self.seq_records = run_stage(self.profiler, 'sort_seq_records',
+                                     self.sort_seq_records, self._input_seq_records)
+        self._input_seq_records = None
+
+    @classmethod
+    def from_alignment_files(cls, alignment_files, metadata=None, **kwargs):
+        """Creates a dataset from per gene aligned FASTA or NEXUS files.
+
+        The files are memory-mapped and only the position of each sequence is
+        indexed, so sequences are read from disk when the dataset needs them.
+
+        Parameters:
+            alignment_files (dict):  ``gene_code: path`` or ``gene_code: dict``
+                                     with the keys ``path``, ``reading_frame``
+                                     and ``table``.
+            metadata (dict or str):  ``voucher_code: taxonomy`` or the path to a
+                                     tab separated file with a ``voucher_code``
+                                     column and one column per taxonomic rank.
+            kwargs:                  Parameters of ``Dataset``.
+
+        Example::
+
+            dataset = Dataset.from_alignment_files(
+                {'COI': {'path': 'COI.fasta', 'reading_frame': 1, 'table': 5},
+                 'EF1a': {'path': 'EF1a.nex', 'reading_frame': 2, 'table': 1}},
+                metadata='taxonomy.tsv', format='PHYLIP', stream=True,
+            )
+        """
+        from .alignments import load_alignment_files
 
-    def sort_seq_records(self, seq_records):
-        """Checks that SeqExpandedRecords are sorted by gene_code and then by voucher code.
+        seq_records = load_alignment_files(alignment_files, metadata=metadata)
+        return cls(seq_records, **kwargs)
 
-        The dashes in taxon names need to be converted to underscores so the
-        dataset will be accepted by Biopython to do format conversions.
+    @classmethod
+    async def acreate(cls, seq_records, executor=None, **kwargs):
+        """Creates a dataset in ``executor``, so the event loop is not blocked.
+
+        If the coroutine is cancelled, the dataset is still created in the
+        executor, but it is discarded.
+
+        Parameters:
+            seq_records (list):     SeqRecordExpanded objects.
+            executor:               ``concurrent.futures`` executor. ``None``
+                                    for the default thread pool of the loop.
+            kwargs:                 Parameters of ``Dataset``.
 
+        Example::
+
+            dataset = await Dataset.acreate(seq_records, format='NEXUS', stream=True)
+            async for chunk in dataset.aiter_chunks():
+                await response.write(chunk.encode('utf-8'))
         """
-        if self.format != DatasetFormat.BANKIT.value:
-            for seq_record in seq_records:
-                seq_record.voucher_code = seq_record.voucher_code.replace("-", "_")
+        from . import aio
+
+        return await aio.run_in_executor(cls, seq_records, executor=executor, **kwargs)
+
+    def sort_seq_records(self, seq_records):
+        """Sorts SeqExpandedRecords by gene_code and then by voucher code into a
+        ``RecordStore``, and indexes them by ``(gene_code, voucher_code)``.
 
-        unsorted_gene_codes = set([i.gene_code for i in seq_records])
-        sorted_gene_codes = list(unsorted_gene_codes)
-        sorted_gene_codes.sort(key=lambda x: x.lower())
+        Codes are compared case insensitively. Repeated records keep their
+        input order.
 
-        unsorted_voucher_codes = set([i.voucher_code for i in seq_records])
-        sorted_voucher_codes = list(unsorted_voucher_codes)
-        sorted_voucher_codes.sort(key=lambda x: x.lower())
+        The dashes in taxon names need to be converted to underscores so the
+        dataset will be accepted by phylogenetic software. They are converted
+        in the store, the input records are not modified.
+
+        Parameters:
+            seq_records (list or RecordStore):  A RecordStore is used as it is.
+
+        Returns:
+            list of ``StoredSeqRecord`` objects.
+        """
+        convert_voucher_codes = self.format != DatasetFormat.BANKIT.value
+        if isinstance(seq_records, RecordStore):
+            if seq_records.convert_voucher_codes != convert_voucher_codes:
+                raise ValueError("Cannot create a {0!r} dataset from records stored for "
+                                 "another format".format(self.format))
+            self.record_store = seq_records
+        else:
+            self.record_store = RecordStore(seq_records,
+                                            convert_voucher_codes=convert_voucher_codes)
+        self._seq_records_index = SeqRecordsIndex(self.record_store.seq_records)
+        return self.record_store.seq_records
 
-        sorted_seq_records = []
-        for gene_code in sorted_gene_codes:
-            for voucher_code in sorted_voucher_codes:
-                for seq_record in seq_records:
-                    should_be_done = (
-                        seq_record.gene_code == gene_code and
-                        seq_record.voucher_code == voucher_code
-                    )
-                    if should_be_done:
-                        sorted_seq_records.append(seq_record)
-        return sorted_seq_records
+    def _convert_voucher_code(self, voucher_code):
+        if self.format == DatasetFormat.BANKIT.value:
+            return voucher_code
+        return voucher_code.replace("-", "_")
 
     def _validate_partitioning(self, partitioning):
         if partitioning is None:
@@ -132,16 +292,15 @@ class Dataset(object):
             raise AttributeError("Codon positions parameter should be one of these: "
                                  "None, '1st', '2nd', '3rd', '1st-2nd', 'ALL'")
 
-    def _validate_outgroup(self, outgroup):
-        """All voucher codes in our datasets have dashes converted to underscores."""
+    def _validate_outgroup(self, outgroup, seq_records_index=None):
+        """All voucher codes in our datasets have dashes converted to underscores.
+
+        ``seq_records_index`` is the index of other records to look for the
+        outgroup in, see ``_has_voucher_code``.
+        """
         if outgroup:
             outgroup = outgroup.replace("-", "_")
-            good_outgroup = False
-            for seq_record in self.seq_records:
-                if seq_record.voucher_code == outgroup:
-                    good_outgroup = True
-                    break
-            if good_outgroup:
+            if self._has_voucher_code(outgroup, seq_records_index):
                 self.outgroup = outgroup
             else:
                 raise ValueError("The given outgroup {0!r} cannot be found in the "
@@ -149,23 +308,142 @@ class Dataset(object):
         else:
             self.outgroup = None
 
+    def _has_voucher_code(self, voucher_code, seq_records_index=None):
+        """Looks for the voucher code in ``seq_records_index`` if given, else in
+        the index of the dataset, or in the input records if they have not been
+        sorted yet.
+        """
+        if seq_records_index is not None:
+            return seq_records_index.has_voucher_code(voucher_code)
+        if self._input_seq_records is None:
+            return self._seq_records_index.has_voucher_code(voucher_code)
+
+        for seq_record in self._input_seq_records:
+            if self._convert_voucher_code(seq_record.voucher_code) == voucher_code:
+                return True
+        return False
+
     def _prepare_data(self):
         """
         Creates named tuple with info needed to create a dataset.
 
         :return: named tuple
         """
+        run_stage(self.profiler, 'prepare_data', self._prepare_data_fields)
+
+    def _prepare_data_fields(self):
+        self.reading_frames = {}
+        self._gene_codes_and_lengths = OrderedDict()
+        self._sequences = SequenceStore(self.codon_positions,
+                                        aminoacids=self.aminoacids,
+                                        degenerate=self.degenerate,
+                                        seq_records=self.seq_records,
+                                        profiler=self.profiler)
         self._extract_genes()
         self._extract_total_number_of_chars()
         self._extract_number_of_taxa()
         self._extract_reading_frames()
+        self._make_data()
 
+    def _make_data(self):
         Data = namedtuple('Data', ['gene_codes', 'number_taxa', 'number_chars',
                                    'seq_records', 'gene_codes_and_lengths',
-                                   'reading_frames'])
+                                   'reading_frames', 'seq_records_index', 'sequences',
+                                   'taxon_labels', 'taxa'])
         self.data = Data(self.gene_codes, self.number_taxa, self.number_chars,
                          self.seq_records, self._gene_codes_and_lengths,
-                         self.reading_frames)
+                         self.reading_frames, self._seq_records_index,
+                         self._sequences, self.record_store.taxon_labels, self.taxa)
+
+    def save_prepared(self, filename):
+        """Writes the prepared records into a snapshot file, so datasets of
+        the same records can be created with ``Dataset.load_prepared`` without
+        sorting, measuring and transforming them again.
+
+        The snapshot keeps the sorted records, their sequences transformed
+        according to codon_positions, aminoacids and degenerate with their
+        warnings, the gene lengths, reading frames and number of taxa.
+        Sequences that were not transformed yet are transformed first, in a
+        process pool if ``workers`` was given.
+
+        Parameters:
+            filename (str):     It is replaced when the snapshot is complete.
+        """
+        from .snapshot import save_snapshot
+
+        run_stage(self.profiler, 'save_prepared', save_snapshot, self, filename)
+
+    @classmethod
+    def load_prepared(cls, filename, **kwargs):
+        """Creates a dataset from a snapshot written by ``save_prepared``.
+
+        The file is memory-mapped and sequences are read from it when they are
+        rendered, so rendering any format skips the preparation of the
+        records.
+
+        Parameters:
+            filename (str):
+            kwargs:             Parameters of ``Dataset``. ``format``,
+                                ``partitioning`` and ``outgroup`` are those of
+                                the saved dataset unless given. The records
+                                were prepared for its ``codon_positions``,
+                                ``aminoacids``, ``degenerate`` and
+                                ``fill_missing``, so other values raise
+                                ValueError, as does Bankit for records
+                                prepared for other formats or the other way
+                                round.
+
+        Example::
+
+            Dataset(seq_records, format='NEXUS', aminoacids=True,
+                    lazy=True).save_prepared('records.snapshot')
+
+            # in each worker process
+            dataset = Dataset.load_prepared('records.snapshot', format='TNT',
+                                            stream=True)
+        """
+        from .snapshot import load_snapshot
+
+        snapshot = load_snapshot(filename)
+        options = dict(snapshot.options)
+        options.update(kwargs)
+        lazy = options.pop('lazy', False)
+        dataset = cls(snapshot.record_store, lazy=True, **options)
+        snapshot.check_options(dataset)
+        dataset.lazy = lazy
+        dataset._sort_input_seq_records()
+        dataset._restore_prepared(snapshot)
+        if not lazy:
+            dataset._create_dataset()
+        return dataset
+
+    def _restore_prepared(self, snapshot):
+        self.gene_codes = snapshot.gene_codes
+        self.number_taxa = snapshot.number_taxa
+        self.number_chars = snapshot.number_chars
+        self.taxa = snapshot.taxa
+        self.reading_frames = snapshot.reading_frames
+        self._gene_codes_and_lengths = snapshot.gene_codes_and_lengths
+        self._sequences = SequenceStore(self.codon_positions,
+                                        aminoacids=self.aminoacids,
+                                        degenerate=self.degenerate,
+                                        seq_records=self.seq_records,
+                                        profiler=self.profiler)
+        snapshot.restore_sequences(self._sequences)
+        self._make_data()
+
+    def _share_sequences(self, stores):
+        """Replaces the SequenceStore of the dataset by the one in ``stores``
+        with the same transformation, adding it to ``stores`` if missing.
+
+        Parameters:
+            stores (dict):  ``SequenceStore.key: SequenceStore``
+        """
+        key = self.data.sequences.key
+        if key not in stores:
+            stores[key] = self._sequences
+        self._sequences = stores[key]
+        self.data = self.data._replace(sequences=self._sequences)
 
     def _extract_genes(self):
         gene_codes = [i.gene_code for i in self.seq_records]
@@ -183,29 +461,34 @@ class Dataset(object):
 
         sum = 0
         for seq_length in self._gene_codes_and_lengths.values():
-            sum += sorted(seq_length, reverse=True)[0]
+            sum += max(seq_length)
         self.number_chars = str(sum)
 
     def _get_gene_codes_and_seq_lengths(self):
+        """Lengths are computed from the raw sequences and reading frames, so
+        no sequence needs to be transformed to know the dataset dimensions.
+        """
         for seq_record in self.seq_records:
             if seq_record.gene_code not in self._gene_codes_and_lengths:
                 self._gene_codes_and_lengths[seq_record.gene_code] = []
 
-            if self.aminoacids:
-                seq = seq_record.translate()
-            elif not self.aminoacids and self.degenerate is not None:
-                seq = seq_record.degenerate(method=self.degenerate)
-            else:
-                sequence = get_seq(seq_record, self.codon_positions)
-                seq = sequence.seq
-                if sequence.warning:
-                    self.warnings.append(sequence.warning)
-            self._gene_codes_and_lengths[seq_record.gene_code].append(len(seq))
+            seq_length = get_seq_length(seq_record, self.codon_positions,
+                                        aminoacids=self.aminoacids,
+                                        degenerate=self.degenerate)
+            self._gene_codes_and_lengths[seq_record.gene_code].append(seq_length)
 
     def _extract_number_of_taxa(self):
         """
-        sets `self.number_taxa` to the number of taxa as string
+        sets `self.number_taxa` to the number of taxa as string, and
+        `self.taxa` to the voucher codes of all genes if missing records are
+        filled.
         """
+        self.taxa = None
+        if self.fill_missing:
+            self.taxa = get_taxa(self.seq_records)
+            self.number_taxa = str(len(self.taxa))
+            return
+
         n_taxa = dict()
         for i in self.seq_records:
             if i.gene_code not in n_taxa:
@@ -220,15 +503,199 @@ class Dataset(object):
                 self.reading_frames[seq_record.gene_code] = seq_record.reading_frame
 
     def _create_dataset(self):
-        creator = Creator(self.data, format=self.format,
-                          codon_positions=self.codon_positions,
-                          partitioning=self.partitioning,
-                          aminoacids=self.aminoacids,
-                          degenerate=self.degenerate,
-                          outgroup=self.outgroup,
-                          )
+        creator = self._make_creator(stream=self.stream)
         self.warnings = creator.warnings
         self.extra_dataset_str = creator.extra_dataset_str
-        dataset_str = creator.dataset_str
+        self.dataset_str = creator.dataset_str
+
+    def _create_extra_dataset_str(self):
+        """The charsets of PHYLIP datasets, which do not need the matrix."""
+        footer = PhylipDatasetFooter(self.data, codon_positions=self.codon_positions,
+                                     partitioning=self.partitioning)
+        self.extra_dataset_str = run_stage(self.profiler, 'create_extra_dataset_file',
+                                           footer.make_charset_block)
+
+    def _make_creator(self, stream, format=None):
+        if not stream:
+            self._prefetch_sequences(format or self.format)
+        return Creator(self.data, format=format or self.format,
+                       codon_positions=self.codon_positions,
+                       partitioning=self.partitioning,
+                       aminoacids=self.aminoacids,
+                       degenerate=self.degenerate,
+                       outgroup=self.outgroup,
+                       stream=stream,
+                       profiler=self.profiler,
+                       rendered_blocks=self._get_rendered_blocks(format or self.format),
+                       block_cache=self.block_cache,
+                       )
+
+    def _get_rendered_blocks(self, format):
+        """Gene blocks already rendered in ``format``, for datasets that keep
+        them to render the dataset again. See ``Creator``.
+        """
+        return None
+
+    def _prefetch_sequences(self, format):
+        """Transforms the sequences in a process pool if ``workers`` was given.
+        FASTA datasets partitioned as ``1st-2nd, 3rd`` do not use the
+        transformed sequences.
+        """
+        if not self.workers or self.workers < 2:
+            return
+        if format == 'FASTA' and self.partitioning == '1st-2nd, 3rd':
+            return
+        run_stage(self.profiler, 'prefetch_sequences', self.data.sequences.prefetch,
+                  self.seq_records, self.workers)
+
+    def as_format(self, format, stream=False):
+        """Renders the prepared records in another format.
+
+        The sorted records, gene lengths, header data and transformed sequences
+        of this dataset are reused, so exporting the same records to several
+        formats only renders each matrix.
+
+        Parameters:
+            format (str):       NEXUS, PHYLIP, FASTA, TNT, MEGA, GenBankFASTA.
+            stream (boolean):   Do not build ``dataset_str``, use
+                                ``iter_chunks()`` instead.
+
+        Returns:
+            Creator object with ``dataset_str``, ``extra_dataset_str`` and
+            ``warnings``.
+
+        Example::
+
+            dataset = Dataset(seq_records, format='NEXUS', stream=True)
+            phylip = dataset.as_format('PHYLIP')
+            phylip.dataset_str, phylip.extra_dataset_str
+        """
+        self._validate_format(format)
+        return self._make_creator(stream, format=format)
+
+    def _validate_format(self, format):
+        """Records are prepared for a format: only Bankit keeps dashes in the
+        voucher codes.
+        """
+        is_bankit = format == DatasetFormat.BANKIT.value
+        if is_bankit != (self.format == DatasetFormat.BANKIT.value):
+            raise ValueError("Cannot render a {0!r} dataset from records prepared "
+                             "for {1!r}".format(format, self.format))
+        if format == 'MEGA' and self.partitioning in ['by codon position', '1st-2nd, 3rd']:
+            raise ValueError("Cannot produce MEGA dataset with codon positions in different partitions")
+
+    def make_charset_block(self):
+        """Returns the charsets of the dataset: the content of the extra charset
+        file for PHYLIP datasets, and the ``begin mrbayes;`` charsets for any other
+        format.
+
+        The charsets only need the gene lengths, so they can be obtained from a
+        ``Dataset(..., stream=True)`` without rendering the matrix.
+        """
+        if self.format == 'PHYLIP':
+            footer_class = PhylipDatasetFooter
+        else:
+            footer_class = DatasetFooter
+        footer = footer_class(self.data, codon_positions=self.codon_positions,
+                              partitioning=self.partitioning, outgroup=self.outgroup)
+        return footer.charset_block
+
+    def iter_chunks(self):
+        """Yields the dataset as consecutive strings: header, each gene block
+        and footer.
+
+        Joining the chunks gives the same string as ``dataset_str``. Warnings
+        are collected in ``self.warnings`` as the chunks are produced.
+        """
+        if Dataset.dataset_str.is_loaded(self) and self.dataset_str is not None:
+            yield self.dataset_str
+            return
+
+        self._prefetch_sequences(self.format)
+        creator = self._make_creator(stream=True)
+        self.warnings = creator.warnings
+        for chunk in creator.iter_chunks():
+            self.warnings = creator.warnings
+            yield chunk
+
+    def aiter_chunks(self, executor=None):
+        """Async counterpart of ``iter_chunks()``: each chunk is rendered in
+        ``executor`` and yielded as soon as it is ready.
+
+        Cancelling or closing the iteration stops rendering after the chunk
+        being rendered.
+
+        Parameters:
+            executor:   Thread pool executor. ``None`` for the default executor
+                        of the loop.
+        """
+        from . import aio
 
-        return dataset_str
+        return aio.iterate_in_executor(self.iter_chunks(), executor=executor)
+
+    def write_to(self, fileobj, compression=None):
+        """Writes the dataset into a file-like object, one chunk at a time.
+
+        Parameters:
+            fileobj:            any object with a ``write(str)`` method, or a
+                                binary file object if ``compression`` is given.
+            compression (str):  ``gzip``, ``bz2`` or ``xz`` to compress the
+                                chunks as they are written.
+
+        Returns:
+            str: hexadecimal SHA-256 of the dataset encoded as UTF-8, before
+                 compression.
+        """
+        from .compression import ChecksumWriter
+        from .compression import validate_compression
+
+        validate_compression(compression)
+        with ChecksumWriter(fileobj, compression=compression) as writer:
+            for chunk in self.iter_chunks():
+                writer.write(chunk)
+        return writer.hexdigest()
+
+    def save(self, filename, compression=None):
+        """Writes the dataset into a file, and the charsets of PHYLIP datasets
+        into ``<filename>.charsets.txt``. The extension of ``compression`` is
+        added to the file names.
+
+        Files are written under a temporary name and renamed when complete, so
+        a dataset that fails to render leaves no file behind.
+
+        Parameters:
+            filename (str):
+            compression (str):  ``gzip``, ``bz2`` or ``xz``.
+
+        Returns:
+            OrderedDict: ``file name: SHA-256`` of the content of each file
+                         before compression.
+
+        Example::
+
+            checksums = dataset.save('dataset.phy', compression='xz')
+            # {'dataset.phy.xz': '3a7b...', 'dataset.phy.charsets.txt.xz': '90c1...'}
+        """
+        from .compression import EXTENSIONS
+        from .compression import add_extension
+        from .compression import validate_compression
+        from .compression import write_file
+
+        validate_compression(compression)
+        if compression is not None and filename.endswith(EXTENSIONS[compression]):
+            filename = filename[:-len(EXTENSIONS[compression])]
+
+        checksums = OrderedDict()
+        path = add_extension(filename, compression)
+        checksums[path] = write_file(path, self.write_to, compression)
+        if self.format == 'PHYLIP':
+            path = add_extension(filename + '.charsets.txt', compression)
+            checksums[path] = write_file(path, self._write_extra_dataset_str, compression)
+        return checksums
+
+    def _write_extra_dataset_str(self, fileobj, compression=None):
+        from .compression import ChecksumWriter
+
+        with ChecksumWriter(fileobj, compression=compression) as writer:
+            writer.write(self.extra_dataset_str)
+        return writer.hexdigest()
@@ -0,0 +1,118 @@
+import warnings
+
+from degenerate_dna import Degenera
+from degenerate_dna._warnings import DegenerateWarning
+
+from . import matrix
+from .utils import get_reading_frame_seq
+
+
+_codon_degenerations = {}
+
+
+def get_codon_degeneration(method):
+    """Returns the ``CodonDegeneration`` of ``method``, created once per
+    method.
+    """
+    if method not in _codon_degenerations:
+        _codon_degenerations[method] = CodonDegeneration(method)
+    return _codon_degenerations[method]
+
+
+class CodonDegeneration(object):
+    """Codon to degenerated codon lookup for a method of Zwick et al, used to
+    degenerate whole gene blocks. As ``SeqRecordExpanded.degenerate`` does,
+    the standard genetic code (table 1) is used.
+
+    The 64 unambiguous codons are degenerated with ``degenerate_dna`` when the
+    lookup is created, and any other codon the first time it is found, so the
+    output is the same as degenerating the whole sequence.
+
+    Parameters:
+        method (str):   ``S``, ``Z``, ``SZ`` or ``normal``.
+
+    Raises:
+        WrongParameterError:    if the method is not one of those.
+    """
+    def __init__(self, method):
+        self.method = method
+        self._codons = {}
+        for codon in matrix.iter_codons():
+            self._codons[codon] = self._degenerate_codon(codon)
+
+        self._codon_array = None
+        if matrix.is_available():
+            self._codon_array = matrix.numpy.frombuffer(
+                ''.join(self._codons[codon] for codon in matrix.iter_codons()).encode('ascii'),
+                dtype=matrix.numpy.uint8,
+            ).reshape(64, 3)
+
+    def _degenerate_codon(self, codon):
+        degenera = Degenera(dna=codon, table=1, method=self.method)
+        degenera.degenerate()
+        return degenera.degenerated
+
+    def get_codon(self, codon):
+        """Degenerates one codon."""
+        try:
+            return self._codons[codon]
+        except KeyError:
+            degenerated = self._degenerate_codon(codon)
+            self._codons[codon] = degenerated
+            return degenerated
+
+    def degenerate(self, seq):
+        """Degenerates a nucleotide sequence. The bases of a trailing partial
+        codon are kept, with the same warning ``degenerate_dna`` gives.
+        """
+        length = len(seq)
+        if length % 3 != 0:
+            warnings.warn("Partial codon, len(sequence) not a multiple of three. "
+                          "Explicitly trim the sequence or add trailing N before "
+                          "translation. This may become an error in future.",
+                          DegenerateWarning)
+        length -= length % 3
+
+        if self._codon_array is not None:
+            try:
+                return self._degenerate_array(seq[:length]) + seq[length:]
+            except UnicodeEncodeError:
+                pass
+        codons = [self.get_codon(seq[index:index + 3]) for index in range(0, length, 3)]
+        return ''.join(codons) + seq[length:]
+
+    def _degenerate_array(self, seq):
+        """Degenerates all the unambiguous codons at once with NumPy, and the
+        rest one by one.
+        """
+        indexes, unambiguous = matrix.codon_indexes(seq.upper())
+        codons = self._codon_array[indexes]
+        for codon_number in matrix.numpy.flatnonzero(~unambiguous):
+            start = codon_number * 3
+            codon = self.get_codon(seq[start:start + 3])
+            codons[codon_number] = matrix.numpy.frombuffer(codon.encode('ascii'),
+                                                           dtype=matrix.numpy.uint8)
+        return codons.tobytes().decode('ascii')
+
+
+def degenerate_block(seq_records, method):
+    """Degenerates the sequences of a gene block, as ``get_seq`` does with
+    ``degenerate=method``.
+
+    Each sequence is trimmed to its reading frame in the record, as
+    ``SeqRecordExpanded.degenerate`` does, without changing the record.
+
+    Parameters:
+        seq_records (list):     SeqRecordExpanded objects with reading frame
+                                1, 2 or 3.
+        method (str):           ``S``, ``Z``, ``SZ`` or ``normal``.
+
+    Returns:
+        list of ``(seq, None)`` tuples, in the form returned by
+        ``translation.translate_block``.
+    """
+    codon_degeneration = get_codon_degeneration(method)
+    degenerated = []
+    for seq_record in seq_records:
+        degenerated.append((codon_degeneration.degenerate(get_reading_frame_seq(seq_record)), None))
+    return degenerated
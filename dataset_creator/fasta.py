@@ -0,0 +1,28 @@
+from .base_dataset import DatasetBlock
+
+
+class FastaDatasetBlock(DatasetBlock):
+    """Writes the concatenated sequence of each taxon as a FASTA record,
+    wrapped at 60 characters per line.
+
+    Datasets partitioned as ``1st-2nd, 3rd`` are written gene by gene by
+    ``DatasetBlock`` instead.
+    """
+    def iter_dataset_block(self):
+        matrix = self.concatenate_blocks()
+        length_of_seqs = None
+        for seq in matrix.values():
+            if length_of_seqs is None:
+                length_of_seqs = len(seq)
+            elif len(seq) != length_of_seqs:
+                raise ValueError("Sequences must all be the same length")
+
+        for taxon_id, seq in matrix.items():
+            yield self.convert_record_to_string(taxon_id, seq)
+
+    def convert_record_to_string(self, taxon_id, seq):
+        n = 60
+        out = ['>{0}\n'.format(taxon_id)]
+        for i in range(0, len(seq), n):
+            out.append(seq[i:i + n] + '\n')
+        return ''.join(out)
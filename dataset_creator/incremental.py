@@ -0,0 +1,196 @@
+import heapq
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ordereddict import OrderedDict
+
+from .dataset import Dataset
+from .index import SeqRecordsIndex
+from .records import RecordStore
+from .records import get_taxa
+from .records import sort_key
+from .utils import get_seq_length
+
+
+class IncrementalDataset(Dataset):
+    """Dataset that can be updated with added, removed or replaced records
+    instead of being created again.
+
+    The rendered block of each gene is kept per format. An update only
+    computes the sequence lengths and transforms the sequences of the genes
+    it touches, renders their blocks again and joins them with the blocks
+    kept for the other genes. Header and footer are rendered again with the
+    new ``NTAX``, ``NCHAR`` and charsets. PHYLIP, FASTA and MEGA rows hold all
+    the genes of a taxon, so these matrices are joined again from the
+    transformed sequences kept for the other genes.
+
+    Parameters are those of ``Dataset``.
+
+    Example::
+
+        dataset = IncrementalDataset(seq_records, format='NEXUS')
+        dataset.update(added=new_seq_records, removed=[('COI', 'CP100-10')])
+        dataset.dataset_str
+        dataset.as_format('PHYLIP').dataset_str
+    """
+    def __init__(self, seq_records, **kwargs):
+        self._rendered_blocks = {}
+        self._gene_blocks = None
+        super(IncrementalDataset, self).__init__(seq_records, **kwargs)
+
+    def _get_rendered_blocks(self, format):
+        return self._rendered_blocks.setdefault(format, {})
+
+    def _get_gene_blocks(self):
+        if self._gene_blocks is None:
+            self._gene_blocks = OrderedDict()
+            for seq_record in self.seq_records:
+                self._gene_blocks.setdefault(seq_record.gene_code, []).append(seq_record)
+        return self._gene_blocks
+
+    def update(self, added=None, removed=None):
+        """Adds, removes or replaces records, and renders the dataset again.
+
+        Removed records are taken out before the added ones are put in. After
+        an update, ``warnings`` only has the warnings of the sequences
+        transformed for it.
+
+        Parameters:
+            added (list):       SeqRecordExpanded objects. A record with the
+                                gene_code and voucher_code of a record of the
+                                dataset replaces it.
+            removed (list):     SeqRecordExpanded objects or ``(gene_code,
+                                voucher_code)`` tuples of the records to
+                                remove.
+
+        Returns:
+            list of the gene codes whose blocks changed. With ``fill_missing``,
+            adding or removing a voucher changes the blocks of every gene.
+
+        Raises:
+            ValueError:     if a removed record is not in the dataset, if no
+                            record would be left, or if no record of the
+                            outgroup would be left. The dataset is not changed.
+        """
+        self.data  # lazy datasets are prepared before being updated
+        added = RecordStore(added or [],
+                            convert_voucher_codes=self.record_store.convert_voucher_codes)
+        gene_blocks = OrderedDict(self._get_gene_blocks())
+        changed = []
+        # gene_code: voucher codes taken out of the block, and added records
+        # by voucher code
+        removals = {}
+        additions = {}
+        voucher_codes = {}
+
+        for seq_record in removed or []:
+            if isinstance(seq_record, tuple):
+                gene_code, voucher_code = seq_record
+            else:
+                gene_code, voucher_code = seq_record.gene_code, seq_record.voucher_code
+            voucher_code = self._convert_voucher_code(voucher_code)
+            if gene_code not in voucher_codes:
+                voucher_codes[gene_code] = set(
+                    block_record.voucher_code for block_record in gene_blocks.get(gene_code, []))
+            gene_removals = removals.setdefault(gene_code, set())
+            if voucher_code not in voucher_codes[gene_code] or voucher_code in gene_removals:
+                raise ValueError("There is no record of {0!r} for gene {1!r} in the "
+                                 "dataset.".format(voucher_code, gene_code))
+            gene_removals.add(voucher_code)
+            if gene_code not in changed:
+                changed.append(gene_code)
+
+        for seq_record in added:
+            # a later record of the same voucher replaces an earlier one
+            additions.setdefault(seq_record.gene_code, OrderedDict())[
+                seq_record.voucher_code] = seq_record
+            if seq_record.gene_code not in changed:
+                changed.append(seq_record.gene_code)
+
+        # each changed block is filtered and merged with its sorted added
+        # records in one pass
+        old_seq_records = []
+        for gene_code in changed:
+            gene_additions = additions.get(gene_code, {})
+            taken_out = removals.get(gene_code, set()).union(gene_additions)
+            kept = []
+            for seq_record in gene_blocks.get(gene_code, []):
+                if seq_record.voucher_code in taken_out:
+                    old_seq_records.append(seq_record)
+                else:
+                    kept.append(seq_record)
+            if gene_additions:
+                kept = list(heapq.merge(kept, sorted(gene_additions.values(), key=sort_key),
+                                        key=sort_key))
+            if kept:
+                gene_blocks[gene_code] = kept
+            else:
+                gene_blocks.pop(gene_code, None)
+        if not gene_blocks:
+            raise ValueError("Cannot remove all the records of the dataset.")
+
+        if self.fill_missing:
+            taxa = get_taxa(seq_record for block in gene_blocks.values() for seq_record in block)
+            if taxa != self.taxa:
+                changed.extend(gene_code for gene_code in gene_blocks if gene_code not in changed)
+
+        gene_codes = sorted(gene_blocks, key=lambda x: (x.lower(), x))
+        seq_records = [seq_record for gene_code in gene_codes
+                       for seq_record in gene_blocks[gene_code]]
+        seq_records_index = SeqRecordsIndex(seq_records)
+        self._validate_outgroup(self.outgroup, seq_records_index)
+
+        self._apply_update(gene_blocks, gene_codes, seq_records, seq_records_index, changed,
+                           old_seq_records)
+        return changed
+
+    def _apply_update(self, gene_blocks, gene_codes, seq_records, seq_records_index, changed,
+                      old_seq_records):
+        self._gene_blocks = OrderedDict((gene_code, gene_blocks[gene_code])
+                                        for gene_code in gene_codes)
+        self.seq_records = seq_records
+        self._seq_records_index = seq_records_index
+
+        gene_codes_and_lengths = OrderedDict()
+        for gene_code in gene_codes:
+            if gene_code in changed:
+                gene_codes_and_lengths[gene_code] = [
+                    get_seq_length(seq_record, self.codon_positions,
+                                   aminoacids=self.aminoacids, degenerate=self.degenerate)
+                    for seq_record in gene_blocks[gene_code]
+                ]
+            else:
+                gene_codes_and_lengths[gene_code] = self._gene_codes_and_lengths[gene_code]
+        self._gene_codes_and_lengths = gene_codes_and_lengths
+
+        self.gene_codes = sorted(gene_codes, key=lambda x: x.lower())
+        self.number_chars = str(sum(max(lengths) for lengths in gene_codes_and_lengths.values()))
+        if self.fill_missing:
+            self.taxa = get_taxa(self.seq_records)
+            self.number_taxa = str(len(self.taxa))
+        else:
+            self.number_taxa = str(max(len(block) for block in gene_blocks.values()))
+        self.reading_frames = dict((gene_code, gene_blocks[gene_code][0].reading_frame)
+                                   for gene_code in gene_codes)
+
+        self._sequences.set_seq_records(self.seq_records, removed=old_seq_records)
+        self._sequences.warnings = []
+        self.data = self.data._replace(
+            gene_codes=self.gene_codes, number_taxa=self.number_taxa,
+            number_chars=self.number_chars, seq_records=self.seq_records,
+            gene_codes_and_lengths=self._gene_codes_and_lengths,
+            reading_frames=self.reading_frames, seq_records_index=self._seq_records_index,
+            taxa=self.taxa,
+        )
+
+        for rendered_blocks in self._rendered_blocks.values():
+            for gene_code in changed:
+                rendered_blocks.pop(gene_code, None)
+        for gene_code in changed:
+            self.data.taxon_labels.discard(gene_code)
+
+        for name in ['_dataset_str', '_warnings', '_extra_dataset_str']:
+            self.__dict__.pop(name, None)
+        if not self.lazy:
+            self._create_dataset()
@@ -0,0 +1,38 @@
+class SeqRecordsIndex(object):
+    """Looks up SeqRecordExpanded objects by gene_code and voucher_code in
+    constant time, so we don't need to scan the list of records.
+
+    If there are repeated records for a pair of gene_code and voucher_code,
+    the first one is indexed.
+
+    Parameters:
+        seq_records (list):  SeqRecordExpanded objects sorted by gene_code and
+                             then voucher_code.
+    """
+    def __init__(self, seq_records):
+        self._seq_records = {}
+        self._first_seq_records = {}
+        for seq_record in seq_records:
+            key = (seq_record.gene_code, seq_record.voucher_code)
+            if key not in self._seq_records:
+                self._seq_records[key] = seq_record
+            if seq_record.voucher_code not in self._first_seq_records:
+                self._first_seq_records[seq_record.voucher_code] = seq_record
+
+    def __len__(self):
+        return len(self._seq_records)
+
+    def __contains__(self, key):
+        return key in self._seq_records
+
+    def get(self, gene_code, voucher_code, default=None):
+        return self._seq_records.get((gene_code, voucher_code), default)
+
+    def has_voucher_code(self, voucher_code):
+        return voucher_code in self._first_seq_records
+
+    def get_first_seq_record(self, voucher_code):
+        """Returns the record of ``voucher_code`` for the first gene_code in
+        which it appears, or None.
+        """
+        return self._first_seq_records.get(voucher_code)
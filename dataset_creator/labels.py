@@ -0,0 +1,98 @@
+import re
+
+
+TAXONOMY_KEYS = [
+    'orden', 'superfamily', 'family', 'subfamily', 'tribe', 'subtribe',
+    'genus', 'species', 'subspecies', 'author', 'hostorg', 'country',
+    'specific_locality'
+]
+
+TRAILING_UNDERSCORE = re.compile('_$')
+UNDERSCORES = re.compile('_+')
+
+
+def flatten_taxonomy(taxonomy):
+    """Joins the ranks of a taxonomy in ``TAXONOMY_KEYS`` order, each one
+    preceded by an underscore, for taxon names such as
+    ``CP100_10_Lepidoptera_Nymphalidae_Aus_aus``.
+
+    Parameters:
+        taxonomy (dict):    or None.
+
+    Returns:
+        str
+    """
+    out = ''
+    if taxonomy is None:
+        return out
+    for key in TAXONOMY_KEYS:
+        try:
+            out += "_" + taxonomy[key]
+        except KeyError:
+            pass
+    out = out.replace(" ", "_")
+    out = TRAILING_UNDERSCORE.sub("", out)
+    return UNDERSCORES.sub("_", out)
+
+
+class TaxonLabels(object):
+    """Taxon names of the records of a dataset, computed once per voucher
+    code and taxonomy and reused by every gene and format.
+
+    Records of a ``RecordStore`` with equal taxonomies share the same dict,
+    so each voucher is labelled once. The taxonomy of every label is kept,
+    so the object it was computed from is never replaced by another one.
+
+    The width of the short labels of each gene is kept too, so padding a
+    gene block needs no scan of its records after the first one.
+    """
+    def __init__(self):
+        self._labels = {}
+        self._widths = {}
+
+    def _get_labels(self, seq_record):
+        taxonomy = seq_record.taxonomy
+        key = (seq_record.voucher_code, id(taxonomy))
+        labels = self._labels.get(key)
+        if labels is None:
+            voucher_code = seq_record.voucher_code
+            genus = species = ''
+            if taxonomy:
+                genus = taxonomy.get('genus', '')
+                species = taxonomy.get('species', '')
+            labels = (
+                taxonomy,
+                '{0}{1}'.format(voucher_code, flatten_taxonomy(taxonomy)),
+                '{0}_{1}_{2}'.format(voucher_code, genus, species),
+            )
+            self._labels[key] = labels
+        return labels
+
+    def get_label(self, seq_record):
+        """Returns the voucher code followed by the flattened taxonomy, as
+        NEXUS, PHYLIP and FASTA datasets name their taxa.
+        """
+        return self._get_labels(seq_record)[1]
+
+    def get_short_label(self, seq_record):
+        """Returns ``voucher_genus_species``, as TNT and MEGA datasets name
+        their taxa.
+        """
+        return self._get_labels(seq_record)[2]
+
+    def get_width(self, block):
+        """Returns the length of the longest short label of a gene block. It is
+        computed once per gene code and number of records, as a block filled
+        with the missing records of the gene has more records.
+        """
+        if not block:
+            return 0
+        widths = self._widths.setdefault(block[0].gene_code, {})
+        if len(block) not in widths:
+            widths[len(block)] = max(len(self.get_short_label(seq_record))
+                                     for seq_record in block)
+        return widths[len(block)]
+
+    def discard(self, gene_code):
+        """Forgets the widths of a gene whose records changed."""
+        self._widths.pop(gene_code, None)
@@ -0,0 +1,122 @@
+# NumPy is optional, sequences are sliced as strings without it. It is
+# imported by ``is_available`` the first time it is needed.
+NOT_IMPORTED = object()
+numpy = NOT_IMPORTED
+NUCLEOTIDE_CODES = None
+
+# Offset of the first complete codon for reading frames 1, 2 and 3, the same
+# used by the codon position methods of SeqRecordExpanded
+CODON_OFFSETS = {1: 0, 2: 2, 3: 1}
+
+# Unambiguous codons are numbered 0 to 63 from their nucleotides in this order
+NUCLEOTIDES = 'TCAG'
+
+
+def is_available():
+    """Whether NumPy is installed. It is imported the first time this is
+    called, so datasets that do not need it do not pay for importing it.
+    """
+    if numpy is NOT_IMPORTED:
+        _import_numpy()
+    return numpy is not None
+
+
+def _import_numpy():
+    global numpy, NUCLEOTIDE_CODES
+    try:
+        import numpy as module
+    except ImportError:
+        numpy = None
+        return
+    codes = module.full(256, 4, dtype=module.uint8)
+    for code, nucleotide in enumerate(NUCLEOTIDES):
+        codes[ord(nucleotide)] = code
+    NUCLEOTIDE_CODES = codes
+    numpy = module
+
+
+def iter_codons():
+    """Yields the 64 unambiguous codons in the order of their index."""
+    for first in NUCLEOTIDES:
+        for second in NUCLEOTIDES:
+            for third in NUCLEOTIDES:
+                yield first + second + third
+
+
+def codon_indexes(seq):
+    """Numbers the codons of an uppercase sequence, whose length is a multiple
+    of three.
+
+    Returns:
+        tuple of two arrays: the index of each codon, and whether the codon is
+        unambiguous. The index of ambiguous codons is 0.
+
+    Raises:
+        UnicodeEncodeError:     if the sequence has non ASCII characters.
+    """
+    bases = numpy.frombuffer(seq.encode('ascii'), dtype=numpy.uint8)
+    codes = NUCLEOTIDE_CODES[bases].reshape(-1, 3).astype(numpy.intp)
+    unambiguous = (codes < 4).all(axis=1)
+    indexes = numpy.where(unambiguous, codes[:, 0] * 16 + codes[:, 1] * 4 + codes[:, 2], 0)
+    return indexes, unambiguous
+
+
+class GeneMatrix(object):
+    """Packs the sequences of a gene into a 2-D ``uint8`` array, one row per
+    record, so codon positions are extracted for all taxa at once with strided
+    slices.
+
+    Rows are padded at the end, and the length of each sequence is kept to
+    trim the extracted positions of shorter rows.
+
+    Parameters:
+        seq_records (list):     SeqRecordExpanded objects of one gene, sharing
+                                the same reading frame.
+        reading_frame (int):    1, 2 or 3.
+
+    Raises:
+        UnicodeEncodeError:     if a sequence has non ASCII characters.
+    """
+    def __init__(self, seq_records, reading_frame):
+        self.seq_records = seq_records
+        self.reading_frame = reading_frame
+
+        seqs = [str(seq_record.seq) for seq_record in seq_records]
+        self.lengths = [len(seq) for seq in seqs]
+        width = max(self.lengths) if self.lengths else 0
+        buffer = ''.join(seq.ljust(width, '?') for seq in seqs).encode('ascii')
+        self.array = numpy.frombuffer(buffer, dtype=numpy.uint8).reshape(len(seqs), width)
+
+    def codon_positions(self, codon_positions):
+        """Returns the list of sequences as strings with the requested codon
+        positions, in the same order as ``seq_records``.
+
+        Parameters:
+            codon_positions (str):  ``1st``, ``2nd``, ``3rd`` or ``1st-2nd``.
+        """
+        offset = CODON_OFFSETS[self.reading_frame]
+        columns = self.array[:, offset:]
+        if codon_positions == '1st':
+            positions = columns[:, 0::3]
+        elif codon_positions == '2nd':
+            positions = columns[:, 1::3]
+        elif codon_positions == '3rd':
+            positions = columns[:, 2::3]
+        else:  # 1st-2nd
+            keep = numpy.arange(columns.shape[1]) % 3 != 2
+            positions = columns[:, keep]
+        positions = numpy.ascontiguousarray(positions)
+
+        seqs = []
+        for row, length in zip(positions, self.lengths):
+            length = max(length - offset, 0)
+            if codon_positions == '1st':
+                number = (length + 2) // 3
+            elif codon_positions == '2nd':
+                number = (length + 1) // 3
+            elif codon_positions == '3rd':
+                number = length // 3
+            else:
+                number = length - length // 3
+            seqs.append(row[:number].tobytes().decode('ascii'))
+        return seqs
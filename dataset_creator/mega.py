@@ -1,35 +1,25 @@
-from .utils import get_seq
 from .base_dataset import DatasetBlock
 
 
 class MegaDatasetBlock(DatasetBlock):
-    def dataset_block(self):
-        self.split_data()
-        return self.convert_blocks_to_string()
+    def iter_dataset_block(self):
+        """MEGA rows hold the concatenated sequences of a taxon for all genes,
+        so the block can only be yielded once every gene has been read.
+        """
+        yield self.convert_blocks_to_string()
 
     def convert_blocks_to_string(self):
         """
         New method, only in MegaDatasetBlock class.
 
+        Rows are joined by taxon name, as in ``concatenate_blocks``, so gene
+        blocks do not need to have the same taxa in the same order.
+
         :return: flattened data blocks as string
         """
-        taxa_ids = [[]] * int(self.data.number_taxa)
-        sequences = [''] * int(self.data.number_taxa)
-
-        for block in self._blocks:
-            for index, seq_record in enumerate(block):
-                taxa_ids[index] = '{0}_{1}_{2}'.format(seq_record.voucher_code,
-                                                       seq_record.taxonomy['genus'],
-                                                       seq_record.taxonomy['species'],
-                                                       )
-                sequence = get_seq(seq_record, self.codon_positions,
-                                   aminoacids=self.aminoacids,
-                                   degenerate=self.degenerate)
-                sequences[index] += sequence.seq
-                if sequence.warning:
-                    self.warnings.append(sequence.warning)
+        matrix = self.concatenate_blocks(get_label=self.labels.get_short_label)
 
         out = ''
-        for index, value in enumerate(taxa_ids):
-            out += '#{0}\n{1}\n'.format(taxa_ids[index], sequences[index])
+        for taxon_id, seq in matrix.items():
+            out += '#{0}\n{1}\n'.format(taxon_id, seq)
         return out
@@ -1,6 +1,67 @@
+from .base_dataset import DatasetBlock
 from .base_dataset import DatasetFooter
 
 
+class PhylipDatasetBlock(DatasetBlock):
+    """Writes the sequences as an interleaved relaxed PHYLIP matrix.
+
+    The output is the same as the one produced by Biopython's ``phylip-relaxed``
+    writer: rows of five chunks of ten characters, taxon names padded to the
+    longest name plus one space.
+    """
+    def iter_dataset_block(self):
+        yield self.convert_matrix_to_string(self.concatenate_blocks())
+
+    def convert_matrix_to_string(self, matrix):
+        if not matrix:
+            raise ValueError("Must have at least one sequence")
+
+        seqs = list(matrix.values())
+        length_of_seqs = len(seqs[0])
+        for seq in seqs:
+            if len(seq) != length_of_seqs:
+                raise ValueError("Sequences must all be the same length")
+        if length_of_seqs <= 0:
+            raise ValueError("Non-empty sequences are required")
+
+        id_width = max(len(taxon_id.strip()) for taxon_id in matrix) + 1
+        names = []
+        for taxon_id in matrix:
+            name = self.sanitize_name(taxon_id)[:id_width]
+            if name in names:
+                raise ValueError("Repeated name {0!r} (originally {1!r})".format(name, taxon_id))
+            names.append(name)
+
+        out = [' {0} {1}\n'.format(len(seqs), length_of_seqs)]
+        block = 0
+        while True:
+            for name, seq in zip(names, seqs):
+                if block == 0:
+                    out.append(name.ljust(id_width))
+                else:
+                    out.append(' ' * id_width)
+                for chunk in range(5):
+                    i = block * 50 + chunk * 10
+                    out.append(' ' + seq[i:i + 10])
+                    if i + 10 > length_of_seqs:
+                        break
+                out.append('\n')
+            block += 1
+            if block * 50 >= length_of_seqs:
+                break
+            out.append('\n')
+        return ''.join(out)
+
+    def sanitize_name(self, taxon_id):
+        """Removes the characters ``[](),`` and replaces ``:;`` with ``|``."""
+        name = taxon_id.strip()
+        for char in '[](),':
+            name = name.replace(char, '')
+        for char in ':;':
+            name = name.replace(char, '|')
+        return name
+
+
 class PhylipDatasetFooter(DatasetFooter):
     def make_charset_block(self):
         """
@@ -0,0 +1,96 @@
+import time
+from contextlib import contextmanager
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ordereddict import OrderedDict
+
+
+class Profiler(object):
+    """Collects where the time of creating a dataset goes.
+
+    A dataset only has a profiler if it was created with ``profile=True`` or a
+    ``profile_hook``. Otherwise every instrumented step checks that the
+    profiler is ``None`` and nothing is measured.
+
+    Parameters:
+        hook (callable):    Called as ``hook(event, name, value)`` every time
+                            something is recorded:
+
+                              * ``('stage', stage, seconds)``
+                              * ``('gene', gene_code, seconds)``
+                              * ``('count', counter, number)``
+                              * ``('bytes', format, number)``
+
+    Attributes:
+        timings (OrderedDict):      ``stage: seconds`` of ``sort_seq_records``,
+                                    ``prepare_data``, ``prefetch_sequences``,
+                                    ``create_dataset_header``,
+                                    ``create_dataset_block``,
+                                    ``create_dataset_footer``,
+                                    ``put_everything_together`` and
+                                    ``create_extra_dataset_file``.
+        gene_timings (OrderedDict): ``gene_code: seconds`` spent rendering the
+                                    block of each gene, including the
+                                    transformation of its sequences.
+        counts (dict):              Number of sequences transformed by
+                                    ``get_seq``, translated and degenerated,
+                                    and of gene blocks transformed at once:
+                                    ``get_seq``, ``translate``, ``degenerate``
+                                    and ``gene_blocks``.
+        bytes_emitted (dict):       ``format: bytes`` of rendered datasets,
+                                    encoded as UTF-8.
+
+    Times are added up if a step runs more than once, for example when the
+    dataset is rendered in several formats with ``as_format``.
+    """
+    def __init__(self, hook=None):
+        self.hook = hook
+        self.timings = OrderedDict()
+        self.gene_timings = OrderedDict()
+        self.counts = {}
+        self.bytes_emitted = {}
+
+    def _record(self, event, records, name, value):
+        records[name] = records.get(name, 0) + value
+        if self.hook is not None:
+            self.hook(event, name, value)
+
+    def add_timing(self, stage, seconds):
+        self._record('stage', self.timings, stage, seconds)
+
+    def add_gene_timing(self, gene_code, seconds):
+        self._record('gene', self.gene_timings, gene_code, seconds)
+
+    def count(self, counter, number=1):
+        self._record('count', self.counts, counter, number)
+
+    def add_bytes(self, format, text):
+        self._record('bytes', self.bytes_emitted, format, len(text.encode('utf-8')))
+
+    @contextmanager
+    def stage(self, stage):
+        """Times the body of the ``with`` statement as ``stage``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_timing(stage, time.perf_counter() - start)
+
+    @contextmanager
+    def gene(self, gene_code):
+        """Times the body of the ``with`` statement as rendering ``gene_code``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_gene_timing(gene_code, time.perf_counter() - start)
+
+
+def run_stage(profiler, stage, function, *args, **kwargs):
+    """Calls ``function``, timing it as ``stage`` if there is a profiler."""
+    if profiler is None:
+        return function(*args, **kwargs)
+    with profiler.stage(stage):
+        return function(*args, **kwargs)
@@ -0,0 +1,176 @@
+from array import array
+
+from .labels import TaxonLabels
+
+
+def sort_key(seq_record):
+    """Sorts records by gene_code and then by voucher code, case
+    insensitively.
+    """
+    return (seq_record.gene_code.lower(), seq_record.gene_code,
+            seq_record.voucher_code.lower(), seq_record.voucher_code)
+
+
+def get_taxa(seq_records):
+    """Returns the distinct voucher codes of the records, sorted as the
+    records of each gene are.
+    """
+    return sorted(set(seq_record.voucher_code for seq_record in seq_records),
+                  key=lambda voucher_code: (voucher_code.lower(), voucher_code))
+
+
+class RecordStore(object):
+    """Compact storage of the records of a dataset, sorted by gene_code and
+    then voucher code.
+
+    Gene codes, voucher codes, lineages and accession numbers are kept once
+    per distinct value and taxonomies once per distinct taxonomy, so every
+    record of a voucher shares the same dict. Sequences are packed in a
+    single ``bytes`` buffer with the offset of each one.
+
+    The input records are not modified: voucher codes are converted to be
+    accepted by phylogenetic software in the store. Records whose sequence
+    is read from an alignment file when needed, or is not ASCII, keep their
+    sequence where it is.
+
+    Parameters:
+        seq_records (list):             SeqRecordExpanded objects.
+        convert_voucher_codes (boolean): Replace dashes in voucher codes with
+                                        underscores, as all formats but Bankit
+                                        need.
+
+    Attributes:
+        gene_codes (list):      Distinct gene codes.
+        voucher_codes (list):   Distinct voucher codes.
+        taxonomies (list):      Distinct taxonomies.
+        taxon_labels (TaxonLabels): Taxon names of the records, shared by the
+                                datasets created from the store.
+        seq_records (list):     ``StoredSeqRecord`` objects, one per record,
+                                that read their sequence from the store.
+    """
+    def __init__(self, seq_records, convert_voucher_codes=True):
+        self._setup(convert_voucher_codes)
+
+        rows = []
+        for seq_record in seq_records:
+            voucher_code = seq_record.voucher_code
+            if convert_voucher_codes:
+                voucher_code = voucher_code.replace("-", "_")
+            rows.append((seq_record.gene_code.lower(), seq_record.gene_code,
+                         voucher_code.lower(), voucher_code, seq_record))
+        rows.sort(key=lambda row: row[:4])
+
+        seqs = []
+        offset = 0
+        for row, (_, gene_code, _, voucher_code, seq_record) in enumerate(rows):
+            seq = self._pack_sequence(row, seq_record)
+            seqs.append(seq)
+            offset += len(seq)
+            self._offsets.append(offset)
+            self._add_record(row, gene_code, voucher_code, seq_record.taxonomy,
+                             seq_record.lineage, seq_record.accession_number,
+                             seq_record.reading_frame, seq_record.table)
+        self._buffer = b''.join(seqs)
+
+    @classmethod
+    def from_buffer(cls, buffer, offsets, rows, convert_voucher_codes=True):
+        """Creates a store from records that are already sorted and cleaned,
+        whose sequences are in ``buffer``, as ``snapshot.load_snapshot`` does
+        with a memory-mapped file.
+
+        Parameters:
+            buffer:                 ``bytes`` or ``mmap`` object.
+            offsets:                Array with the position of each sequence
+                                    in ``buffer`` and the end of the last one.
+            rows (iterable):        ``(gene_code, voucher_code, taxonomy,
+                                    lineage, accession_number, reading_frame,
+                                    table)`` of each record.
+            convert_voucher_codes (boolean): Whether the voucher codes were
+                                    converted.
+        """
+        store = cls.__new__(cls)
+        store._setup(convert_voucher_codes)
+        store._offsets = offsets
+        store._buffer = buffer
+        for row, fields in enumerate(rows):
+            store._add_record(row, *fields)
+        return store
+
+    def _setup(self, convert_voucher_codes):
+        # Biopython is imported with the first store made, not with the package
+        from .stored_records import StoredSeqRecord
+
+        self._record_class = StoredSeqRecord
+        self.convert_voucher_codes = convert_voucher_codes
+        self._gene_codes = {}
+        self._voucher_codes = {}
+        self._taxonomies = {}
+        # lineages and accession numbers are shared as well
+        self._others = {}
+        self._offsets = array('q', [0])
+        self._external_seq_records = {}
+        self.taxon_labels = TaxonLabels()
+        self.seq_records = []
+
+    def _add_record(self, row, gene_code, voucher_code, taxonomy, lineage,
+                    accession_number, reading_frame, table):
+        others = self._others
+        self.seq_records.append(self._record_class(
+            self, row,
+            self._gene_codes.setdefault(gene_code, gene_code),
+            self._voucher_codes.setdefault(voucher_code, voucher_code),
+            self._intern_taxonomy(taxonomy),
+            others.setdefault(lineage, lineage),
+            others.setdefault(accession_number, accession_number),
+            reading_frame,
+            table,
+        ))
+
+    def _intern_taxonomy(self, taxonomy):
+        """Returns a copy of ``taxonomy`` shared by all equal taxonomies."""
+        if not isinstance(taxonomy, dict):
+            return taxonomy
+        key = tuple(sorted(taxonomy.items()))
+        if key not in self._taxonomies:
+            self._taxonomies[key] = dict(taxonomy)
+        return self._taxonomies[key]
+
+    @property
+    def gene_codes(self):
+        return list(self._gene_codes)
+
+    @property
+    def voucher_codes(self):
+        return list(self._voucher_codes)
+
+    @property
+    def taxonomies(self):
+        return list(self._taxonomies.values())
+
+    def _pack_sequence(self, row, seq_record):
+        """Returns the bytes of the sequence to keep in the buffer, or
+        ``b''`` if the record keeps its sequence.
+        """
+        if getattr(seq_record, '_alignment_file', None) is not None:
+            self._external_seq_records[row] = seq_record
+            return b''
+        seq = str(seq_record.seq)
+        try:
+            return seq.encode('ascii')
+        except UnicodeEncodeError:
+            self._external_seq_records[row] = seq_record
+            return b''
+
+    def __len__(self):
+        return len(self.seq_records)
+
+    def __iter__(self):
+        return iter(self.seq_records)
+
+    def get_sequence(self, row, start=0):
+        """Returns the sequence of a row, from ``start``, as ``bytes`` or
+        ``str``.
+        """
+        if row in self._external_seq_records:
+            return str(self._external_seq_records[row].seq)[start:]
+        return self._buffer[self._offsets[row] + start:self._offsets[row + 1]]
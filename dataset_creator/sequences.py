@@ -0,0 +1,302 @@
+from . import matrix
+from .utils import get_seq
+
+
+class SequenceStore(object):
+    """Keeps the sequence of each SeqRecordExpanded object already transformed
+    into the requested codon positions, aminoacids or degenerated nucleotides.
+
+    Translation and degeneration are the most expensive steps of creating a
+    dataset, so each sequence is transformed once, the first time it is
+    requested, and shared by every dataset block.
+
+    Parameters:
+        codon_positions (str):  Can be ``1st``, ``2nd``, ``3rd``, ``1st-2nd``,
+                                ``ALL``.
+        aminoacids (boolean):   Translate the sequences.
+        degenerate (str):       Method to degenerate nucleotide sequences:
+                                ``S``, ``Z``, ``SZ`` and ``normal``.
+        seq_records (list):     SeqRecordExpanded objects of the dataset. If
+                                given, sequences are translated or degenerated
+                                a whole gene block at once and, if NumPy is
+                                installed, codon positions are extracted with a
+                                ``GeneMatrix``.
+        profiler (Profiler):    Counts the sequences transformed by ``get_seq``,
+                                translated and degenerated, and the gene
+                                blocks.
+
+    Attributes:
+        warnings (list):        Warnings produced when transforming the
+                                sequences, in the order they were requested.
+    """
+    def __init__(self, codon_positions, aminoacids=None, degenerate=None,
+                 seq_records=None, profiler=None):
+        self.codon_positions = codon_positions
+        self.profiler = profiler
+        self.aminoacids = aminoacids
+        self.degenerate = degenerate
+        self.warnings = []
+        self._seqs = {}
+        self._pending_warnings = {}
+        self._record_warnings = {}
+        # records whose warning was collected before they were transformed
+        self._collected = set()
+        self._seq_records = seq_records
+        self._gene_blocks = None
+
+    @property
+    def key(self):
+        """Identifies the transformation. Stores with the same key hold the same
+        sequences, as ``get_seq`` ignores codon_positions when translating or
+        degenerating.
+        """
+        if self.aminoacids:
+            return ('aminoacids',)
+        if self.degenerate:
+            return ('degenerate', self.degenerate)
+        return ('codon_positions', self.codon_positions)
+
+    def __len__(self):
+        return len(self._seqs)
+
+    def __contains__(self, seq_record):
+        return seq_record in self._seqs
+
+    def get(self, seq_record):
+        """Returns the transformed sequence of ``seq_record`` as string."""
+        if seq_record not in self._seqs:
+            if self._uses_gene_blocks():
+                self.add_gene_block(seq_record.gene_code)
+            if seq_record not in self._seqs:
+                return self.add(seq_record)
+
+        if seq_record in self._pending_warnings:
+            self.warnings.append(self._pending_warnings.pop(seq_record))
+        return self._seqs[seq_record]
+
+    def _uses_gene_blocks(self):
+        if self._seq_records is None:
+            return False
+        if self.aminoacids:
+            return True
+        if self.degenerate:
+            return self.degenerate in ['S', 'Z', 'SZ', 'normal']
+        return (
+            matrix.is_available() and
+            self.codon_positions in ['1st', '2nd', '3rd', '1st-2nd']
+        )
+
+    def set_seq_records(self, seq_records, removed=()):
+        """Replaces the records of the dataset, forgetting the sequences of the
+        ``removed`` records. Sequences of the records that are kept are not
+        transformed again.
+        """
+        for seq_record in removed:
+            self._seqs.pop(seq_record, None)
+            self._pending_warnings.pop(seq_record, None)
+            self._record_warnings.pop(seq_record, None)
+            self._collected.discard(seq_record)
+        self._seq_records = seq_records
+        self._gene_blocks = None
+
+    def _get_gene_block(self, gene_code):
+        if self._gene_blocks is None:
+            self._gene_blocks = {}
+            for seq_record in self._seq_records:
+                self._gene_blocks.setdefault(seq_record.gene_code, []).append(seq_record)
+        return self._gene_blocks.get(gene_code, [])
+
+    def add_gene_block(self, gene_code):
+        """Transforms the sequences of all the records of ``gene_code`` at once:
+        translated with ``translation.translate_block``, degenerated with
+        ``degeneration.degenerate_block``, or their codon positions extracted
+        with a ``GeneMatrix`` per reading frame.
+
+        Records without a valid reading frame or translation table, or that
+        cannot be translated, are left to ``add`` so that the same errors are
+        raised.
+        """
+        seq_records = [
+            seq_record for seq_record in self._get_gene_block(gene_code)
+            if seq_record not in self._seqs and seq_record.reading_frame in [1, 2, 3]
+        ]
+        if self.aminoacids:
+            seq_records = [seq_record for seq_record in seq_records
+                           if seq_record.table is not None]
+        if self.profiler is not None:
+            self._count_gene_block(seq_records)
+        if self.aminoacids:
+            # Biopython is only imported by datasets that need it
+            from .translation import translate_block
+            self._add_transformed(seq_records, translate_block(seq_records))
+            return
+        if self.degenerate:
+            # degenerate_dna is only imported by datasets that need it
+            from .degeneration import degenerate_block
+            self._add_transformed(seq_records, degenerate_block(seq_records, self.degenerate))
+            return
+
+        by_reading_frame = {}
+        for seq_record in seq_records:
+            by_reading_frame.setdefault(seq_record.reading_frame, []).append(seq_record)
+
+        for reading_frame, seq_records in by_reading_frame.items():
+            try:
+                gene_matrix = matrix.GeneMatrix(seq_records, reading_frame)
+            except UnicodeEncodeError:
+                continue
+            seqs = gene_matrix.codon_positions(self.codon_positions)
+            for seq_record, seq in zip(seq_records, seqs):
+                self._seqs[seq_record] = seq
+
+    def _add_transformed(self, seq_records, sequences):
+        """Keeps ``(seq, warning)`` tuples of ``seq_records``. Warnings are held
+        until each sequence is requested.
+        """
+        for seq_record, (seq, warning) in zip(seq_records, sequences):
+            if seq is None:
+                continue
+            self._seqs[seq_record] = seq
+            if warning:
+                if seq_record not in self._collected:
+                    self._pending_warnings[seq_record] = warning
+                self._record_warnings[seq_record] = warning
+
+    def add(self, seq_record):
+        """Transforms the sequence of ``seq_record`` and keeps it."""
+        if self.profiler is not None:
+            self.profiler.count('get_seq')
+            self._count_transformed(1)
+        sequence = get_seq(seq_record, self.codon_positions,
+                           aminoacids=self.aminoacids,
+                           degenerate=self.degenerate)
+        if sequence.warning:
+            if seq_record not in self._collected:
+                self.warnings.append(sequence.warning)
+            self._record_warnings[seq_record] = sequence.warning
+        self._seqs[seq_record] = sequence.seq
+        return sequence.seq
+
+    def get_warning(self, seq_record):
+        """Returns the warning of the transformed sequence of ``seq_record``,
+        or None.
+        """
+        return self._record_warnings.get(seq_record)
+
+    def collect_warning(self, seq_record, warning):
+        """Collects the warning of a sequence that was not requested because
+        its block was read from a cache, as ``get`` would. Warnings already
+        collected are not added again.
+        """
+        if seq_record in self._pending_warnings:
+            del self._pending_warnings[seq_record]
+        elif seq_record in self._seqs or seq_record in self._collected:
+            return
+        else:
+            self._collected.add(seq_record)
+        self.warnings.append(warning)
+
+    def export(self, seq_records):
+        """Returns the transformed sequence of each record with its warning,
+        transforming the sequences that were not requested yet.
+
+        Warnings of the sequences transformed here are held until they are
+        requested with ``get``, as in ``prefetch``.
+
+        Returns:
+            list of ``(seq, warning)`` tuples.
+        """
+        sequences = []
+        for seq_record in seq_records:
+            if seq_record not in self._seqs:
+                if self._uses_gene_blocks():
+                    self.add_gene_block(seq_record.gene_code)
+                if seq_record not in self._seqs:
+                    sequence = get_seq(seq_record, self.codon_positions,
+                                       aminoacids=self.aminoacids,
+                                       degenerate=self.degenerate)
+                    self._add_transformed([seq_record], [sequence])
+            sequences.append((self._seqs[seq_record], self._record_warnings.get(seq_record)))
+        return sequences
+
+    def restore(self, seqs, record_warnings):
+        """Starts from sequences that were transformed before, as
+        ``snapshot.load_snapshot`` does.
+
+        Parameters:
+            seqs:                   Mapping of SeqRecordExpanded objects to
+                                    their transformed sequences. Sequences
+                                    transformed later are added to it.
+            record_warnings (dict): ``seq_record: warning``. Each warning is
+                                    collected when its sequence is requested.
+        """
+        self._seqs = seqs
+        self._record_warnings = dict(record_warnings)
+        self._pending_warnings = dict(record_warnings)
+
+    def prefetch(self, seq_records, workers):
+        """Transforms the sequences of ``seq_records`` in a pool of ``workers``
+        processes, one gene block per task.
+
+        The warnings are held back until each sequence is requested with
+        ``get``, so they are collected in the same order as in serial mode.
+        The records are transformed in copies sent to the workers, so their
+        ``seq`` is not trimmed to the reading frame by translation or
+        degeneration.
+
+        Parameters:
+            seq_records (list):  SeqRecordExpanded objects sorted by gene_code.
+            workers (int):       Number of processes.
+        """
+        blocks = []
+        this_gene_code = None
+        for seq_record in seq_records:
+            if seq_record in self._seqs:
+                continue
+            if this_gene_code is None or this_gene_code != seq_record.gene_code:
+                this_gene_code = seq_record.gene_code
+                blocks.append([])
+            blocks[-1].append(seq_record)
+        if not blocks:
+            return
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        tasks = [(block, self.codon_positions, self.aminoacids, self.degenerate)
+                 for block in blocks]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for block, sequences in zip(blocks, executor.map(transform_block, tasks)):
+                if self.profiler is not None:
+                    self._count_gene_block(block)
+                self._add_transformed(block, sequences)
+
+    def _count_gene_block(self, seq_records):
+        self.profiler.count('gene_blocks')
+        self._count_transformed(len(seq_records))
+
+    def _count_transformed(self, number):
+        if self.aminoacids:
+            self.profiler.count('translate', number)
+        elif self.degenerate:
+            self.profiler.count('degenerate', number)
+
+
+def transform_block(task):
+    """Transforms the sequences of a gene block in a worker process.
+
+    Returns:
+        list of ``(seq, warning)`` tuples, as the namedtuple of ``get_seq``
+        cannot be pickled.
+    """
+    seq_records, codon_positions, aminoacids, degenerate = task
+    store = SequenceStore(codon_positions, aminoacids=aminoacids, degenerate=degenerate,
+                          seq_records=seq_records)
+    sequences = []
+    for seq_record in seq_records:
+        number_warnings = len(store.warnings)
+        seq = store.get(seq_record)
+        warning = None
+        if len(store.warnings) > number_warnings:
+            warning = store.warnings[-1]
+        sequences.append((seq, warning))
+    return sequences
@@ -0,0 +1,320 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from .records import RecordStore
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ordereddict import OrderedDict
+
+
+MAGIC = b'DCSNAP\x00\x00'
+VERSION = 1
+
+# magic, position and length of the header
+PREAMBLE = struct.Struct('<8sQQ')
+ALIGNMENT = 8
+
+# options of the dataset that the prepared records depend on
+PREPARED_OPTIONS = ['codon_positions', 'aminoacids', 'degenerate', 'fill_missing']
+
+# fields of each record kept as positions in the list of values of the header
+RECORD_FIELDS = ['gene_code', 'voucher_code', 'taxonomy', 'lineage', 'accession_number',
+                 'reading_frame', 'table']
+
+# flags of each record
+SEQUENCE_WAS_CORRECTED = 1
+
+
+def _get_prepared_options(dataset):
+    return {
+        'codon_positions': dataset.codon_positions,
+        'aminoacids': bool(dataset.aminoacids),
+        'degenerate': dataset.degenerate or None,
+        'fill_missing': bool(dataset.fill_missing),
+    }
+
+
+class SnapshotWriter(object):
+    """Lays out the sections of a snapshot file: each one is aligned to
+    ``ALIGNMENT`` bytes after the preamble, so arrays can be read from the
+    memory-mapped file in place.
+    """
+    def __init__(self):
+        self.sections = OrderedDict()
+        self.position = PREAMBLE.size
+        self._parts = []
+
+    def add(self, name, data, typecode='B'):
+        """Adds a section and returns its position in the file.
+
+        Parameters:
+            data:   ``bytes`` or ``array``.
+        """
+        padding = -self.position % ALIGNMENT
+        if padding:
+            self._parts.append(b'\0' * padding)
+            self.position += padding
+        position = self.position
+        data = bytes(data)
+        self.sections[name] = [position, len(data), typecode]
+        self._parts.append(data)
+        self.position += len(data)
+        return position
+
+    def write(self, fileobj, header):
+        header['sections'] = self.sections
+        header = json.dumps(header).encode('utf-8')
+        fileobj.write(PREAMBLE.pack(MAGIC, self.position, len(header)))
+        for part in self._parts:
+            fileobj.write(part)
+        fileobj.write(header)
+
+
+def _pack_sequences(writer, name, sequences):
+    """Adds the sequences to ``writer`` in one section, and the position of
+    each one and the end of the last one in the file in ``<name>_offsets``.
+    """
+    data = [sequence.encode('utf-8') for sequence in sequences]
+    position = writer.position + (-writer.position % ALIGNMENT)
+    offsets = array('q', [position])
+    for sequence in data:
+        position += len(sequence)
+        offsets.append(position)
+    writer.add(name, b''.join(data))
+    writer.add(name + '_offsets', offsets, 'q')
+
+
+def save_snapshot(dataset, filename):
+    """Writes the prepared records of ``dataset`` into ``filename``.
+
+    The snapshot has the sorted records, their fields shared as in the
+    ``RecordStore``, their sequences as read by the dataset, their sequences
+    transformed according to codon positions, aminoacids and degenerate with
+    the warning of each one, the gene lengths, reading frames, taxa and the
+    options of the dataset. Sequences are transformed first if needed.
+
+    The file is a preamble with the position of a JSON header at the end of
+    the file, and sections of sequences and fixed size arrays aligned to 8
+    bytes, in the byte order of the machine that wrote them.
+    """
+    seq_records = dataset.seq_records
+    data = dataset.data
+    dataset._prefetch_sequences(dataset.format)
+    transformed = data.sequences.export(seq_records)
+
+    values = []
+    value_positions = {}
+    columns = array('i')
+    flags = array('B')
+    for seq_record in seq_records:
+        for field in RECORD_FIELDS:
+            value = getattr(seq_record, field)
+            # taxonomies are shared dicts in the store
+            key = ('dict', id(value)) if isinstance(value, dict) else (type(value), value)
+            if key not in value_positions:
+                value_positions[key] = len(values)
+                values.append(value)
+            columns.append(value_positions[key])
+        flags.append(SEQUENCE_WAS_CORRECTED if seq_record._sequence_was_corrected else 0)
+
+    warnings = []
+    warning_positions = {}
+    record_warnings = array('i')
+    for seq, warning in transformed:
+        if warning is None:
+            record_warnings.append(-1)
+            continue
+        if warning not in warning_positions:
+            warning_positions[warning] = len(warnings)
+            warnings.append(warning)
+        record_warnings.append(warning_positions[warning])
+
+    gene_lengths = []
+    lengths = array('q')
+    for gene_code, seq_lengths in data.gene_codes_and_lengths.items():
+        gene_lengths.append([gene_code, len(lengths), len(lengths) + len(seq_lengths)])
+        lengths.extend(seq_lengths)
+
+    writer = SnapshotWriter()
+    _pack_sequences(writer, 'sequences', [str(seq_record.seq) for seq_record in seq_records])
+    _pack_sequences(writer, 'transformed', [seq for seq, warning in transformed])
+    writer.add('columns', columns, 'i')
+    writer.add('flags', flags, 'B')
+    writer.add('warnings', record_warnings, 'i')
+    writer.add('lengths', lengths, 'q')
+
+    options = _get_prepared_options(dataset)
+    options.update({
+        'format': dataset.format,
+        'partitioning': dataset.partitioning,
+        'outgroup': dataset.outgroup,
+    })
+    header = {
+        'version': VERSION,
+        'byteorder': sys.byteorder,
+        'number_records': len(seq_records),
+        'convert_voucher_codes': dataset.record_store.convert_voucher_codes,
+        'options': options,
+        'values': values,
+        'warnings': warnings,
+        'gene_codes': data.gene_codes,
+        'gene_lengths': gene_lengths,
+        'number_taxa': data.number_taxa,
+        'number_chars': data.number_chars,
+        'taxa': data.taxa,
+        'reading_frames': data.reading_frames,
+    }
+
+    temporary = '{0}.{1}.tmp'.format(filename, os.getpid())
+    try:
+        with open(temporary, 'wb') as fileobj:
+            writer.write(fileobj, header)
+        os.replace(temporary, filename)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+class TransformedSequences(object):
+    """Transformed sequences of the records of a snapshot, read from the
+    memory-mapped file when requested. Sequences of other records are kept
+    in a dict, so it can be used as the sequences of a ``SequenceStore``.
+    """
+    def __init__(self, record_store, buffer, offsets):
+        self._record_store = record_store
+        self._buffer = buffer
+        self._offsets = offsets
+        self._seqs = {}
+
+    def _get_row(self, seq_record):
+        if getattr(seq_record, '_store', None) is self._record_store:
+            return seq_record._row
+        return None
+
+    def __len__(self):
+        return len(self._offsets) - 1 + len(self._seqs)
+
+    def __contains__(self, seq_record):
+        return self._get_row(seq_record) is not None or seq_record in self._seqs
+
+    def __getitem__(self, seq_record):
+        row = self._get_row(seq_record)
+        if row is None:
+            return self._seqs[seq_record]
+        return self._buffer[self._offsets[row]:self._offsets[row + 1]].decode('utf-8')
+
+    def __setitem__(self, seq_record, seq):
+        self._seqs[seq_record] = seq
+
+    def pop(self, seq_record, default=None):
+        return self._seqs.pop(seq_record, default)
+
+
+class Snapshot(object):
+    """Prepared records of a dataset read from a snapshot file by
+    ``load_snapshot``.
+
+    Attributes:
+        options (dict):         Parameters of the saved ``Dataset``.
+        record_store (RecordStore): Sorted records, reading their sequences
+                                from the memory-mapped file.
+        gene_codes (list):
+        gene_codes_and_lengths (OrderedDict):
+        number_taxa (str):
+        number_chars (str):
+        taxa (list):            or None.
+        reading_frames (dict):
+    """
+    def __init__(self, filename):
+        with open(filename, 'rb') as handle:
+            try:
+                self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file
+                self._mmap = b''
+
+        if len(self._mmap) < PREAMBLE.size:
+            raise ValueError("{0!r} is not a dataset snapshot".format(filename))
+        magic, position, length = PREAMBLE.unpack(self._mmap[:PREAMBLE.size])
+        if magic != MAGIC:
+            raise ValueError("{0!r} is not a dataset snapshot".format(filename))
+        header = json.loads(self._mmap[position:position + length].decode('utf-8'))
+        if header['version'] != VERSION:
+            raise ValueError("Snapshot version {0} of {1!r} is not supported".format(
+                header['version'], filename))
+        if header['byteorder'] != sys.byteorder:
+            raise ValueError("Snapshot {0!r} was written on a {1} endian machine".format(
+                filename, header['byteorder']))
+        self._sections = header['sections']
+
+        self.options = header['options']
+        self.gene_codes = header['gene_codes']
+        self.number_taxa = header['number_taxa']
+        self.number_chars = header['number_chars']
+        self.taxa = header['taxa']
+        self.reading_frames = header['reading_frames']
+
+        lengths = self._get_array('lengths')
+        self.gene_codes_and_lengths = OrderedDict(
+            (gene_code, lengths[start:end].tolist())
+            for gene_code, start, end in header['gene_lengths']
+        )
+
+        values = header['values']
+        number_fields = len(RECORD_FIELDS)
+        columns = self._get_array('columns').tolist()
+        rows = ([values[position] for position in columns[start:start + number_fields]]
+                for start in range(0, len(columns), number_fields))
+        self.record_store = RecordStore.from_buffer(
+            self._mmap, self._get_array('sequences_offsets'), rows,
+            convert_voucher_codes=header['convert_voucher_codes'],
+        )
+        seq_records = self.record_store.seq_records
+        for row, flags in enumerate(self._get_array('flags')):
+            if flags & SEQUENCE_WAS_CORRECTED:
+                seq_records[row]._sequence_was_corrected = True
+
+        warnings = header['warnings']
+        self._record_warnings = dict(
+            (seq_records[row], warnings[position])
+            for row, position in enumerate(self._get_array('warnings')) if position != -1
+        )
+
+    def _get_array(self, name):
+        position, length, typecode = self._sections[name]
+        return memoryview(self._mmap)[position:position + length].cast(typecode)
+
+    def check_options(self, dataset):
+        """Raises ValueError if ``dataset`` needs records prepared with other
+        options.
+        """
+        options = _get_prepared_options(dataset)
+        for name in PREPARED_OPTIONS:
+            if options[name] != self.options[name]:
+                raise ValueError("The records were prepared with {0}={1!r}, not {2!r}".format(
+                    name, self.options[name], options[name]))
+
+    def restore_sequences(self, sequences):
+        """Makes ``sequences``, a SequenceStore of the records, start from the
+        transformed sequences of the snapshot.
+        """
+        sequences.restore(
+            TransformedSequences(self.record_store, self._mmap,
+                                 self._get_array('transformed_offsets')),
+            self._record_warnings,
+        )
+
+
+def load_snapshot(filename):
+    """Reads a snapshot written by ``save_snapshot``.
+
+    Returns:
+        Snapshot
+    """
+    return Snapshot(filename)
@@ -0,0 +1,125 @@
+from Bio.Seq import Seq
+from seqrecord_expanded import SeqRecordExpanded
+
+
+class StoredSeqRecord(SeqRecordExpanded):
+    """SeqRecordExpanded whose sequence is read from a row of a
+    ``RecordStore``. Its other fields are the values shared in the store.
+
+    Only the sequence can be replaced, as translation and degeneration do.
+    Trimming it to the reading frame only keeps the offset. Records are
+    pickled as plain SeqRecordExpanded objects with their sequence, so they
+    can be sent to worker processes without the store.
+
+    Parameters:
+        store (RecordStore):
+        row (int):              Row of the record in the store.
+        gene_code, voucher_code, taxonomy, lineage, accession_number,
+        reading_frame, table:   As in SeqRecordExpanded, already cleaned.
+    """
+    # defaults kept in the class, so each record only holds what changes
+    _seq = None
+    _start = 0
+    # tells the missing records of a gene block from the stored ones
+    is_missing = False
+    _sequence_was_corrected = None
+    _warnings = None
+
+    def __init__(self, store, row, gene_code, voucher_code, taxonomy, lineage,
+                 accession_number, reading_frame, table):
+        self._store = store
+        self._row = row
+        self.gene_code = gene_code
+        self.voucher_code = voucher_code
+        self.taxonomy = taxonomy
+        self.lineage = lineage
+        self.accession_number = accession_number
+        self.reading_frame = reading_frame
+        self.table = table
+
+    @property
+    def warnings(self):
+        if self._warnings is None:
+            self._warnings = []
+        return self._warnings
+
+    @property
+    def seq(self):
+        if self._seq is not None:
+            return self._seq
+        return Seq(self._store.get_sequence(self._row, self._start))
+
+    @seq.setter
+    def seq(self, value):
+        self._seq = value
+
+    def _correct_seq_based_on_reading_frame(self):
+        """Keeps where the reading frame starts instead of a trimmed copy of
+        the sequence.
+        """
+        if (self._seq is None and self.reading_frame in [2, 3] and
+                not self._sequence_was_corrected):
+            self._sequence_was_corrected = True
+            self._start = self.reading_frame - 1
+        else:
+            super(StoredSeqRecord, self)._correct_seq_based_on_reading_frame()
+
+    def __reduce__(self):
+        state = {
+            'warnings': list(self.warnings),
+            'seq': self.seq,
+            'voucher_code': self.voucher_code,
+            'taxonomy': self.taxonomy,
+            'lineage': self.lineage,
+            'gene_code': self.gene_code,
+            'reading_frame': self.reading_frame,
+            'table': self.table,
+            'accession_number': self.accession_number,
+            '_sequence_was_corrected': self._sequence_was_corrected,
+        }
+        return make_seq_record, (state,)
+
+
+def make_seq_record(state):
+    """Creates a SeqRecordExpanded object from its attributes, without
+    cleaning them again.
+    """
+    seq_record = SeqRecordExpanded.__new__(SeqRecordExpanded)
+    seq_record.__dict__.update(state)
+    return seq_record
+
+
+class MissingSeqRecord(StoredSeqRecord):
+    """Record of missing data for a voucher without a sequence of a gene,
+    as if it had a sequence of ``?`` as long as the other sequences of the
+    gene. Its name is taken from a record of the same voucher for another
+    gene.
+
+    Missing records are only made while a gene block is rendered, and the
+    sequence of ``?`` only when it is read.
+
+    Parameters:
+        seq_record (SeqRecordExpanded): Any record of the voucher.
+        gene_code (str):
+        length (int):           Length of the raw sequences of the gene.
+        reading_frame (int):    Reading frame of the gene.
+        table (int):            Translation table of the gene.
+    """
+    is_missing = True
+
+    def __init__(self, seq_record, gene_code, length, reading_frame, table):
+        super(MissingSeqRecord, self).__init__(
+            None, None, gene_code, seq_record.voucher_code, seq_record.taxonomy,
+            seq_record.lineage, None, reading_frame, table,
+        )
+        self._length = length
+
+    @property
+    def seq(self):
+        if self._seq is not None:
+            return self._seq
+        return Seq('?' * max(self._length - self._start, 0))
+
+    @seq.setter
+    def seq(self, value):
+        self._seq = value
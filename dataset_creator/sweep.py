@@ -0,0 +1,154 @@
+import os
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ordereddict import OrderedDict
+
+from .compression import validate_compression
+from .dataset import Dataset
+from .enums import DatasetFormat
+from .records import RecordStore
+
+
+FILE_EXTENSIONS = {
+    'NEXUS': 'nex',
+    'PHYLIP': 'phy',
+    'FASTA': 'fasta',
+    'GenBankFASTA': 'fasta',
+    'Bankit': 'txt',
+    'TNT': 'tnt',
+    'MEGA': 'meg',
+}
+
+
+class DatasetSweep(object):
+    """Creates datasets for several combinations of options from the same
+    sequence records, as needed for model selection.
+
+    Every option set is validated when the sweep is created, with the same
+    rules as ``Dataset``, so an invalid combination is reported before any
+    dataset is rendered. The records are stored once, and each distinct codon
+    position slice, translation and degeneration is computed once and shared by
+    all the datasets that need it.
+
+    Parameters:
+        seq_records (list):     SeqRecordExpanded objects.
+        option_sets (list):     dicts with keyword arguments for ``Dataset``:
+                                ``format``, ``partitioning``, ``codon_positions``,
+                                ``aminoacids``, ``degenerate`` and ``outgroup``.
+        format (str):           Default format for option sets without one.
+        outgroup (str):         Default outgroup for option sets without one.
+
+    Attributes:
+        datasets (list):        Dataset objects prepared in streaming mode, in
+                                the order of ``option_sets``.
+        checksums (OrderedDict): ``file name: SHA-256`` of the files written by
+                                the last ``write_to_directory``.
+
+    Example::
+
+        sweep = DatasetSweep(seq_records, [
+            {'codon_positions': 'ALL', 'partitioning': 'by gene'},
+            {'codon_positions': 'ALL', 'partitioning': 'by codon position'},
+            {'aminoacids': True},
+        ], format='NEXUS')
+        for options, creator in zip(sweep.option_sets, sweep.render()):
+            print(options, creator.dataset_str)
+        sweep.write_to_directory('datasets')
+    """
+    def __init__(self, seq_records, option_sets, format=None, outgroup=None):
+        self.checksums = OrderedDict()
+        self.option_sets = []
+        for options in option_sets:
+            options = dict(options)
+            options.setdefault('format', format)
+            options.setdefault('outgroup', outgroup)
+            self.option_sets.append(options)
+
+        record_stores = {}
+        sequence_stores = {}
+        self.datasets = []
+        for options in self.option_sets:
+            convert_voucher_codes = options['format'] != DatasetFormat.BANKIT.value
+            if convert_voucher_codes not in record_stores:
+                record_stores[convert_voucher_codes] = RecordStore(
+                    seq_records, convert_voucher_codes=convert_voucher_codes)
+                sequence_stores[convert_voucher_codes] = {}
+            dataset = Dataset(record_stores[convert_voucher_codes], stream=True, **options)
+            dataset._share_sequences(sequence_stores[convert_voucher_codes])
+            self.datasets.append(dataset)
+
+    def _rendering_order(self):
+        """Translation and degeneration trim the sequence of each record to its
+        reading frame, so datasets using codon positions are rendered first.
+        """
+        return sorted(range(len(self.datasets)), key=lambda index: bool(
+            self.datasets[index].aminoacids or self.datasets[index].degenerate
+        ))
+
+    def render(self):
+        """Renders all the datasets.
+
+        Returns:
+            list of Creator objects, with ``dataset_str``, ``extra_dataset_str``
+            and ``warnings``, in the order of ``option_sets``.
+        """
+        creators = [None] * len(self.datasets)
+        for index in self._rendering_order():
+            dataset = self.datasets[index]
+            creators[index] = dataset.as_format(dataset.format)
+        return creators
+
+    def write_to_directory(self, path, compression=None):
+        """Writes each dataset into a file in ``path``, one chunk at a time.
+        PHYLIP datasets get an extra file with their charsets.
+
+        Parameters:
+            path (str):         Directory, created if it does not exist.
+            compression (str):  ``gzip``, ``bz2`` or ``xz`` to compress the
+                                files as they are written.
+
+        Returns:
+            list of file names written, in the order of ``option_sets``. The
+            SHA-256 of the content of every file written, charset files
+            included, is kept in ``checksums``.
+        """
+        validate_compression(compression)
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+        filenames = [None] * len(self.datasets)
+        self.checksums = OrderedDict()
+        for index in self._rendering_order():
+            dataset = self.datasets[index]
+            filename = os.path.join(path, make_filename(self.option_sets[index]))
+            checksums = dataset.save(filename, compression=compression)
+            self.checksums.update(checksums)
+            filenames[index] = list(checksums)[0]
+        return filenames
+
+
+def make_filename(options):
+    """Makes a file name from the options of a dataset.
+
+    Example:
+
+        NEXUS_ALL_by-codon-position.nex
+        PHYLIP_1st-2nd_1st-2nd_3rd_aminoacids.phy
+    """
+    file_format = options.get('format') or 'TNT'
+    parts = [
+        file_format,
+        options.get('codon_positions') or 'ALL',
+        options.get('partitioning') or 'by gene',
+    ]
+    if options.get('aminoacids'):
+        parts.append('aminoacids')
+    if options.get('degenerate'):
+        parts.append('degenerate-{0}'.format(options['degenerate']))
+    if options.get('outgroup'):
+        parts.append('outgroup-{0}'.format(options['outgroup']))
+
+    name = '_'.join(parts).replace(', ', '_').replace(' ', '-')
+    return '{0}.{1}'.format(name, FILE_EXTENSIONS.get(file_format, 'txt'))
@@ -1,25 +1,35 @@
-from .utils import get_seq
+from .utils import join_chunks
+from .utils import strip_chunks
 from .base_dataset import DatasetBlock
 
 
 class TntDatasetBlock(DatasetBlock):
-    def dataset_block(self):
+    def iter_dataset_block(self):
         self.split_data()
-        out = []
-        for block in self._blocks:
+        chunks = (self.convert_block(block) for block in self._iter_blocks())
+        for chunk in strip_chunks(join_chunks(chunks, '\n')):
+            yield chunk
+        yield '\n;\nproc/;'
+
+    def _iter_blocks(self):
+        for block in self.iter_blocks():
             if self.outgroup is not None:
                 block = self.put_outgroup_at_start_of_block(block)
-            out.append(self.convert_to_string(block))
-        return '\n'.join(out).strip() + '\n;\nproc/;'
+            yield block
 
     def put_outgroup_at_start_of_block(self, block):
+        """Moves the record of the outgroup to the start of the block. It is
+        looked up in the block, as it can be a missing record of the gene.
+        """
+        outgroup_sequence = None
         other_sequences = []
-
         for seq_record in block:
-            if seq_record.voucher_code == self.outgroup:
-                outgroup_sequence = seq_record
-            else:
+            if seq_record.voucher_code != self.outgroup:
                 other_sequences.append(seq_record)
+            elif outgroup_sequence is None:
+                outgroup_sequence = seq_record
+        if outgroup_sequence is None:
+            return block
         return [outgroup_sequence] + other_sequences
 
     def convert_to_string(self, block):
@@ -36,32 +46,13 @@ class TntDatasetBlock(DatasetBlock):
             molecule_type = "dna"
 
         out = None
-
-        max_taxon_id = 0
-        for seq_record in block:
-            taxon_id = '{0}_{1}_{2}'.format(seq_record.voucher_code,
-                                            seq_record.taxonomy['genus'],
-                                            seq_record.taxonomy['species'],
-                                            )
-            if len(taxon_id) > max_taxon_id:
-                max_taxon_id = len(taxon_id)
-
-        pad_number = max_taxon_id + 1
-        if pad_number < 55:
-            pad_number = 55
+        pad_number = self.get_pad_number(block)
 
         for seq_record in block:
             if not out:
                 out = '&[{0}]\n'.format(molecule_type, seq_record.gene_code)
-            taxon_id = '{0}_{1}_{2}'.format(seq_record.voucher_code,
-                                            seq_record.taxonomy['genus'],
-                                            seq_record.taxonomy['species'],
-                                            )
-            sequence = get_seq(seq_record, self.codon_positions, self.aminoacids,
-                               self.degenerate)
-            seq = sequence.seq
-            if sequence.warning:
-                self.warnings.append(sequence.warning)
+            taxon_id = self.labels.get_short_label(seq_record)
+            seq = self.get_sequence(seq_record)
 
             out += '{0}{1}\n'.format(taxon_id.ljust(pad_number), seq)
         return out
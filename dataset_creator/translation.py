@@ -0,0 +1,139 @@
+import warnings
+
+from . import matrix
+from .utils import get_reading_frame_seq
+
+
+_codon_lookups = {}
+
+
+def get_codon_lookup(table):
+    """Returns the ``CodonLookup`` of the genetic code ``table``, created once
+    per table.
+    """
+    if table not in _codon_lookups:
+        _codon_lookups[table] = CodonLookup(table)
+    return _codon_lookups[table]
+
+
+class CodonLookup(object):
+    """Codon to aminoacid lookup for a genetic code (NCBI ``table``), used to
+    translate whole gene blocks.
+
+    The 64 unambiguous codons are translated with Biopython when the table is
+    created. Codons with ambiguity codes or missing bases (``NNN``, ``TAR``,
+    ``RAY``...) are translated with Biopython the first time they are found,
+    so the aminoacids are the same as those of ``SeqRecordExpanded.translate``.
+
+    Parameters:
+        table (int):    NCBI code for the translation table.
+
+    Raises:
+        KeyError:       if there is no such translation table.
+    """
+    def __init__(self, table):
+        self.table = table
+        self._codons = {}
+        for codon in matrix.iter_codons():
+            self._codons[codon] = self._translate_codon(codon)
+
+        self._codon_array = None
+        if matrix.is_available():
+            self._codon_array = matrix.numpy.array(
+                [ord(self._codons[codon]) for codon in matrix.iter_codons()],
+                dtype=matrix.numpy.uint8,
+            )
+
+    def _translate_codon(self, codon):
+        from Bio.Seq import Seq
+
+        return str(Seq(codon).translate(table=self.table, gap='-'))
+
+    def get_aminoacid(self, codon):
+        """Translates one uppercase codon.
+
+        Raises:
+            TranslationError:   if the codon is invalid.
+        """
+        try:
+            return self._codons[codon]
+        except KeyError:
+            aa = self._translate_codon(codon)
+            self._codons[codon] = aa
+            return aa
+
+    def translate(self, seq):
+        """Translates a nucleotide sequence, where missing bases are ``N``.
+
+        A trailing partial codon is dropped with the same warning Biopython
+        gives.
+
+        Raises:
+            TranslationError:   if a codon is invalid.
+        """
+        seq = seq.upper()
+        length = len(seq)
+        if length % 3 != 0:
+            from Bio import BiopythonWarning
+
+            warnings.warn(
+                "Partial codon, len(sequence) not a multiple of three. "
+                "Explicitly trim the sequence or add trailing N before "
+                "translation. This may become an error in future.",
+                BiopythonWarning,
+            )
+        length -= length % 3
+
+        if self._codon_array is not None:
+            try:
+                return self._translate_array(seq[:length])
+            except UnicodeEncodeError:
+                pass
+        return ''.join([self.get_aminoacid(seq[index:index + 3])
+                        for index in range(0, length, 3)])
+
+    def _translate_array(self, seq):
+        """Translates all the unambiguous codons at once with NumPy, and the
+        rest one by one.
+        """
+        indexes, unambiguous = matrix.codon_indexes(seq)
+        aminoacids = self._codon_array[indexes]
+        for codon_number in matrix.numpy.flatnonzero(~unambiguous):
+            start = codon_number * 3
+            aminoacids[codon_number] = ord(self.get_aminoacid(seq[start:start + 3]))
+        return aminoacids.tobytes().decode('ascii')
+
+
+def translate_block(seq_records):
+    """Translates the sequences of a gene block, as ``get_seq`` does with
+    ``aminoacids=True``.
+
+    Each sequence is trimmed to its reading frame in the record, as
+    ``SeqRecordExpanded.translate`` does, without changing the record.
+
+    Parameters:
+        seq_records (list):     SeqRecordExpanded objects with reading frame
+                                1, 2 or 3 and a translation table.
+
+    Returns:
+        list of ``(seq, warning)`` tuples. ``seq`` is None if the sequence
+        could not be translated, so ``get_seq`` can raise the error.
+    """
+    from Bio.Data.CodonTable import TranslationError
+
+    translated = []
+    for seq_record in seq_records:
+        try:
+            codon_lookup = get_codon_lookup(seq_record.table)
+            aa = codon_lookup.translate(get_reading_frame_seq(seq_record).replace('?', 'N'))
+        except (KeyError, ValueError, TranslationError):
+            translated.append((None, None))
+            continue
+
+        if '*' in aa:
+            warning = "Gene {0}, sequence {1} contains stop codons '*'".format(
+                seq_record.gene_code, seq_record.voucher_code)
+        else:
+            warning = None
+        translated.append((aa, warning))
+    return translated
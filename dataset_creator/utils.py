@@ -1,15 +1,5 @@
 # -*- coding: UTF-8 -*-
-import six
-if six.PY2:
-    from StringIO import StringIO
-else:
-    from io import StringIO
-
-import os
 from collections import namedtuple
-import uuid
-
-from Bio import AlignIO
 
 from .exceptions import WrongParameterFormat
 
@@ -56,34 +46,138 @@ def get_seq(seq_record, codon_positions, aminoacids=False, degenerate=None):
         return Sequence(seq=str(seq_record.seq), warning=None)
 
 
-def convert_nexus_to_format(dataset_as_nexus, dataset_format):
+def get_seq_length(seq_record, codon_positions, aminoacids=False, degenerate=None):
     """
-    Converts nexus format to Phylip and Fasta using Biopython tools.
+    Computes the length of the sequence that ``get_seq`` would return, using
+    only the length of the raw sequence and its reading frame, so the sequence
+    is not translated, degenerated or split into codon positions.
+
+    Records without a valid reading frame or translation table, or with an
+    unknown degeneration method, are measured by calling ``get_seq`` so that
+    the same errors are raised.
+
+    Parameters:
+        seq_record (SeqRecordExpanded object):
+        codon_positions (str):
+        aminoacids (boolean):
+        degenerate (str):
 
-    :param dataset_as_nexus:
-    :param dataset_format:
-    :return:
+    Returns:
+        int
     """
-    fake_handle = StringIO(dataset_as_nexus)
-    nexus_al = AlignIO.parse(fake_handle, 'nexus')
-    tmp_file = make_random_filename()
-    AlignIO.write(nexus_al, tmp_file, dataset_format)
-    dataset_as_fasta = read_and_delete_tmp_file(tmp_file)
-    return dataset_as_fasta
+    if codon_positions not in [None, '1st', '2nd', '3rd', '1st-2nd', 'ALL']:
+        raise WrongParameterFormat("`codon_positions` argument should be any of the following"
+                                   ": 1st, 2nd, 3rd, 1st-2nd or ALL")
+    needs_get_seq = (
+        seq_record.reading_frame not in [1, 2, 3] or
+        aminoacids and seq_record.table is None or
+        not aminoacids and degenerate and degenerate not in ['S', 'Z', 'SZ', 'normal']
+    )
+    if needs_get_seq:
+        return len(get_seq(seq_record, codon_positions, aminoacids=aminoacids,
+                           degenerate=degenerate).seq)
+
+    length = len(seq_record.seq)
+    if aminoacids or degenerate:
+        # Translation and degeneration trim the start of the sequence only once
+        if not getattr(seq_record, '_sequence_was_corrected', False):
+            length = max(length - seq_record.reading_frame + 1, 0)
+        if aminoacids:
+            return length // 3
+        return length
+
+    if codon_positions in ['1st', '2nd', '3rd', '1st-2nd']:
+        offsets = {1: 0, 2: 2, 3: 1}
+        length = max(length - offsets[seq_record.reading_frame], 0)
+        first = (length + 2) // 3
+        second = (length + 1) // 3
+        if codon_positions == '1st':
+            return first
+        elif codon_positions == '2nd':
+            return second
+        elif codon_positions == '3rd':
+            return length // 3
+        else:
+            return first + second
+    return length
 
 
-def make_random_filename():
-    return '{0}.txt'.format(uuid.uuid4().hex)
+def join_chunks(chunks, separator):
+    """Streaming counterpart of ``separator.join(chunks)``."""
+    for index, chunk in enumerate(chunks):
+        if index > 0:
+            yield separator
+        yield chunk
 
 
-def read_and_delete_tmp_file(filename):
-    with open(filename, "r") as handle:
-        contents = handle.read()
+def strip_chunks(chunks):
+    """Streaming counterpart of ``''.join(chunks).strip()``.
 
-    if os.path.isfile(filename):
-        os.remove(filename)
+    Trailing whitespace of a chunk is held back until we know that more
+    content follows it, so that it can be dropped at the end of the stream.
+    """
+    pending = ''
+    started = False
+    for chunk in chunks:
+        if not started:
+            chunk = chunk.lstrip()
+            if not chunk:
+                continue
+            started = True
+
+        stripped = chunk.rstrip()
+        if stripped:
+            if pending:
+                yield pending
+            yield stripped
+            pending = chunk[len(stripped):]
+        else:
+            pending += chunk
+
+
+def get_reading_frame_seq(seq_record):
+    """Returns the sequence of ``seq_record`` from the start of its reading
+    frame, as ``SeqRecordExpanded.translate`` and ``degenerate`` trim it,
+    without changing the record.
 
-    return contents
+    Records already trimmed by those methods are returned as they are.
+
+    Parameters:
+        seq_record (SeqRecordExpanded):     with reading frame 1, 2 or 3.
+    """
+    seq = str(seq_record.seq)
+    if getattr(seq_record, '_sequence_was_corrected', False):
+        return seq
+    return seq[seq_record.reading_frame - 1:]
+
+
+def make_unique_label(previous_labels, label, last_copies=None):
+    """Appends ``.copy``, ``.copy1``, ``.copy2``... to ``label`` if it is
+    already in ``previous_labels``, as Biopython does for repeated taxon names.
+
+    Parameters:
+        previous_labels:    set or list of the labels already used.
+        label (str):
+        last_copies (dict): optional, ``label: last unique label made from
+                            it``, updated so that repeated labels do not test
+                            every previous copy again. Labels should only be
+                            added to ``previous_labels`` while it is used.
+    """
+    original_label = label
+    if last_copies is not None:
+        label = last_copies.get(original_label, label)
+    while label in previous_labels:
+        label_split = label.split('.')
+        if label_split[-1].startswith('copy'):
+            copy_number = 1
+            if label_split[-1] != 'copy':
+                copy_number = int(label_split[-1][4:]) + 1
+            label = '{0}.copy{1}'.format('.'.join(label_split[:-1]), copy_number)
+        else:
+            label += '.copy'
+    if last_copies is not None:
+        last_copies[original_label] = label
+    return label
 
 
 def make_dataset_header(data, file_format, aminoacids):
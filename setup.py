@@ -42,9 +42,6 @@ setup(
         'Operating System :: POSIX',
         'Programming Language :: Python',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.4',
-        'Programming Language :: Python :: 3.5',
-        'Programming Language :: Python :: 3.6',
         'Programming Language :: Python :: 3.7',
         'Programming Language :: Python :: Implementation :: PyPy',
         'Topic :: Utilities',
@@ -52,15 +49,15 @@ setup(
     keywords=[
         # eg: 'keyword1', 'keyword2', 'keyword3',
     ],
+    python_requires='>=3.7',
     install_requires=required_libs,
     extras_require={
-        # eg:
-        #   'rst': ['docutils>=0.11'],
-        #   ':python_version=="2.6"': ['argparse'],
+        'numpy': ['numpy'],
     },
     entry_points={
         'console_scripts': [
             'dataset_creator = dataset_creator.__main__:main',
+            'dataset-creator = dataset_creator.__main__:main',
         ]
     },
     test_suite='tests',
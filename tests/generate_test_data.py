@@ -1,5 +1,6 @@
 import json
 import os
+import random
 
 from seqrecord_expanded import SeqRecordExpanded
 
@@ -19,3 +20,26 @@ def get_test_data(filename="sample_data.txt"):
                                        reading_frame=i['reading_frame'], table=i['table'])
         append(seq_record)
     return data
+
+
+def make_random_seq_records(number, seed=1, bases='ACGTacgtNRY?-', tables=(1, 2, 5)):
+    """Records of one gene with random sequences of up to 40 ``bases``,
+    reading frames and translation ``tables``.
+    """
+    rng = random.Random(seed)
+    seq_records = []
+    for index in range(number):
+        seq = ''.join(rng.choice(bases) for _ in range(rng.randint(0, 40)))
+        seq_records.append(SeqRecordExpanded(
+            seq, voucher_code='CP100-{0}'.format(index), gene_code='COI',
+            taxonomy={'genus': 'Aus', 'species': 'aus'},
+            reading_frame=rng.choice([1, 2, 3]), table=rng.choice(tables),
+        ))
+    return seq_records
+
+
+def count_translated(transform_block):
+    """Number of records passed to a mock of ``translate_block`` or
+    ``degenerate_block``.
+    """
+    return sum(len(call[0][0]) for call in transform_block.call_args_list)
@@ -0,0 +1,105 @@
+import asyncio
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from dataset_creator import Dataset
+from dataset_creator.aio import iterate_in_executor
+from .generate_test_data import get_test_data
+
+
+class TestIterateInExecutor(unittest.TestCase):
+    def test_items_are_produced_in_the_executor(self):
+        threads = []
+
+        def produce():
+            for item in ['a', 'b']:
+                threads.append(threading.current_thread().name)
+                yield item
+
+        async def consume(executor):
+            return [item async for item in iterate_in_executor(produce(), executor)]
+
+        with ThreadPoolExecutor(1, thread_name_prefix='render') as executor:
+            self.assertEqual(['a', 'b'], asyncio.run(consume(executor)))
+        self.assertTrue(all(name.startswith('render') for name in threads))
+
+    def test_cancelled_iteration_closes_the_iterator(self):
+        closed = threading.Event()
+        started = threading.Event()
+
+        def produce():
+            try:
+                yield 'a'
+                started.set()
+                while True:
+                    yield 'b'
+            finally:
+                closed.set()
+
+        async def consume(executor):
+            async def iterate():
+                async for item in iterate_in_executor(produce(), executor):
+                    await asyncio.sleep(0)
+            task = asyncio.ensure_future(iterate())
+            while not started.is_set():
+                await asyncio.sleep(0.001)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        with ThreadPoolExecutor(1) as executor:
+            asyncio.run(consume(executor))
+        self.assertTrue(closed.wait(1))
+
+    def test_closed_iteration_closes_the_iterator(self):
+        closed = threading.Event()
+
+        def produce():
+            try:
+                while True:
+                    yield 'a'
+            finally:
+                closed.set()
+
+        async def consume(executor):
+            items = iterate_in_executor(produce(), executor)
+            await items.__anext__()
+            await items.aclose()
+            return closed.is_set()
+
+        with ThreadPoolExecutor(1) as executor:
+            self.assertTrue(asyncio.run(consume(executor)))
+
+
+class TestAsyncDataset(unittest.TestCase):
+    def test_acreate(self):
+        dataset = asyncio.run(Dataset.acreate(get_test_data(), format='TNT',
+                                              aminoacids=True))
+        expected = Dataset(get_test_data(), format='TNT', aminoacids=True)
+        self.assertEqual(expected.dataset_str, dataset.dataset_str)
+
+    def test_aiter_chunks(self):
+        async def render():
+            dataset = await Dataset.acreate(get_test_data(), format='NEXUS', stream=True)
+            chunks = [chunk async for chunk in dataset.aiter_chunks()]
+            return chunks, dataset.warnings
+
+        chunks, warnings = asyncio.run(render())
+        dataset = Dataset(get_test_data(), format='NEXUS', stream=True)
+        self.assertEqual(list(dataset.iter_chunks()), chunks)
+        self.assertEqual(dataset.warnings, warnings)
+
+    def test_concurrent_datasets(self):
+        async def render(file_format):
+            dataset = Dataset(get_test_data(), format=file_format, stream=True, lazy=True)
+            return ''.join([chunk async for chunk in dataset.aiter_chunks()])
+
+        async def render_all():
+            return await asyncio.gather(render('NEXUS'), render('PHYLIP'), render('TNT'))
+
+        for file_format, dataset_str in zip(['NEXUS', 'PHYLIP', 'TNT'], asyncio.run(render_all())):
+            self.assertEqual(Dataset(get_test_data(), format=file_format).dataset_str,
+                             dataset_str)
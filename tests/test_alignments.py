@@ -0,0 +1,114 @@
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+from dataset_creator import Dataset
+from dataset_creator.alignments import AlignmentFile
+from dataset_creator.alignments import AlignmentSeqRecord
+from dataset_creator.alignments import load_alignment_files
+from .generate_test_data import get_test_data
+
+
+class TestAlignments(unittest.TestCase):
+    def setUp(self):
+        self.maxDiff = None
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+
+        self.alignment_files = {}
+        self.metadata = {}
+        for seq_record in get_test_data():
+            self.metadata[seq_record.voucher_code] = seq_record.taxonomy
+            gene = self.alignment_files.setdefault(seq_record.gene_code, {
+                'path': os.path.join(self.path, seq_record.gene_code + '.fasta'),
+                'reading_frame': seq_record.reading_frame,
+                'table': seq_record.table,
+            })
+            seq = str(seq_record.seq)
+            with open(gene['path'], 'a') as handle:
+                handle.write('>{0} some description\n'.format(seq_record.voucher_code))
+                for index in range(0, len(seq), 60):
+                    handle.write(seq[index:index + 60] + '\n')
+
+    def test_fasta_file(self):
+        path = os.path.join(self.path, 'gene.fasta')
+        with open(path, 'w') as handle:
+            handle.write('>CP100-10 Aus aus\nACGT\nAC\r\n>CP100-11\n\n>CP100-12\nTTT')
+        alignment_file = AlignmentFile(path)
+        self.assertEqual(['CP100-10', 'CP100-11', 'CP100-12'], alignment_file.ids)
+        self.assertEqual('ACGTAC', alignment_file.get_sequence('CP100-10'))
+        self.assertEqual('', alignment_file.get_sequence('CP100-11'))
+        self.assertEqual('TTT', alignment_file.get_sequence('CP100-12'))
+
+    def test_fasta_file_with_repeated_ids(self):
+        path = os.path.join(self.path, 'gene.fasta')
+        with open(path, 'w') as handle:
+            handle.write('\n>CP100-10\nACG\n>CP100-11\nTT\n>CP100-10\nT A\nA\n')
+        with self.assertRaisesRegex(ValueError, "'CP100-10' is repeated in .*gene.fasta"):
+            AlignmentFile(path)
+
+    def test_close(self):
+        path = os.path.join(self.path, 'gene.fasta')
+        with open(path, 'w') as handle:
+            handle.write('>CP100-10\nACGT\n')
+        with AlignmentFile(path) as alignment_file:
+            seq_record = AlignmentSeqRecord(alignment_file, 'CP100-10', voucher_code='CP100-10',
+                                            gene_code='COI', reading_frame=2, table=1)
+            self.assertEqual('ACGT', str(seq_record.seq))
+            self.assertEqual('CP100-10', seq_record.voucher_code)
+            self.assertEqual([], seq_record.warnings)
+        self.assertRaises(ValueError, alignment_file.get_sequence, 'CP100-10')
+
+    def test_nexus_file(self):
+        path = os.path.join(self.path, 'gene.nex')
+        with open(path, 'w') as handle:
+            handle.write('#NEXUS\n\nBEGIN DATA;\nDIMENSIONS NTAX=2 NCHAR=6;\nMATRIX\n'
+                         '[gene]\nCP100_10   ACG\nCP100_11   TT?\n\nCP100_10   TAA\n'
+                         'CP100_11   ---\n;\nEND;\n')
+        alignment_file = AlignmentFile(path)
+        self.assertEqual(['CP100_10', 'CP100_11'], alignment_file.ids)
+        self.assertEqual('ACGTAA', alignment_file.get_sequence('CP100_10'))
+        self.assertEqual('TT?---', alignment_file.get_sequence('CP100_11'))
+
+    def test_empty_file(self):
+        path = os.path.join(self.path, 'empty.fasta')
+        open(path, 'w').close()
+        with AlignmentFile(path) as alignment_file:
+            self.assertEqual(0, len(alignment_file))
+
+    def test_dataset_from_alignment_files(self):
+        for options in [{'format': 'NEXUS'}, {'format': 'PHYLIP', 'aminoacids': True},
+                        {'format': 'TNT', 'degenerate': 'S'},
+                        {'format': 'NEXUS', 'codon_positions': '1st-2nd'}]:
+            expected = Dataset(get_test_data(), **options)
+            result = Dataset.from_alignment_files(self.alignment_files,
+                                                  metadata=self.metadata, **options)
+            self.assertEqual(expected.dataset_str, result.dataset_str)
+
+    def test_dataset_from_alignment_files_with_workers(self):
+        expected = Dataset(get_test_data(), format='NEXUS', aminoacids=True)
+        result = Dataset.from_alignment_files(self.alignment_files, metadata=self.metadata,
+                                              format='NEXUS', aminoacids=True, workers=2)
+        self.assertEqual(expected.dataset_str, result.dataset_str)
+
+    def test_metadata_table(self):
+        path = os.path.join(self.path, 'taxonomy.tsv')
+        with open(path, 'w') as handle:
+            handle.write('voucher_code\tgenus\tspecies\n')
+            for voucher_code, taxonomy in self.metadata.items():
+                handle.write('{0}\t{1}\t{2}\n'.format(voucher_code, taxonomy.get('genus', ''),
+                                                      taxonomy.get('species', '')))
+        expected = Dataset(get_test_data(), format='NEXUS')
+        result = Dataset.from_alignment_files(self.alignment_files, metadata=path,
+                                              format='NEXUS')
+        self.assertEqual(expected.dataset_str, result.dataset_str)
+
+    def test_pickle_record(self):
+        seq_record = load_alignment_files(self.alignment_files, self.metadata)[0]
+        seq_record.reading_frame = 2
+        expected = seq_record.translate()
+        copied = pickle.loads(pickle.dumps(seq_record))
+        self.assertEqual(str(seq_record.seq), str(copied.seq))
+        self.assertEqual(expected, copied.translate())
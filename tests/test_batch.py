@@ -0,0 +1,195 @@
+import contextlib
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from dataset_creator import Dataset
+from dataset_creator.__main__ import main
+from dataset_creator.batch import get_preparation_key
+from dataset_creator.batch import load_manifest
+from dataset_creator.batch import run_jobs
+from .generate_test_data import get_test_data
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+
+        self.alignments = {}
+        metadata = {}
+        for seq_record in get_test_data():
+            metadata[seq_record.voucher_code] = seq_record.taxonomy
+            gene = self.alignments.setdefault(seq_record.gene_code, {
+                'path': seq_record.gene_code + '.fasta',
+                'reading_frame': seq_record.reading_frame,
+                'table': seq_record.table,
+            })
+            with open(os.path.join(self.path, gene['path']), 'a') as handle:
+                handle.write('>{0}\n{1}\n'.format(seq_record.voucher_code, seq_record.seq))
+
+        ranks = sorted(set(rank for taxonomy in metadata.values() for rank in taxonomy))
+        with open(os.path.join(self.path, 'taxonomy.tsv'), 'w') as handle:
+            handle.write('\t'.join(['voucher_code'] + ranks) + '\n')
+            for voucher_code, taxonomy in metadata.items():
+                handle.write('\t'.join([voucher_code] + [taxonomy.get(rank, '')
+                                                         for rank in ranks]) + '\n')
+        self.manifest = {
+            'inputs': {
+                'records': {'alignments': self.alignments, 'metadata': 'taxonomy.tsv'},
+            },
+            'output_directory': 'datasets',
+            'jobs': [
+                {'input': 'records', 'format': 'NEXUS', 'outgroup': 'CP100-13'},
+                {'input': 'records', 'format': 'PHYLIP', 'partitioning': '1st-2nd, 3rd',
+                 'compression': 'gzip'},
+                {'input': 'records', 'format': 'TNT', 'aminoacids': True,
+                 'output': 'tnt/aminoacids.tnt'},
+                {'input': 'records', 'format': 'Bankit'},
+            ],
+        }
+
+    def write_manifest(self, manifest):
+        filename = os.path.join(self.path, 'manifest.json')
+        with open(filename, 'w') as handle:
+            json.dump(manifest, handle)
+        return filename
+
+    def get_expected(self, **kwargs):
+        alignments = dict(
+            (gene_code, dict(gene, path=os.path.join(self.path, gene['path'])))
+            for gene_code, gene in self.alignments.items()
+        )
+        return Dataset.from_alignment_files(
+            alignments, metadata=os.path.join(self.path, 'taxonomy.tsv'), **kwargs)
+
+    def test_load_manifest(self):
+        jobs = load_manifest(self.write_manifest(self.manifest))
+        self.assertEqual(4, len(jobs))
+        self.assertEqual(os.path.join(self.path, 'datasets',
+                                      'records_NEXUS_ALL_by-gene_outgroup-CP100-13.nex'),
+                         jobs[0].output)
+        self.assertEqual(os.path.join(self.path, 'tnt', 'aminoacids.tnt'), jobs[2].output)
+        self.assertEqual(os.path.join(self.path, 'COI-begin.fasta'),
+                         jobs[0].input['alignments']['COI-begin']['path'])
+        self.assertEqual({'format': 'PHYLIP', 'partitioning': '1st-2nd, 3rd'}, jobs[1].options)
+        self.assertEqual('gzip', jobs[1].compression)
+
+    def test_generated_outputs(self):
+        self.manifest['jobs'] = [
+            {'input': 'records', 'format': 'NEXUS'},
+            {'input': 'records', 'format': 'NEXUS', 'fill_missing': True},
+            {'input': {'snapshot': 'records.snapshot'}, 'format': 'NEXUS'},
+        ]
+        jobs = load_manifest(self.write_manifest(self.manifest))
+        self.assertEqual(['records_NEXUS_ALL_by-gene.nex',
+                          'records_NEXUS_ALL_by-gene_fill-missing.nex',
+                          'job3_NEXUS_ALL_by-gene.nex'],
+                         [os.path.basename(job.output) for job in jobs])
+
+    def test_repeated_outputs(self):
+        for jobs in [
+            [{'input': 'records', 'format': 'NEXUS'},
+             {'input': 'records', 'format': 'NEXUS', 'fill_missing': False}],
+            [{'input': 'records', 'format': 'NEXUS'},
+             {'input': 'records', 'format': 'TNT',
+              'output': 'datasets/../datasets/records_NEXUS_ALL_by-gene.nex'}],
+            [{'input': 'records', 'format': 'NEXUS', 'output': 'a.nex', 'compression': 'gzip'},
+             {'input': 'records', 'format': 'NEXUS', 'output': 'a.nex.gz'}],
+        ]:
+            manifest = dict(self.manifest, jobs=jobs)
+            with self.assertRaisesRegex(ValueError, 'Jobs 1 and 2 write the same file'):
+                load_manifest(self.write_manifest(manifest))
+
+    def test_preparation_keys(self):
+        jobs = load_manifest(self.write_manifest(self.manifest))
+        self.assertEqual(get_preparation_key(jobs[0]), get_preparation_key(jobs[1]))
+        self.assertNotEqual(get_preparation_key(jobs[0]), get_preparation_key(jobs[2]))
+        self.assertNotEqual(get_preparation_key(jobs[0]), get_preparation_key(jobs[3]))
+
+    def test_invalid_manifests(self):
+        for jobs in [
+            [{'input': 'records'}],
+            [{'input': 'records', 'format': 'NEXUS', 'codons': '1st'}],
+            [{'input': 'records', 'format': 'NEXUS', 'compression': 'zip'}],
+            [{'input': 'other', 'format': 'NEXUS'}],
+            [{'input': {'snapshot': 'records.snapshot', 'metadata': 'taxonomy.tsv'},
+              'format': 'NEXUS'}],
+        ]:
+            manifest = dict(self.manifest, jobs=jobs)
+            self.assertRaises(ValueError, load_manifest, self.write_manifest(manifest))
+        del self.manifest['output_directory']
+        self.assertRaises(ValueError, load_manifest, self.write_manifest(self.manifest))
+
+    def test_run_jobs(self):
+        for workers in [1, 2]:
+            results = run_jobs(load_manifest(self.write_manifest(self.manifest)),
+                               workers=workers)
+            self.assertEqual([None] * 4, [result.error for result in results])
+
+            nexus, phylip, tnt, bankit = results
+            self.assertIsNotNone(nexus.prepare_seconds)
+            self.assertEqual(nexus.prepare_seconds, phylip.prepare_seconds)
+            self.assertIsNone(tnt.prepare_seconds)
+            self.assertIn('sort_seq_records', nexus.timings)
+
+            expected = self.get_expected(format='NEXUS', outgroup='CP100-13')
+            with open(nexus.job.output) as handle:
+                self.assertEqual(expected.dataset_str, handle.read())
+            expected = self.get_expected(format='PHYLIP', partitioning='1st-2nd, 3rd')
+            self.assertEqual([phylip.job.output + '.gz', phylip.job.output + '.charsets.txt.gz'],
+                             list(phylip.checksums))
+            with gzip.open(phylip.job.output + '.gz', 'rt') as handle:
+                self.assertEqual(expected.dataset_str, handle.read())
+            expected = self.get_expected(format='TNT', aminoacids=True)
+            with open(tnt.job.output) as handle:
+                self.assertEqual(expected.dataset_str, handle.read())
+            expected = self.get_expected(format='Bankit')
+            with open(bankit.job.output) as handle:
+                self.assertEqual(expected.dataset_str, handle.read())
+
+    def test_snapshot_input(self):
+        filename = os.path.join(self.path, 'records.snapshot')
+        self.get_expected(format='NEXUS', codon_positions='1st').save_prepared(filename)
+        self.manifest['inputs']['records'] = {'snapshot': 'records.snapshot'}
+        self.manifest['jobs'] = [{'input': 'records', 'format': 'FASTA'},
+                                 {'input': 'records', 'format': 'NEXUS', 'aminoacids': True}]
+        fasta, nexus = run_jobs(load_manifest(self.write_manifest(self.manifest)), workers=1)
+        self.assertIsNone(fasta.error)
+        with open(fasta.job.output) as handle:
+            self.assertEqual(self.get_expected(format='FASTA', codon_positions='1st').dataset_str,
+                             handle.read())
+        self.assertIn('ValueError', nexus.error)
+
+    def test_failed_jobs(self):
+        self.manifest['jobs'][0]['outgroup'] = 'CP100-99'
+        self.manifest['jobs'][2]['degenerate'] = 'S'
+        self.manifest['jobs'][2]['partitioning'] = 'by codon position'
+        results = run_jobs(load_manifest(self.write_manifest(self.manifest)), workers=1)
+        self.assertIn("outgroup 'CP100_99' cannot be found", results[0].error)
+        self.assertIsNone(results[1].error)
+        self.assertIn('Cannot degenerate', results[2].error)
+        self.assertFalse(os.path.exists(results[0].job.output))
+
+    def test_main(self):
+        report = os.path.join(self.path, 'report.json')
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            status = main([self.write_manifest(self.manifest), '--workers', '1',
+                           '--report', report])
+        self.assertEqual(0, status)
+        self.assertIn('4 jobs, 0 failed', output.getvalue())
+        with open(report) as handle:
+            self.assertEqual(5, sum(len(job['files']) for job in json.load(handle)))
+
+        self.manifest['jobs'][0]['outgroup'] = 'CP100-99'
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(1, main([self.write_manifest(self.manifest), '-w', '1']))
+
+        with contextlib.redirect_stderr(io.StringIO()) as errors:
+            self.assertEqual(2, main([os.path.join(self.path, 'taxonomy.tsv')]))
+        self.assertIn('not valid JSON', errors.getvalue())
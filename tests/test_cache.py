@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from seqrecord_expanded import SeqRecordExpanded
+
+from dataset_creator import Dataset
+from dataset_creator.cache import BlockCache
+from .generate_test_data import get_test_data
+
+
+class TestBlockCache(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_get_and_put(self):
+        cache = BlockCache(self.path)
+        self.assertIsNone(cache.get('abc'))
+        cache.put('abc', '[COI]\nCP100_10   ACGT\r\n')
+        self.assertEqual('[COI]\nCP100_10   ACGT\r\n', cache.get('abc'))
+        self.assertEqual(1, len(BlockCache(self.path)))
+
+    def test_warnings_are_stored_with_the_block(self):
+        cache = BlockCache(self.path)
+        cache.put('abc', 'block', [[1, 'stop codon']])
+        entry = BlockCache(self.path).get_entry('abc')
+        self.assertEqual('block', entry.value)
+        self.assertEqual([[1, 'stop codon']], entry.warnings)
+
+    def test_least_recently_used_blocks_are_evicted(self):
+        # each file has 3 bytes of warnings and 10 of block
+        cache = BlockCache(self.path, max_bytes=30)
+        cache.put('first', 'a' * 10)
+        cache.put('second', 'b' * 10)
+        cache._entries['first'][1] += 10  # read after second
+        cache.put('third', 'c' * 10)
+        self.assertIn('first', cache)
+        self.assertNotIn('second', cache)
+        self.assertIn('third', cache)
+        self.assertEqual(26, cache.size)
+        self.assertEqual(['first.block', 'third.block'], sorted(os.listdir(self.path)))
+
+    def test_clear(self):
+        cache = BlockCache(self.path)
+        cache.put('first', 'a')
+        cache.clear()
+        self.assertEqual([], os.listdir(self.path))
+        self.assertEqual(0, cache.size)
+
+    def test_key_depends_on_records_and_options(self):
+        cache = BlockCache(self.path)
+        block = [seq_record for seq_record in get_test_data() if seq_record.gene_code == 'ef1a']
+        key = cache.make_key('block', block, ['NEXUS', 'ALL'])
+        self.assertEqual(key, cache.make_key('block', block, ['NEXUS', 'ALL']))
+        self.assertNotEqual(key, cache.make_key('block', block, ['NEXUS', '1st']))
+        self.assertNotEqual(key, cache.make_key('block', block[1:], ['NEXUS', 'ALL']))
+
+        block[0].taxonomy['genus'] = 'Xus'
+        self.assertNotEqual(key, cache.make_key('block', block, ['NEXUS', 'ALL']))
+
+
+class TestDatasetWithBlockCache(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_cached_datasets_are_identical(self):
+        for file_format in ['NEXUS', 'PHYLIP', 'FASTA', 'TNT', 'MEGA', 'GenBankFASTA']:
+            for options in [{}, {'aminoacids': True}, {'codon_positions': '1st'}]:
+                expected = Dataset(get_test_data(), format=file_format, **options)
+                for run in range(2):
+                    dataset = Dataset(get_test_data(), format=file_format,
+                                      block_cache=BlockCache(self.path), **options)
+                    self.assertEqual(expected.dataset_str, dataset.dataset_str,
+                                     (file_format, options, run))
+
+    def test_blocks_are_reused(self):
+        Dataset(get_test_data(), format='NEXUS', block_cache=BlockCache(self.path))
+        dataset = Dataset(get_test_data(), format='NEXUS', block_cache=BlockCache(self.path),
+                          profile=True)
+        self.assertEqual({'cache_hits': 7}, dataset.profiler.counts)
+
+    def test_changed_genes_are_rendered(self):
+        Dataset(get_test_data(), format='TNT', block_cache=BlockCache(self.path))
+        seq_records = get_test_data()
+        seq_records[0].taxonomy['species'] = 'cus'
+        dataset = Dataset(seq_records, format='TNT', block_cache=BlockCache(self.path),
+                          profile=True)
+        self.assertEqual({'cache_hits': 6, 'cache_misses': 1, 'get_seq': 10},
+                         dataset.profiler.counts)
+
+        seq_records = get_test_data()
+        seq_records[0].taxonomy['species'] = 'cus'
+        self.assertEqual(Dataset(seq_records, format='TNT').dataset_str, dataset.dataset_str)
+
+    def test_warnings_of_cached_blocks(self):
+        def get_seq_records():
+            seq_records = get_test_data()
+            seq_records.append(SeqRecordExpanded('TAATAGTGA', voucher_code='CP100-20',
+                                                 gene_code='ArgKin', reading_frame=1, table=1))
+            seq_records.append(SeqRecordExpanded('ATGTAAATG', voucher_code='CP100-21',
+                                                 gene_code='wingless', reading_frame=1, table=1))
+            return seq_records
+
+        for file_format in ['NEXUS', 'TNT']:
+            expected = Dataset(get_seq_records(), format=file_format, aminoacids=True).warnings
+            self.assertEqual(2, len(expected))
+            for run in ['cold', 'warm']:
+                dataset = Dataset(get_seq_records(), format=file_format, aminoacids=True,
+                                  block_cache=BlockCache(self.path))
+                self.assertEqual(expected, dataset.warnings, (file_format, run))
+                self.assertEqual(expected, dataset.as_format('NEXUS').warnings)
@@ -0,0 +1,107 @@
+import bz2
+import gzip
+import hashlib
+import io
+import lzma
+import os
+import shutil
+import tempfile
+import unittest
+
+from seqrecord_expanded import SeqRecordExpanded
+
+from dataset_creator import Dataset
+from dataset_creator.compression import ChecksumWriter
+from dataset_creator.sweep import DatasetSweep
+from .generate_test_data import get_test_data
+
+
+DECOMPRESS = {
+    None: lambda data: data,
+    'gzip': gzip.decompress,
+    'bz2': bz2.decompress,
+    'xz': lzma.decompress,
+}
+
+
+def sha256(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class TestChecksumWriter(unittest.TestCase):
+    def test_compressions(self):
+        for compression in ['gzip', 'bz2', 'xz']:
+            fileobj = io.BytesIO()
+            with ChecksumWriter(fileobj, compression=compression) as writer:
+                writer.write('#NEXUS\n')
+                writer.write('CP100_10_Aus_bus   ACGT\n')
+            self.assertEqual(b'#NEXUS\nCP100_10_Aus_bus   ACGT\n',
+                             DECOMPRESS[compression](fileobj.getvalue()))
+            self.assertEqual(sha256('#NEXUS\nCP100_10_Aus_bus   ACGT\n'), writer.hexdigest())
+            self.assertEqual(31, writer.number_bytes)
+
+    def test_failed_writes_are_not_ended(self):
+        fileobj = io.BytesIO()
+        with self.assertRaises(RuntimeError):
+            with ChecksumWriter(fileobj, compression='gzip') as writer:
+                writer.write('#NEXUS\n' * 1000)
+                raise RuntimeError()
+        self.assertRaises(EOFError, gzip.decompress, fileobj.getvalue())
+
+    def test_unknown_compression(self):
+        self.assertRaises(ValueError, ChecksumWriter, io.BytesIO(), compression='zip')
+
+
+class TestDatasetCompression(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_write_to(self):
+        expected = Dataset(get_test_data(), format='NEXUS').dataset_str
+        for compression in [None, 'gzip', 'bz2', 'xz']:
+            dataset = Dataset(get_test_data(), format='NEXUS', stream=True)
+            fileobj = io.StringIO() if compression is None else io.BytesIO()
+            checksum = dataset.write_to(fileobj, compression=compression)
+            self.assertEqual(sha256(expected), checksum)
+            if compression is not None:
+                self.assertEqual(expected, DECOMPRESS[compression](fileobj.getvalue()).decode())
+
+    def test_save_phylip(self):
+        expected = Dataset(get_test_data(), format='PHYLIP')
+        dataset = Dataset(get_test_data(), format='PHYLIP', stream=True)
+        filename = os.path.join(self.path, 'dataset.phy')
+        checksums = dataset.save(filename + '.xz', compression='xz')
+        self.assertEqual([filename + '.xz', filename + '.charsets.txt.xz'], list(checksums))
+        with lzma.open(filename + '.xz', 'rt', newline='') as handle:
+            self.assertEqual(expected.dataset_str, handle.read())
+        with lzma.open(filename + '.charsets.txt.xz', 'rt', newline='') as handle:
+            self.assertEqual(expected.extra_dataset_str, handle.read())
+        self.assertEqual([sha256(expected.dataset_str), sha256(expected.extra_dataset_str)],
+                         list(checksums.values()))
+
+    def test_save_without_compression(self):
+        dataset = Dataset(get_test_data(), format='TNT')
+        filename = os.path.join(self.path, 'dataset.tnt')
+        checksums = dataset.save(filename)
+        with open(filename, 'rb') as handle:
+            self.assertEqual(hashlib.sha256(handle.read()).hexdigest(), checksums[filename])
+
+    def test_failed_save_leaves_no_file(self):
+        seq_records = get_test_data()
+        seq_records.append(SeqRecordExpanded('ACGT', voucher_code='CP100-20', gene_code='ArgKin',
+                                             reading_frame=1, table=1))
+        dataset = Dataset(seq_records, format='PHYLIP', stream=True)
+        self.assertRaises(ValueError, dataset.save, os.path.join(self.path, 'dataset.phy'),
+                          compression='gzip')
+        self.assertEqual([], os.listdir(self.path))
+
+    def test_sweep(self):
+        sweep = DatasetSweep(get_test_data(), [{'format': 'NEXUS'}, {'format': 'PHYLIP'}])
+        filenames = sweep.write_to_directory(self.path, compression='bz2')
+        self.assertTrue(all(filename.endswith('.bz2') for filename in filenames))
+        self.assertEqual(3, len(sweep.checksums))
+        self.assertEqual(sorted(os.listdir(self.path)),
+                         sorted(os.path.basename(filename) for filename in sweep.checksums))
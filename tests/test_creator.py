@@ -1,5 +1,6 @@
 import unittest
 from copy import copy
+from unittest import mock
 
 from .data import test_data
 from dataset_creator.dataset import Dataset
@@ -14,6 +15,14 @@ class TestCreator(unittest.TestCase):
     def tearDown(self):
         self.test_data = None
 
+    def test_phylip_charsets_are_created_once(self):
+        dataset = Dataset(self.test_data, format='PHYLIP', partitioning='by gene')
+        with mock.patch.object(Creator, 'create_extra_dataset_file', autospec=True,
+                               side_effect=Creator.create_extra_dataset_file) as method:
+            creator = Creator(dataset.data, format='PHYLIP')
+        self.assertEqual(1, method.call_count)
+        self.assertEqual(dataset.extra_dataset_str, creator.extra_dataset_str)
+
     def test_nexus_header(self):
         dataset = Dataset(self.test_data, format='NEXUS', partitioning='by gene')
         creator = Creator(dataset.data, format='NEXUS')
@@ -1,12 +1,17 @@
+import io
 import json
 import os
 import unittest
 from copy import copy
+from unittest import mock
 
 from seqrecord_expanded import SeqRecordExpanded
 
 from dataset_creator import Dataset
+from dataset_creator.degeneration import degenerate_block
+from dataset_creator.translation import translate_block
 from .data import test_data
+from .generate_test_data import count_translated
 from .generate_test_data import get_test_data
 
 
@@ -218,3 +223,161 @@ class TestDataset(unittest.TestCase):
         expected = 'outgroup CP100_19_Aus_jus;'
         result = dataset.dataset_str
         self.assertTrue(expected in result)
+
+    def test_streaming_dataset_is_identical_to_dataset_str(self):
+        options = [
+            {'format': 'NEXUS'},
+            {'format': 'NEXUS', 'partitioning': 'by codon position', 'outgroup': 'CP100-19'},
+            {'format': 'PHYLIP'},
+            {'format': 'FASTA'},
+            {'format': 'FASTA', 'partitioning': '1st-2nd, 3rd'},
+            {'format': 'TNT', 'outgroup': 'CP100-19'},
+            {'format': 'MEGA'},
+            {'format': 'GenBankFASTA'},
+            {'format': 'Bankit'},
+        ]
+        for kwargs in options:
+            expected = Dataset(get_test_data(), **kwargs).dataset_str
+            dataset = Dataset(get_test_data(), stream=True, **kwargs)
+            self.assertIsNone(dataset.dataset_str)
+            self.assertEqual(expected, ''.join(dataset.iter_chunks()))
+
+    def test_streaming_yields_one_chunk_per_gene(self):
+        dataset = Dataset(self.test_data, format='NEXUS', stream=True)
+        chunks = list(dataset.iter_chunks())
+        gene_chunks = [chunk for chunk in chunks if chunk.startswith('[')]
+        self.assertEqual(dataset.gene_codes,
+                         [chunk.split(']')[0][1:] for chunk in gene_chunks])
+
+    def test_write_to(self):
+        expected = Dataset(get_test_data(), format='NEXUS').dataset_str
+        dataset = Dataset(get_test_data(), format='NEXUS', stream=True)
+        handle = io.StringIO()
+        dataset.write_to(handle)
+        self.assertEqual(expected, handle.getvalue())
+
+    def test_sequences_are_translated_once(self):
+        test_data = get_test_data()
+        with mock.patch('dataset_creator.translation.translate_block',
+                        side_effect=translate_block) as translate:
+            Dataset(test_data, format='NEXUS', aminoacids=True)
+        self.assertEqual(len(test_data), count_translated(translate))
+
+    def test_sequences_are_degenerated_once(self):
+        test_data = get_test_data()
+        with mock.patch('dataset_creator.degeneration.degenerate_block',
+                        side_effect=degenerate_block) as degenerate:
+            Dataset(test_data, format='TNT', degenerate='S')
+        self.assertEqual(len(test_data), count_translated(degenerate))
+
+    def test_dimensions_without_rendering(self):
+        expected = Dataset(get_test_data(), format='NEXUS', aminoacids=True)
+        with mock.patch('dataset_creator.translation.translate_block',
+                        side_effect=translate_block) as translate:
+            dataset = Dataset(get_test_data(), format='NEXUS', aminoacids=True, stream=True)
+        self.assertEqual(0, translate.call_count)
+        self.assertEqual(expected.number_chars, dataset.number_chars)
+        self.assertEqual(expected.number_taxa, dataset.number_taxa)
+
+    def test_make_charset_block(self):
+        dataset = Dataset(get_test_data(), format='NEXUS', partitioning='by codon position',
+                          stream=True)
+        self.assertIn(dataset.make_charset_block(),
+                      Dataset(get_test_data(), format='NEXUS',
+                              partitioning='by codon position').dataset_str)
+
+    def test_make_charset_block_phylip(self):
+        expected = Dataset(get_test_data(), format='PHYLIP').extra_dataset_str
+        dataset = Dataset(get_test_data(), format='PHYLIP', stream=True)
+        self.assertEqual(expected, dataset.make_charset_block())
+
+    def test_as_format(self):
+        dataset = Dataset(get_test_data(), format='NEXUS', partitioning='by codon position',
+                          stream=True)
+        for file_format in ['NEXUS', 'PHYLIP', 'FASTA', 'TNT', 'GenBankFASTA']:
+            expected = Dataset(get_test_data(), format=file_format,
+                               partitioning='by codon position')
+            result = dataset.as_format(file_format)
+            self.assertEqual(expected.dataset_str, result.dataset_str)
+            self.assertEqual(expected.extra_dataset_str, result.extra_dataset_str)
+
+    def test_as_format_transforms_sequences_once(self):
+        test_data = get_test_data()
+        with mock.patch('dataset_creator.translation.translate_block',
+                        side_effect=translate_block) as translate:
+            dataset = Dataset(test_data, format='NEXUS', aminoacids=True)
+            dataset.as_format('PHYLIP')
+            dataset.as_format('TNT')
+        self.assertEqual(len(test_data), count_translated(translate))
+
+    def test_as_format_invalid(self):
+        dataset = Dataset(get_test_data(), format='NEXUS', partitioning='1st-2nd, 3rd')
+        self.assertRaises(ValueError, dataset.as_format, 'MEGA')
+        self.assertRaises(ValueError, dataset.as_format, 'Bankit')
+
+    def test_workers(self):
+        for file_format in ['NEXUS', 'PHYLIP', 'TNT', 'MEGA', 'GenBankFASTA']:
+            for options in [{'aminoacids': True}, {'degenerate': 'S'},
+                            {'codon_positions': '1st-2nd'}]:
+                expected = Dataset(get_test_data(), format=file_format, outgroup='CP100-11',
+                                   **options)
+                dataset = Dataset(get_test_data(), format=file_format, outgroup='CP100-11',
+                                  workers=2, **options)
+                self.assertEqual(expected.dataset_str, dataset.dataset_str)
+                self.assertEqual(expected.warnings, dataset.warnings)
+
+    def test_workers_streaming(self):
+        expected = Dataset(get_test_data(), format='NEXUS', aminoacids=True)
+        dataset = Dataset(get_test_data(), format='NEXUS', aminoacids=True, stream=True,
+                          workers=2)
+        self.assertEqual(expected.dataset_str, ''.join(dataset.iter_chunks()))
+        self.assertEqual(expected.warnings, dataset.warnings)
+
+    def test_workers_merge_warnings_in_order(self):
+        def make_seq_records():
+            seq_records = []
+            for gene_code in ['ArgKin', 'wingless']:
+                for voucher_code in ['CP100-10', 'CP100-11', 'CP100-12']:
+                    seq_records.append(SeqRecordExpanded(
+                        'ATGTAAATGTGA', voucher_code=voucher_code, gene_code=gene_code,
+                        taxonomy={'genus': 'Aus', 'species': 'aus'}, reading_frame=1,
+                        table=1,
+                    ))
+            return seq_records
+
+        expected = Dataset(make_seq_records(), format='TNT', aminoacids=True,
+                           outgroup='CP100-12')
+        dataset = Dataset(make_seq_records(), format='TNT', aminoacids=True,
+                          outgroup='CP100-12', workers=2)
+        self.assertEqual(6, len(dataset.warnings))
+        self.assertEqual(expected.warnings, dataset.warnings)
+        self.assertEqual(expected.dataset_str, dataset.dataset_str)
+
+    def test_lazy_dataset(self):
+        with mock.patch.object(Dataset, 'sort_seq_records') as sort_seq_records:
+            Dataset(get_test_data(), format='NEXUS', lazy=True)
+        self.assertEqual(0, sort_seq_records.call_count)
+
+        expected = Dataset(get_test_data(), format='NEXUS', aminoacids=True)
+        dataset = Dataset(get_test_data(), format='NEXUS', aminoacids=True, lazy=True)
+        self.assertEqual(expected.number_chars, dataset.number_chars)
+        self.assertEqual(expected.number_taxa, dataset.number_taxa)
+        self.assertEqual(expected.gene_codes, dataset.gene_codes)
+        self.assertEqual(expected.dataset_str, dataset.dataset_str)
+        self.assertEqual(expected.extra_dataset_str, dataset.extra_dataset_str)
+        self.assertEqual(expected.warnings, dataset.warnings)
+
+    def test_lazy_dataset_validates_parameters(self):
+        self.assertRaises(ValueError, Dataset, get_test_data(), format='NEXUS',
+                          outgroup='CP100-99', lazy=True)
+        self.assertRaises(AttributeError, Dataset, get_test_data(), format='NEXUS',
+                          partitioning='by gen', lazy=True)
+        dataset = Dataset(get_test_data(), format='NEXUS', outgroup='CP100-19', lazy=True)
+        self.assertIn('outgroup CP100_19_Aus_jus;', dataset.dataset_str)
+
+    def test_lazy_extra_dataset_str_does_not_render_matrix(self):
+        expected = Dataset(get_test_data(), format='PHYLIP').extra_dataset_str
+        dataset = Dataset(get_test_data(), format='PHYLIP', lazy=True)
+        with mock.patch('dataset_creator.dataset.Creator') as creator:
+            self.assertEqual(expected, dataset.extra_dataset_str)
+        self.assertEqual(0, creator.call_count)
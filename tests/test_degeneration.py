@@ -0,0 +1,31 @@
+import unittest
+from unittest import mock
+
+from dataset_creator import matrix
+from dataset_creator.degeneration import CodonDegeneration
+from dataset_creator.degeneration import degenerate_block
+from .generate_test_data import make_random_seq_records
+
+
+def make_seq_records(number, seed=1):
+    return make_random_seq_records(number, seed=seed, bases='ACGTacgtNRYK?-', tables=(1, 5))
+
+
+class TestDegeneration(unittest.TestCase):
+    def test_degenerate_block(self):
+        for method in ['S', 'Z', 'SZ', 'normal']:
+            expected = [seq_record.degenerate(method) for seq_record in make_seq_records(200)]
+            result = degenerate_block(make_seq_records(200), method)
+            self.assertEqual(expected, [seq for seq, warning in result])
+
+    def test_degenerate_without_numpy(self):
+        for method in ['S', 'Z', 'SZ', 'normal']:
+            expected = [seq_record.degenerate(method) for seq_record in make_seq_records(50)]
+            seq_records = make_seq_records(50)
+            for seq_record in seq_records:
+                seq_record._correct_seq_based_on_reading_frame()
+            with mock.patch.object(matrix, 'numpy', None):
+                codon_degeneration = CodonDegeneration(method)
+                result = [codon_degeneration.degenerate(str(seq_record.seq))
+                          for seq_record in seq_records]
+            self.assertEqual(expected, result)
@@ -0,0 +1,94 @@
+import unittest
+
+from seqrecord_expanded import SeqRecordExpanded
+
+from dataset_creator import Dataset
+from dataset_creator.incremental import IncrementalDataset
+from .generate_test_data import get_test_data
+
+
+def remove_records(seq_records, cells):
+    return [seq_record for seq_record in seq_records
+            if (seq_record.gene_code, seq_record.voucher_code) not in cells]
+
+
+def add_missing_records(seq_records, cells):
+    """Adds the records of ``?`` that ``fill_missing`` leaves implicit."""
+    by_gene = dict((seq_record.gene_code, seq_record) for seq_record in seq_records)
+    by_voucher = dict((seq_record.voucher_code, seq_record) for seq_record in seq_records)
+    for gene_code, voucher_code in cells:
+        gene_record = by_gene[gene_code]
+        seq_records.append(SeqRecordExpanded(
+            '?' * len(gene_record.seq), voucher_code=voucher_code, gene_code=gene_code,
+            taxonomy=by_voucher[voucher_code].taxonomy,
+            reading_frame=gene_record.reading_frame, table=gene_record.table,
+        ))
+    return seq_records
+
+
+class TestFillMissing(unittest.TestCase):
+    def setUp(self):
+        self.cells = [('ArgKin', 'CP100-10'), ('COI-begin', 'CP100-13'),
+                      ('COI-begin', 'CP100-14'), ('wingless', 'CP100-19')]
+        self.seq_records = remove_records(get_test_data(), self.cells)
+        self.explicit_seq_records = add_missing_records(
+            remove_records(get_test_data(), self.cells), self.cells)
+
+    def test_datasets_are_the_same_as_with_explicit_records(self):
+        for file_format in ['NEXUS', 'PHYLIP', 'FASTA', 'TNT', 'MEGA']:
+            for options in [{}, {'aminoacids': True}, {'codon_positions': '1st'},
+                            {'partitioning': '1st-2nd, 3rd'}, {'outgroup': 'CP100-13'}]:
+                if file_format == 'MEGA' and 'partitioning' in options:
+                    continue
+                dataset = Dataset(self.seq_records, format=file_format, fill_missing=True,
+                                  **options)
+                expected = Dataset(self.explicit_seq_records, format=file_format, **options)
+                self.assertEqual(expected.dataset_str, dataset.dataset_str,
+                                 (file_format, options))
+                self.assertEqual(expected.extra_dataset_str, dataset.extra_dataset_str)
+
+    def test_number_of_taxa(self):
+        dataset = Dataset(self.seq_records, format='NEXUS', fill_missing=True)
+        self.assertEqual('10', dataset.number_taxa)
+        self.assertEqual(10, len(dataset.taxa))
+        self.assertEqual('10', Dataset(self.seq_records, format='NEXUS').number_taxa)
+
+    def test_missing_records_are_not_stored(self):
+        dataset = Dataset(self.seq_records, format='PHYLIP', fill_missing=True)
+        self.assertEqual(len(self.seq_records), len(dataset.seq_records))
+
+    def test_genbank_formats_only_have_existing_records(self):
+        dataset = Dataset(self.seq_records, format='GenBankFASTA', fill_missing=True)
+        self.assertEqual(len(self.seq_records), dataset.dataset_str.count('>'))
+
+    def test_stream_and_workers(self):
+        expected = Dataset(self.explicit_seq_records, format='NEXUS', aminoacids=True)
+        dataset = Dataset(self.seq_records, format='NEXUS', aminoacids=True, fill_missing=True,
+                          stream=True, workers=2)
+        self.assertEqual(expected.dataset_str, ''.join(dataset.iter_chunks()))
+
+    def test_mega_without_fill_missing_needs_the_same_taxa(self):
+        with self.assertRaises(ValueError):
+            Dataset(self.seq_records, format='MEGA').dataset_str
+
+
+class TestIncrementalFillMissing(unittest.TestCase):
+    def test_new_voucher_changes_every_gene(self):
+        cells = [(gene_code, 'CP100-19') for gene_code in
+                 ['ArgKin', 'COI-begin', 'COI_end', 'RpS2', 'RpS5', 'wingless']]
+        seq_records = remove_records(get_test_data(), cells)
+        added = [seq_record for seq_record in seq_records
+                 if seq_record.voucher_code == 'CP100-19']
+        seq_records = [seq_record for seq_record in seq_records
+                       if seq_record.voucher_code != 'CP100-19']
+
+        dataset = IncrementalDataset(seq_records, format='NEXUS', fill_missing=True)
+        self.assertEqual('9', dataset.number_taxa)
+        changed = dataset.update(added=added)
+        self.assertEqual(7, len(changed))
+
+        expected = Dataset(add_missing_records(remove_records(get_test_data(), cells), cells),
+                           format='NEXUS')
+        self.assertEqual(expected.dataset_str, dataset.dataset_str)
+        self.assertEqual(expected.as_format('TNT').dataset_str,
+                         dataset.as_format('TNT').dataset_str)
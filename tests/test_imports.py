@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+import unittest
+
+
+# modules that ``import dataset_creator`` should leave to the code using them
+LAZY_MODULES = [
+    'Bio.Data.CodonTable',
+    'Bio.Seq',
+    'asyncio',
+    'bz2',
+    'concurrent.futures.process',
+    'csv',
+    'degenerate_dna',
+    'json',
+    'lzma',
+    'numpy',
+    'seqrecord_expanded',
+    'dataset_creator.aio',
+    'dataset_creator.alignments',
+    'dataset_creator.bankit',
+    'dataset_creator.compression',
+    'dataset_creator.degeneration',
+    'dataset_creator.fasta',
+    'dataset_creator.genbank_fasta',
+    'dataset_creator.mega',
+    'dataset_creator.snapshot',
+    'dataset_creator.stored_records',
+    'dataset_creator.tnt',
+]
+
+
+def get_imported(code):
+    """Runs ``code`` in a new interpreter and returns which of the
+    ``LAZY_MODULES`` it imported.
+    """
+    code += '\nimport sys\nprint(" ".join(m for m in {0!r} if m in sys.modules))'.format(
+        LAZY_MODULES)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.check_output([sys.executable, '-c', code], cwd=root,
+                                     universal_newlines=True)
+    return output.split()
+
+
+class TestImports(unittest.TestCase):
+    def test_import_is_lazy(self):
+        self.assertEqual([], get_imported('import dataset_creator'))
+
+    def test_modules_are_imported_when_used(self):
+        imported = get_imported(
+            'from dataset_creator import Dataset\n'
+            'from tests.generate_test_data import get_test_data\n'
+            'Dataset(get_test_data(), format="TNT", degenerate="S")\n'
+        )
+        self.assertIn('dataset_creator.tnt', imported)
+        self.assertIn('dataset_creator.degeneration', imported)
+        self.assertNotIn('dataset_creator.mega', imported)
+        self.assertNotIn('asyncio', imported)
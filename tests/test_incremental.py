@@ -0,0 +1,120 @@
+import unittest
+
+from seqrecord_expanded import SeqRecordExpanded
+
+from dataset_creator import Dataset
+from dataset_creator.incremental import IncrementalDataset
+from .generate_test_data import get_test_data
+
+
+def make_new_taxon(gene_codes=None):
+    """Copies the sequences of CP100-10 into a new taxon."""
+    return [
+        SeqRecordExpanded(str(seq_record.seq), voucher_code='CP100-99',
+                          taxonomy={'genus': 'Xus', 'species': 'yus'},
+                          gene_code=seq_record.gene_code,
+                          reading_frame=seq_record.reading_frame, table=seq_record.table)
+        for seq_record in get_test_data()
+        if seq_record.voucher_code == 'CP100-10' and
+        (gene_codes is None or seq_record.gene_code in gene_codes)
+    ]
+
+
+def without(seq_records, voucher_code, gene_codes=None):
+    return [seq_record for seq_record in seq_records
+            if seq_record.voucher_code != voucher_code or
+            (gene_codes is not None and seq_record.gene_code not in gene_codes)]
+
+
+class TestIncrementalDataset(unittest.TestCase):
+    def setUp(self):
+        self.maxDiff = None
+
+    def test_add_taxon(self):
+        for file_format in ['NEXUS', 'PHYLIP', 'FASTA', 'TNT', 'MEGA', 'GenBankFASTA']:
+            dataset = IncrementalDataset(get_test_data(), format=file_format)
+            dataset.update(added=make_new_taxon())
+            expected = Dataset(get_test_data() + make_new_taxon(), format=file_format)
+            self.assertEqual(expected.dataset_str, dataset.dataset_str, file_format)
+            self.assertEqual(expected.extra_dataset_str, dataset.extra_dataset_str)
+
+    def test_remove_taxon(self):
+        dataset = IncrementalDataset(get_test_data(), format='PHYLIP')
+        dataset.update(removed=[seq_record for seq_record in get_test_data()
+                                if seq_record.voucher_code == 'CP100-13'])
+        expected = Dataset(without(get_test_data(), 'CP100-13'), format='PHYLIP')
+        self.assertEqual(expected.dataset_str, dataset.dataset_str)
+        self.assertEqual('9', dataset.number_taxa)
+
+    def test_replace_and_remove_in_some_genes(self):
+        replacement = SeqRecordExpanded('?' * 10, voucher_code='CP100-11',
+                                         taxonomy={'genus': 'Aus', 'species': 'bus'},
+                                         gene_code='COI-begin', reading_frame=1, table=5)
+        dataset = IncrementalDataset(get_test_data(), format='NEXUS',
+                                     codon_positions='1st', partitioning='by codon position')
+        changed = dataset.update(added=[replacement], removed=[('wingless', 'CP100-13')])
+
+        expected = Dataset(
+            without(without(get_test_data(), 'CP100-11', ['COI-begin']), 'CP100-13',
+                    ['wingless']) + [replacement],
+            format='NEXUS', codon_positions='1st', partitioning='by codon position',
+        )
+        self.assertEqual(['wingless', 'COI-begin'], changed)
+        self.assertEqual(expected.dataset_str, dataset.dataset_str)
+        self.assertEqual(expected.number_chars, dataset.number_chars)
+
+    def test_add_gene(self):
+        dataset = IncrementalDataset([seq_record for seq_record in get_test_data()
+                                      if seq_record.gene_code != 'RpS5'],
+                                     format='TNT', aminoacids=True)
+        dataset.update(added=[seq_record for seq_record in get_test_data()
+                              if seq_record.gene_code == 'RpS5'])
+        expected = Dataset(get_test_data(), format='TNT', aminoacids=True)
+        self.assertEqual(expected.dataset_str, dataset.dataset_str)
+        self.assertEqual(expected.gene_codes, dataset.gene_codes)
+
+    def test_only_changed_genes_are_rendered(self):
+        events = []
+        dataset = IncrementalDataset(get_test_data(), format='NEXUS',
+                                     profile_hook=lambda *event: events.append(event))
+        del events[:]
+        dataset.update(added=make_new_taxon(['ef1a']))
+        self.assertEqual(['ef1a'], [name for event, name, value in events if event == 'gene'])
+        self.assertEqual([('count', 'get_seq', 1)],
+                         [event for event in events if event[0] == 'count'])
+
+    def test_as_format_after_update(self):
+        dataset = IncrementalDataset(get_test_data(), format='NEXUS')
+        dataset.as_format('TNT')
+        dataset.update(added=make_new_taxon())
+        expected = Dataset(get_test_data() + make_new_taxon(), format='TNT')
+        self.assertEqual(expected.dataset_str, dataset.as_format('TNT').dataset_str)
+
+    def test_lazy(self):
+        dataset = IncrementalDataset(get_test_data(), format='NEXUS', lazy=True)
+        dataset.update(added=make_new_taxon())
+        expected = Dataset(get_test_data() + make_new_taxon(), format='NEXUS')
+        self.assertEqual(expected.dataset_str, dataset.dataset_str)
+
+    def test_remove_missing_record(self):
+        dataset = IncrementalDataset(get_test_data(), format='NEXUS')
+        dataset_str = dataset.dataset_str
+        self.assertRaises(ValueError, dataset.update, added=make_new_taxon(),
+                          removed=[('COI-begin', 'CP100-99')])
+        self.assertEqual(dataset_str, dataset.dataset_str)
+
+    def test_remove_all_records(self):
+        dataset = IncrementalDataset(get_test_data(), format='NEXUS')
+        self.assertRaises(ValueError, dataset.update, removed=get_test_data())
+
+    def test_remove_outgroup(self):
+        dataset = IncrementalDataset(get_test_data(), format='NEXUS', outgroup='CP100-10')
+        dataset_str = dataset.dataset_str
+        with self.assertRaisesRegex(ValueError, "The given outgroup 'CP100_10' cannot be found"):
+            dataset.update(removed=[seq_record for seq_record in get_test_data()
+                                    if seq_record.voucher_code == 'CP100-10'])
+        self.assertEqual(dataset_str, dataset.dataset_str)
+        self.assertEqual('CP100_10', dataset.outgroup)
+
+        dataset.update(removed=get_test_data()[:1])
+        self.assertIn('CP100_10', dataset.dataset_str)
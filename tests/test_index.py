@@ -0,0 +1,38 @@
+import unittest
+
+from dataset_creator.dataset import Dataset
+from dataset_creator.index import SeqRecordsIndex
+
+from .generate_test_data import get_test_data
+
+
+class TestSeqRecordsIndex(unittest.TestCase):
+    def setUp(self):
+        self.test_data = get_test_data()
+
+    def test_get(self):
+        index = SeqRecordsIndex(self.test_data)
+        seq_record = index.get('wingless', 'CP100-11')
+        self.assertEqual(('wingless', 'CP100-11'), (seq_record.gene_code, seq_record.voucher_code))
+        self.assertIsNone(index.get('wingless', 'CP100-999'))
+        self.assertTrue(('ArgKin', 'CP100-10') in index)
+
+    def test_get_first_seq_record(self):
+        index = SeqRecordsIndex(self.test_data)
+        self.assertEqual('ArgKin', index.get_first_seq_record('CP100-10').gene_code)
+        self.assertIsNone(index.get_first_seq_record('CP100-999'))
+
+    def test_dataset_index(self):
+        dataset = Dataset(self.test_data, format='NEXUS')
+        index = dataset.data.seq_records_index
+        self.assertEqual(len(dataset.seq_records), len(index))
+        self.assertTrue(index.has_voucher_code('CP100_19'))
+        self.assertFalse(index.has_voucher_code('CP100-19'))
+
+    def test_sorting_is_case_insensitive(self):
+        for seq_record in self.test_data:
+            if seq_record.gene_code == 'ef1a':
+                seq_record.gene_code = 'EF1a'
+        dataset = Dataset(self.test_data, format='NEXUS')
+        self.assertEqual(['ArgKin', 'COI-begin', 'COI_end', 'EF1a', 'RpS2', 'RpS5', 'wingless'],
+                         dataset.gene_codes)
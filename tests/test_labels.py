@@ -0,0 +1,73 @@
+import unittest
+
+from seqrecord_expanded import SeqRecordExpanded
+
+from dataset_creator import Dataset
+from dataset_creator.incremental import IncrementalDataset
+from dataset_creator.labels import TaxonLabels
+from dataset_creator.labels import flatten_taxonomy
+from dataset_creator.records import RecordStore
+from .generate_test_data import get_test_data
+
+
+class TestFlattenTaxonomy(unittest.TestCase):
+    def test_flatten_taxonomy(self):
+        taxonomy = {'genus': 'Aus', 'species': 'aus bus', 'orden': 'Lepidoptera',
+                    'country': ''}
+        self.assertEqual('_Lepidoptera_Aus_aus_bus', flatten_taxonomy(taxonomy))
+        self.assertEqual('', flatten_taxonomy({}))
+        self.assertEqual('', flatten_taxonomy(None))
+
+
+class TestTaxonLabels(unittest.TestCase):
+    def setUp(self):
+        self.store = RecordStore(get_test_data())
+        self.labels = self.store.taxon_labels
+
+    def test_labels(self):
+        seq_record = self.store.seq_records[1]
+        self.assertEqual('CP100_11_Aus_bus', self.labels.get_label(seq_record))
+        self.assertEqual('CP100_11_Aus_bus', self.labels.get_short_label(seq_record))
+        seq_record.taxonomy['orden'] = 'Lepidoptera'
+        self.assertEqual('CP100_11_Aus_bus', TaxonLabels().get_short_label(seq_record))
+        self.assertEqual('CP100_11_Lepidoptera_Aus_bus', TaxonLabels().get_label(seq_record))
+
+    def test_labels_are_computed_once_per_voucher(self):
+        for seq_record in self.store:
+            self.labels.get_label(seq_record)
+        self.assertEqual(10, len(self.labels._labels))
+
+    def test_missing_ranks(self):
+        seq_record = SeqRecordExpanded('ACGT', voucher_code='CP1', gene_code='COI',
+                                       taxonomy={'genus': 'Aus'})
+        self.assertEqual('CP1_Aus_', TaxonLabels().get_short_label(seq_record))
+
+    def test_width_is_kept_per_gene(self):
+        block = [seq_record for seq_record in self.store if seq_record.gene_code == 'COI-begin']
+        self.assertEqual(70, self.labels.get_width(block))
+        self.assertEqual(70, self.labels.get_width(block[1:] + block[1:2]))
+        self.assertEqual(16, self.labels.get_width(block[1:]))
+        self.labels.discard('COI-begin')
+        self.assertEqual(16, self.labels.get_width(block[1:] + block[1:2]))
+
+
+class TestDatasetLabels(unittest.TestCase):
+    def test_labels_are_shared_by_formats(self):
+        dataset = Dataset(get_test_data(), format='NEXUS', partitioning='by gene')
+        labels = dataset.data.taxon_labels
+        self.assertIs(dataset.record_store.taxon_labels, labels)
+        number_labels = len(labels._labels)
+        dataset.as_format('TNT').dataset_str
+        dataset.as_format('PHYLIP').dataset_str
+        self.assertEqual(number_labels, len(labels._labels))
+
+    def test_width_of_updated_genes(self):
+        dataset = IncrementalDataset(get_test_data(), format='TNT')
+        seq_record = SeqRecordExpanded('?' * 1240, voucher_code='CP100-19', gene_code='ef1a',
+                                       taxonomy={'genus': 'Aus' * 20, 'species': 'bus'},
+                                       reading_frame=2, table=1)
+        dataset.update(added=[seq_record])
+        seq_records = [i for i in get_test_data()
+                       if (i.gene_code, i.voucher_code) != ('ef1a', 'CP100-19')]
+        expected = Dataset(seq_records + [seq_record], format='TNT')
+        self.assertEqual(expected.dataset_str, dataset.dataset_str)
@@ -0,0 +1,49 @@
+import unittest
+from unittest import mock
+
+from seqrecord_expanded import SeqRecordExpanded
+
+from dataset_creator import matrix
+from dataset_creator import Dataset
+from .generate_test_data import get_test_data
+
+
+@unittest.skipUnless(matrix.is_available(), 'NumPy is not installed')
+class TestGeneMatrix(unittest.TestCase):
+    def make_seq_records(self, reading_frame):
+        return [
+            SeqRecordExpanded('ATACGGTATACG'[:length] + 'acg?', gene_code='wingless',
+                              voucher_code='CP100-1{0}'.format(length),
+                              reading_frame=reading_frame, table=1)
+            for length in range(0, 13)
+        ]
+
+    def test_codon_positions(self):
+        methods = {
+            '1st': 'first_codon_position',
+            '2nd': 'second_codon_position',
+            '3rd': 'third_codon_position',
+            '1st-2nd': 'first_and_second_codon_positions',
+        }
+        for reading_frame in [1, 2, 3]:
+            seq_records = self.make_seq_records(reading_frame)
+            gene_matrix = matrix.GeneMatrix(seq_records, reading_frame)
+            for codon_positions, method in methods.items():
+                expected = [getattr(seq_record, method)() for seq_record in seq_records]
+                self.assertEqual(expected, gene_matrix.codon_positions(codon_positions))
+
+    def test_dataset_without_numpy(self):
+        for codon_positions in ['1st', '2nd', '3rd', '1st-2nd']:
+            for file_format in ['NEXUS', 'PHYLIP', 'TNT']:
+                expected = Dataset(get_test_data(), format=file_format,
+                                   codon_positions=codon_positions)
+                with mock.patch.object(matrix, 'numpy', None):
+                    result = Dataset(get_test_data(), format=file_format,
+                                     codon_positions=codon_positions)
+                self.assertEqual(expected.dataset_str, result.dataset_str)
+
+    def test_dataset_uses_gene_matrix(self):
+        with mock.patch.object(SeqRecordExpanded, 'first_codon_position', autospec=True,
+                               side_effect=SeqRecordExpanded.first_codon_position) as method:
+            Dataset(get_test_data(), format='NEXUS', codon_positions='1st')
+        self.assertEqual(0, method.call_count)
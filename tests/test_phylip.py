@@ -29,3 +29,13 @@ class TestPhylip(unittest.TestCase):
         with open(os.path.join(PHYLIP_DATA_PATH, 'charset_block_file.txt'), 'r') as handle:
             expected = handle.read()
             self.assertEqual(expected.strip(), result)
+
+    def test_dataset_is_not_written_to_working_directory(self):
+        files_before = sorted(os.listdir(os.getcwd()))
+        Dataset(self.test_data, format='PHYLIP', partitioning='by gene')
+        self.assertEqual(files_before, sorted(os.listdir(os.getcwd())))
+
+    def test_dataset_with_sequences_of_different_length(self):
+        self.test_data[0].seq = 'ACTG'
+        self.assertRaises(ValueError, Dataset, self.test_data, format='PHYLIP',
+                          partitioning='by gene')
@@ -0,0 +1,72 @@
+import unittest
+
+from dataset_creator import Dataset
+from dataset_creator.profiling import Profiler
+from .generate_test_data import get_test_data
+
+
+class TestProfiler(unittest.TestCase):
+    def test_times_are_added_up(self):
+        profiler = Profiler()
+        profiler.add_timing('prepare_data', 1.0)
+        profiler.add_timing('prepare_data', 0.5)
+        self.assertEqual({'prepare_data': 1.5}, profiler.timings)
+
+    def test_hook(self):
+        events = []
+        profiler = Profiler(hook=lambda *event: events.append(event))
+        profiler.count('get_seq')
+        profiler.add_bytes('NEXUS', 'ACGT\n')
+        with profiler.gene('COI'):
+            pass
+        self.assertEqual(('count', 'get_seq', 1), events[0])
+        self.assertEqual(('bytes', 'NEXUS', 5), events[1])
+        self.assertEqual(('gene', 'COI'), events[2][:2])
+
+
+class TestDatasetProfiling(unittest.TestCase):
+    def test_not_profiled_by_default(self):
+        dataset = Dataset(get_test_data(), format='NEXUS')
+        self.assertIsNone(dataset.profiler)
+        self.assertIsNone(dataset.timings)
+
+    def test_timings(self):
+        dataset = Dataset(get_test_data(), format='NEXUS', profile=True)
+        self.assertEqual(
+            ['sort_seq_records', 'prepare_data', 'create_dataset_header',
+             'create_dataset_block', 'create_dataset_footer', 'put_everything_together',
+             'create_extra_dataset_file'],
+            list(dataset.timings),
+        )
+
+    def test_gene_timings(self):
+        for file_format in ['NEXUS', 'PHYLIP', 'FASTA', 'TNT', 'MEGA', 'GenBankFASTA']:
+            dataset = Dataset(get_test_data(), format=file_format, profile=True)
+            self.assertEqual(dataset.gene_codes, list(dataset.profiler.gene_timings),
+                             file_format)
+
+    def test_counts(self):
+        dataset = Dataset(get_test_data(), format='NEXUS', aminoacids=True, profile=True)
+        counts = dataset.profiler.counts
+        self.assertEqual(len(dataset.seq_records), counts['translate'])
+        self.assertNotIn('degenerate', counts)
+
+    def test_get_seq_counts(self):
+        dataset = Dataset(get_test_data(), format='NEXUS', profile=True)
+        self.assertEqual(len(dataset.seq_records), dataset.profiler.counts['get_seq'])
+
+    def test_bytes_emitted(self):
+        dataset = Dataset(get_test_data(), format='NEXUS', profile=True)
+        phylip = dataset.as_format('PHYLIP')
+        self.assertEqual(
+            {'NEXUS': len(dataset.dataset_str), 'PHYLIP': len(phylip.dataset_str)},
+            dataset.profiler.bytes_emitted,
+        )
+
+    def test_bytes_emitted_when_streaming(self):
+        events = []
+        dataset = Dataset(get_test_data(), format='TNT', stream=True,
+                          profile_hook=lambda *event: events.append(event))
+        dataset_str = ''.join(dataset.iter_chunks())
+        self.assertEqual({'TNT': len(dataset_str)}, dataset.profiler.bytes_emitted)
+        self.assertIn('gene', [event[0] for event in events])
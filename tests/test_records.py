@@ -0,0 +1,85 @@
+import pickle
+import unittest
+
+from seqrecord_expanded import SeqRecordExpanded
+
+from dataset_creator import Dataset
+from dataset_creator.records import RecordStore
+from dataset_creator.stored_records import MissingSeqRecord
+from dataset_creator.stored_records import StoredSeqRecord
+from .generate_test_data import get_test_data
+
+
+class TestRecordStore(unittest.TestCase):
+    def setUp(self):
+        self.test_data = get_test_data()
+
+    def test_records_are_sorted(self):
+        store = RecordStore(self.test_data)
+        self.assertEqual(len(self.test_data), len(store))
+        self.assertEqual(('ArgKin', 'CP100_10'),
+                         (store.seq_records[0].gene_code, store.seq_records[0].voucher_code))
+        self.assertEqual(('wingless', 'CP100_19'),
+                         (store.seq_records[-1].gene_code, store.seq_records[-1].voucher_code))
+
+    def test_fields(self):
+        store = RecordStore(self.test_data)
+        for seq_record in self.test_data:
+            stored = [i for i in store if i.gene_code == seq_record.gene_code and
+                      i.voucher_code == seq_record.voucher_code.replace('-', '_')][0]
+            self.assertEqual(str(seq_record.seq), str(stored.seq))
+            self.assertEqual(seq_record.taxonomy, stored.taxonomy)
+            self.assertEqual(seq_record.reading_frame, stored.reading_frame)
+            self.assertEqual(seq_record.table, stored.table)
+
+    def test_repeated_values_are_shared(self):
+        store = RecordStore(self.test_data)
+        self.assertEqual(7, len(store.gene_codes))
+        self.assertEqual(10, len(store.voucher_codes))
+        first, second = [i for i in store if i.voucher_code == 'CP100_10'][:2]
+        self.assertIs(first.taxonomy, second.taxonomy)
+        self.assertIsNot(self.test_data[0].taxonomy, first.taxonomy)
+
+    def test_input_records_are_not_modified(self):
+        RecordStore(self.test_data)
+        self.assertEqual('CP100-10', self.test_data[0].voucher_code)
+        Dataset(self.test_data, format='NEXUS', aminoacids=True)
+        self.assertEqual('CP100-10', self.test_data[0].voucher_code)
+        self.assertEqual(get_test_data()[0].seq, self.test_data[0].seq)
+
+    def test_voucher_codes_for_bankit(self):
+        store = RecordStore(self.test_data, convert_voucher_codes=False)
+        self.assertEqual('CP100-10', store.seq_records[0].voucher_code)
+
+    def test_reading_frame_correction(self):
+        seq_record = SeqRecordExpanded('ACGTACGT', voucher_code='CP100-10', gene_code='COI',
+                                       reading_frame=3, table=1)
+        stored = RecordStore([seq_record]).seq_records[0]
+        self.assertEqual(seq_record.translate(), stored.translate())
+        self.assertEqual(str(seq_record.seq), str(stored.seq))
+        self.assertEqual(seq_record.degenerate(), stored.degenerate())
+
+    def test_pickle(self):
+        stored = RecordStore(self.test_data).seq_records[0]
+        stored._correct_seq_based_on_reading_frame()
+        seq_record = pickle.loads(pickle.dumps(stored))
+        self.assertNotIsInstance(seq_record, StoredSeqRecord)
+        self.assertEqual(str(stored.seq), str(seq_record.seq))
+        self.assertEqual(stored.voucher_code, seq_record.voucher_code)
+        self.assertEqual(stored.translate(), seq_record.translate())
+
+    def test_dataset_from_record_store(self):
+        store = RecordStore(get_test_data())
+        self.assertEqual(Dataset(get_test_data(), format='TNT').dataset_str,
+                         Dataset(store, format='TNT').dataset_str)
+        self.assertRaises(ValueError, Dataset, store, format='Bankit')
+
+
+class TestMissingSeqRecord(unittest.TestCase):
+    def test_missing_record(self):
+        voucher_record = RecordStore(get_test_data()).seq_records[0]
+        seq_record = MissingSeqRecord(voucher_record, 'COI', 8, 2, 1)
+        self.assertEqual(('COI', 'CP100_10'), (seq_record.gene_code, seq_record.voucher_code))
+        self.assertIs(voucher_record.taxonomy, seq_record.taxonomy)
+        self.assertEqual('????????', str(seq_record.seq))
+        self.assertEqual('??', seq_record.first_codon_position())
@@ -0,0 +1,108 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from seqrecord_expanded import SeqRecordExpanded
+
+from dataset_creator import Dataset
+from .generate_test_data import get_test_data
+from .test_fill_missing import remove_records
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.filename = os.path.join(self.path, 'records.snapshot')
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_formats_are_the_same_as_from_records(self):
+        for options in [{}, {'aminoacids': True}, {'codon_positions': '1st'},
+                        {'degenerate': 'S'}, {'partitioning': '1st-2nd, 3rd'}]:
+            Dataset(get_test_data(), format='NEXUS', lazy=True, **options).save_prepared(
+                self.filename)
+            for file_format in ['NEXUS', 'PHYLIP', 'FASTA', 'TNT', 'GenBankFASTA']:
+                expected = Dataset(get_test_data(), format=file_format, **options)
+                dataset = Dataset.load_prepared(self.filename, format=file_format)
+                self.assertEqual(expected.dataset_str, dataset.dataset_str,
+                                 (file_format, options))
+                self.assertEqual(expected.extra_dataset_str, dataset.extra_dataset_str)
+
+    def test_options_of_saved_dataset(self):
+        dataset = Dataset(get_test_data(), format='PHYLIP', codon_positions='1st-2nd',
+                          partitioning='by codon position', outgroup='CP100-13')
+        dataset.save_prepared(self.filename)
+        loaded = Dataset.load_prepared(self.filename)
+        self.assertEqual(('PHYLIP', '1st-2nd', 'by codon position', 'CP100_13'),
+                         (loaded.format, loaded.codon_positions, loaded.partitioning,
+                          loaded.outgroup))
+        self.assertEqual(dataset.dataset_str, loaded.dataset_str)
+        self.assertEqual(dataset.data.gene_codes_and_lengths, loaded.data.gene_codes_and_lengths)
+        self.assertEqual(dataset.data.reading_frames, loaded.data.reading_frames)
+
+    def test_sequences_are_not_transformed_again(self):
+        Dataset(get_test_data(), format='NEXUS', aminoacids=True).save_prepared(self.filename)
+        dataset = Dataset.load_prepared(self.filename, profile=True)
+        self.assertNotIn('translate', dataset.profiler.counts)
+        self.assertNotIn('prepare_data', dataset.timings)
+        self.assertEqual(Dataset(get_test_data(), format='NEXUS', aminoacids=True).dataset_str,
+                         dataset.dataset_str)
+
+    def test_warnings(self):
+        seq_records = get_test_data()
+        seq_records.append(SeqRecordExpanded('TAATAGTGA', voucher_code='CP100-20',
+                                             gene_code='ArgKin', reading_frame=1, table=1))
+        seq_records.append(SeqRecordExpanded('ATGTAAATG', voucher_code='CP100-21',
+                                             gene_code='wingless', reading_frame=1, table=1))
+        expected = Dataset(seq_records, format='TNT', aminoacids=True)
+        self.assertEqual(2, len(expected.warnings))
+        Dataset(seq_records, format='NEXUS', aminoacids=True,
+                lazy=True).save_prepared(self.filename)
+        dataset = Dataset.load_prepared(self.filename, format='TNT')
+        self.assertEqual(expected.warnings, dataset.warnings)
+        self.assertEqual(expected.dataset_str, dataset.dataset_str)
+
+    def test_fill_missing(self):
+        seq_records = remove_records(get_test_data(), [('ArgKin', 'CP100-10'),
+                                                       ('wingless', 'CP100-19')])
+        Dataset(seq_records, format='NEXUS', codon_positions='1st',
+                fill_missing=True).save_prepared(self.filename)
+        for file_format in ['NEXUS', 'TNT', 'MEGA']:
+            expected = Dataset(seq_records, format=file_format, codon_positions='1st',
+                               fill_missing=True)
+            dataset = Dataset.load_prepared(self.filename, format=file_format)
+            self.assertEqual(expected.dataset_str, dataset.dataset_str)
+            self.assertEqual(expected.taxa, dataset.taxa)
+
+    def test_stream_and_workers(self):
+        Dataset(get_test_data(), format='NEXUS', degenerate='SZ',
+                lazy=True).save_prepared(self.filename)
+        dataset = Dataset.load_prepared(self.filename, stream=True, workers=2)
+        self.assertIsNone(dataset.dataset_str)
+        self.assertEqual(Dataset(get_test_data(), format='NEXUS', degenerate='SZ').dataset_str,
+                         ''.join(dataset.iter_chunks()))
+
+    def test_save_loaded_dataset(self):
+        Dataset(get_test_data(), format='TNT', aminoacids=True).save_prepared(self.filename)
+        other_filename = os.path.join(self.path, 'other.snapshot')
+        Dataset.load_prepared(self.filename, lazy=True).save_prepared(other_filename)
+        with open(self.filename, 'rb') as handle, open(other_filename, 'rb') as other_handle:
+            self.assertEqual(handle.read(), other_handle.read())
+
+    def test_other_preparation_options(self):
+        Dataset(get_test_data(), format='NEXUS', lazy=True).save_prepared(self.filename)
+        self.assertRaises(ValueError, Dataset.load_prepared, self.filename, aminoacids=True)
+        self.assertRaises(ValueError, Dataset.load_prepared, self.filename,
+                          codon_positions='3rd')
+        self.assertRaises(ValueError, Dataset.load_prepared, self.filename, fill_missing=True)
+        self.assertRaises(ValueError, Dataset.load_prepared, self.filename, format='Bankit')
+        Dataset.load_prepared(self.filename, codon_positions='ALL', aminoacids=False)
+
+    def test_not_a_snapshot(self):
+        with open(self.filename, 'w') as handle:
+            handle.write('#NEXUS\n')
+        self.assertRaises(ValueError, Dataset.load_prepared, self.filename)
+        open(self.filename, 'w').close()
+        self.assertRaises(ValueError, Dataset.load_prepared, self.filename)
@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from dataset_creator import Dataset
+from dataset_creator.sweep import DatasetSweep
+from dataset_creator.sweep import make_filename
+from dataset_creator.translation import translate_block
+from .generate_test_data import count_translated
+from .generate_test_data import get_test_data
+
+
+OPTION_SETS = [
+    {'format': 'NEXUS', 'codon_positions': 'ALL', 'partitioning': 'by gene'},
+    {'format': 'NEXUS', 'codon_positions': 'ALL', 'partitioning': 'by codon position'},
+    {'format': 'PHYLIP', 'codon_positions': '1st-2nd', 'partitioning': '1st-2nd, 3rd'},
+    {'format': 'FASTA', 'codon_positions': 'ALL', 'partitioning': '1st-2nd, 3rd'},
+    {'format': 'NEXUS', 'aminoacids': True},
+    {'format': 'TNT', 'aminoacids': True},
+    {'format': 'TNT', 'codon_positions': '3rd', 'partitioning': 'by gene'},
+    {'format': 'MEGA', 'degenerate': 'S'},
+    {'format': 'NEXUS', 'degenerate': 'normal'},
+]
+
+
+class TestDatasetSweep(unittest.TestCase):
+    def setUp(self):
+        self.maxDiff = None
+
+    def test_render_is_identical_to_datasets(self):
+        sweep = DatasetSweep(get_test_data(), OPTION_SETS)
+        for options, creator in zip(OPTION_SETS, sweep.render()):
+            expected = Dataset(get_test_data(), **options)
+            self.assertEqual(expected.dataset_str, creator.dataset_str, options)
+            self.assertEqual(expected.extra_dataset_str, creator.extra_dataset_str)
+
+    def test_translates_once(self):
+        test_data = get_test_data()
+        with mock.patch('dataset_creator.translation.translate_block',
+                        side_effect=translate_block) as translate:
+            DatasetSweep(test_data, OPTION_SETS).render()
+        self.assertEqual(len(test_data), count_translated(translate))
+
+    def test_invalid_option_set_is_rejected_before_rendering(self):
+        option_sets = OPTION_SETS + [{'format': 'MEGA', 'partitioning': 'by codon position'}]
+        with mock.patch('dataset_creator.translation.translate_block',
+                        side_effect=translate_block) as translate:
+            self.assertRaises(ValueError, DatasetSweep, get_test_data(), option_sets)
+        self.assertEqual(0, translate.call_count)
+
+    def test_write_to_directory(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+
+        filenames = DatasetSweep(get_test_data(), OPTION_SETS).write_to_directory(path)
+        self.assertEqual(len(OPTION_SETS), len(set(filenames)))
+        for options, filename in zip(OPTION_SETS, filenames):
+            with open(filename) as handle:
+                self.assertEqual(Dataset(get_test_data(), **options).dataset_str,
+                                 handle.read())
+        self.assertTrue(os.path.isfile(filenames[2] + '.charsets.txt'))
+
+    def test_make_filename(self):
+        self.assertEqual('PHYLIP_1st-2nd_1st-2nd_3rd_aminoacids.phy',
+                         make_filename({'format': 'PHYLIP', 'codon_positions': '1st-2nd',
+                                        'partitioning': '1st-2nd, 3rd', 'aminoacids': True}))
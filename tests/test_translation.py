@@ -0,0 +1,33 @@
+import unittest
+from unittest import mock
+
+from seqrecord_expanded import SeqRecordExpanded
+from seqrecord_expanded.exceptions import TranslationErrorMixedGappedSeq
+
+from dataset_creator import Dataset
+from dataset_creator import matrix
+from dataset_creator.translation import CodonLookup
+from dataset_creator.translation import translate_block
+from .generate_test_data import make_random_seq_records
+
+
+class TestTranslation(unittest.TestCase):
+    def test_translate_block(self):
+        expected = [(seq_record.translate(), seq_record.voucher_code)
+                    for seq_record in make_random_seq_records(200)]
+        result = translate_block(make_random_seq_records(200))
+        self.assertEqual([aa for aa, voucher_code in expected], [aa for aa, warning in result])
+        for (aa, voucher_code), (_, warning) in zip(expected, result):
+            self.assertEqual('*' in aa, warning is not None)
+
+    def test_translate_without_numpy(self):
+        with mock.patch.object(matrix, 'numpy', None):
+            codon_lookup = CodonLookup(1)
+        self.assertEqual('MX*', codon_lookup.translate('ATGNNNtaa'))
+
+    def test_translate_block_invalid_codon(self):
+        seq_record = SeqRecordExpanded('ATGTA!', voucher_code='CP100-10', gene_code='COI',
+                                       reading_frame=1, table=1)
+        self.assertEqual([(None, None)], translate_block([seq_record]))
+        self.assertRaises(TranslationErrorMixedGappedSeq, Dataset, [seq_record],
+                          format='NEXUS', aminoacids=True)
@@ -2,7 +2,10 @@ import unittest
 
 from seqrecord_expanded import SeqRecordExpanded
 
+from dataset_creator.utils import get_reading_frame_seq
 from dataset_creator.utils import get_seq
+from dataset_creator.utils import get_seq_length
+from dataset_creator.utils import make_unique_label
 from dataset_creator.exceptions import WrongParameterFormat
 
 
@@ -39,3 +42,52 @@ class TestUtils(unittest.TestCase):
                                        voucher_code="CP100-10", gene_code="wingless")
         result = get_seq(seq_record, codon_positions='ALL', aminoacids=True)
         self.assertEqual("IRX", result.seq)
+
+    def test_get_reading_frame_seq(self):
+        seq_record = SeqRecordExpanded('ATACGGTAG', table=1, reading_frame=2,
+                                       voucher_code="CP100-10", gene_code="wingless")
+        self.assertEqual('TACGGTAG', get_reading_frame_seq(seq_record))
+        self.assertEqual('ATACGGTAG', str(seq_record.seq))
+
+        seq_record.translate()
+        self.assertEqual('TACGGTAG', get_reading_frame_seq(seq_record))
+
+    def test_make_unique_label(self):
+        self.assertEqual('CP100_10', make_unique_label([], 'CP100_10'))
+        self.assertEqual('CP100_10.copy', make_unique_label(['CP100_10'], 'CP100_10'))
+        self.assertEqual('CP100_10.copy1',
+                         make_unique_label(['CP100_10', 'CP100_10.copy'], 'CP100_10'))
+
+    def test_make_unique_label_with_last_copies(self):
+        labels = ['CP100_10', 'CP100_11', 'CP100_10', 'CP100_10.copy', 'CP100_10']
+        previous = []
+        expected = []
+        for label in labels:
+            expected.append(make_unique_label(previous, label))
+            previous.append(expected[-1])
+        seen = set()
+        last_copies = {}
+        for label, expected_label in zip(labels, expected):
+            unique_label = make_unique_label(seen, label, last_copies)
+            self.assertEqual(expected_label, unique_label)
+            seen.add(unique_label)
+
+    def test_get_seq_length(self):
+        for reading_frame in [1, 2, 3]:
+            for length in range(9, 13):
+                for options in [{'codon_positions': 'ALL'}, {'codon_positions': '1st'},
+                                {'codon_positions': '2nd'}, {'codon_positions': '3rd'},
+                                {'codon_positions': '1st-2nd'},
+                                {'codon_positions': 'ALL', 'aminoacids': True},
+                                {'codon_positions': 'ALL', 'degenerate': 'S'}]:
+                    seq_record = SeqRecordExpanded('ATACGGTATACG'[:length], table=1,
+                                                   reading_frame=reading_frame,
+                                                   voucher_code="CP100-10",
+                                                   gene_code="wingless")
+                    expected = len(get_seq(seq_record, **options).seq)
+                    self.assertEqual(expected, get_seq_length(seq_record, **options),
+                                     (reading_frame, length, options))
+
+    def test_get_seq_length_wrong_codon_positions(self):
+        self.assertRaises(WrongParameterFormat, get_seq_length, seq_record=self.seq_record,
+                          codon_positions='1st-3rd')